@@ -20,6 +20,7 @@ from .dedicated_times import router as dedicated_times_router
 from .photos import router as photos_router
 from .contacts import router as contacts_router 
 from .budgets import router as budgets_router
+from .aggregates import router as aggregates_router
 
 api_router = APIRouter()
 api_router.include_router(dev_router, prefix="/dev", tags=["development"])
@@ -42,4 +43,5 @@ api_router.include_router(reports_router, prefix="/reports", tags=["reports"])
 api_router.include_router(dedicated_times_router, prefix="/dedicated-times", tags=["dedicated-times"])
 api_router.include_router(photos_router, prefix="/photos", tags=["photos"])
 api_router.include_router(contacts_router, prefix="/contacts", tags=["contacts"])
-api_router.include_router(budgets_router, prefix="/budgets", tags=["budgets"])
\ No newline at end of file
+api_router.include_router(budgets_router, prefix="/budgets", tags=["budgets"])
+api_router.include_router(aggregates_router, prefix="/aggregates", tags=["aggregates"])
\ No newline at end of file
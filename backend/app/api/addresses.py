@@ -1,16 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
-from app.models import Address, AddressCreate, AddressResponse, AddressUpdate
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.updates import RowUpdater
+from app.models import Address, AddressCreate, AddressResponse, AddressUpdate, Supplier, Order
 
 router = APIRouter()
 
+address_list = ListQuery(
+    Address,
+    sort_fields=["city", "state", "postal_code", "created_at", "updated_at"],
+    filter_fields=["city", "state", "country", "postal_code"]
+)
+
+address_validator = RowValidator(Address)
+
+address_updater = RowUpdater(Address, AddressResponse, not_found="Address not found")
+address_deleter = RowDeleter(
+    Address, not_found="Address not found",
+    guards={
+        Supplier.address_id: "Cannot delete address that is being used by suppliers",
+        Order.shipping_address_id: (409, "Address has orders"),
+    }
+)
+
 @router.get("/", response_model=list[AddressResponse])
-def get_addresses(session: Session = Depends(get_session)):
+def get_addresses(page: ListParams = Depends(address_list), session: Session = Depends(get_session)):
     """Get all addresses"""
-    statement = select(Address)
-    results = session.exec(statement)
+    if page.stream:
+        return page.stream_response(AddressResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(Address))
     return [{
         "id": address.id,
         "street": address.street,
@@ -25,13 +49,17 @@ def get_addresses(session: Session = Depends(get_session)):
     } for address in results]
 
 @router.get("/{address_id}", response_model=AddressResponse)
-def get_address(address_id: int, session: Session = Depends(get_session)):
+def get_address(address_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
     """Get a specific address by ID"""
+    cached = address_validator.not_modified(session, request, address_id)
+    if cached is not None:
+        return cached
     statement = select(Address).where(Address.id == address_id)
     result = session.exec(statement)
     address = result.one_or_none()
     if not address:
         raise HTTPException(status_code=404, detail="Address not found")
+    address_validator.tag(response, address)
     return {
         "id": address.id,
         "street": address.street,
@@ -66,57 +94,13 @@ def create_address(address: AddressCreate, session: Session = Depends(get_sessio
     }
 
 @router.put("/{address_id}", response_model=AddressResponse)
-def update_address(address_id: int, address_update: AddressUpdate, session: Session = Depends(get_session)):
+def update_address(address_id: int, address_update: AddressUpdate, request: Request, session: Session = Depends(get_session)):
     """Update an existing address"""
-    # Get the existing address
-    statement = select(Address).where(Address.id == address_id)
-    result = session.exec(statement)
-    address = result.one_or_none()
-    if not address:
-        raise HTTPException(status_code=404, detail="Address not found")
-
     # Update only the fields that were provided
-    update_data = address_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(address, field, value)
-    
-    # Update the updated_at timestamp
-    address.updated_at = datetime.utcnow()
-
-    session.add(address)
-    session.commit()
-    session.refresh(address)
-
-    return {
-        "id": address.id,
-        "street": address.street,
-        "exterior_number": address.exterior_number,
-        "interior_number": address.interior_number,
-        "neighborhood": address.neighborhood,
-        "postal_code": address.postal_code,
-        "city": address.city,
-        "state": address.state,
-        "country": address.country,
-        "notes": address.notes
-    }
+    return address_updater.apply(session, request, address_id, address_update.model_dump(exclude_unset=True))
 
 @router.delete("/{address_id}")
 def delete_address(address_id: int, session: Session = Depends(get_session)):
     """Delete an address"""
-    # First check if the address is being used by any supplier
-    statement = select(Address).where(Address.id == address_id)
-    address = session.exec(statement).one_or_none()
-    if not address:
-        raise HTTPException(status_code=404, detail="Address not found")
-    
-    # Check if the address has any suppliers
-    if address.suppliers:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete address that is being used by suppliers"
-        )
-    
-    statement = delete(Address).where(Address.id == address_id)
-    session.exec(statement)
-    session.commit()
-    return {"message": "Address deleted"} 
\ No newline at end of file
+    address_deleter.apply(session, address_id)
+    return {"message": "Address deleted"}
\ No newline at end of file
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import Select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.aggregates import AggregateQuery, aggregate_response, month
+from app.core.database import get_async_session
+from app.models import (
+    Order, ArticleOrder, Requirement, Article, OrderSummary
+)
+
+router = APIRouter()
+
+order_totals = AggregateQuery(
+    select_from=Order,
+    dimensions={
+        "supplier_id": Order.supplier_id,
+        "status_id": Order.status_id,
+        "currency": Order.currency,
+        "month": month(Order.date),
+    },
+    measures={
+        "count": func.count(),
+        "subtotal": func.sum(Order.subtotal),
+        "vat": func.sum(Order.vat),
+        "discount": func.sum(Order.discount),
+        "total": func.sum(Order.total),
+    },
+    date_column=Order.date
+)
+
+article_order_totals = AggregateQuery(
+    select_from=ArticleOrder.__table__.join(Order.__table__, ArticleOrder.order_id == Order.id),
+    dimensions={
+        "supplier_id": Order.supplier_id,
+        "status_id": ArticleOrder.status_id,
+        "currency": Order.currency,
+        "month": month(Order.date),
+    },
+    measures={
+        "count": func.count(),
+        "total": func.sum(ArticleOrder.total),
+    },
+    date_column=Order.date
+)
+
+# Read from the maintained summary table instead of joining five tables
+project_spend = AggregateQuery(
+    select_from=OrderSummary,
+    dimensions={
+        "project_id": OrderSummary.project_id,
+        "supplier_id": OrderSummary.supplier_id,
+        "currency": OrderSummary.currency,
+        "month": OrderSummary.month,
+    },
+    measures={
+        "lines": func.sum(OrderSummary.line_count),
+        "total": func.sum(OrderSummary.total),
+    },
+    date_column=OrderSummary.month
+)
+
+requirement_counts = AggregateQuery(
+    select_from=Requirement,
+    dimensions={
+        "state_id": Requirement.state_id,
+        "project_id": Requirement.project_id,
+        "month": month(Requirement.request_date),
+    },
+    measures={
+        "count": func.count(),
+        "open": func.count().filter(Requirement.closing_date.is_(None)),
+        "closed": func.count().filter(Requirement.closing_date.is_not(None)),
+    },
+    date_column=Requirement.request_date
+)
+
+article_counts = AggregateQuery(
+    select_from=Article.__table__.outerjoin(Requirement.__table__, Article.requirement_id == Requirement.id),
+    dimensions={
+        "state_id": Article.state_id,
+        "project_id": Requirement.project_id,
+        "requirement_id": Article.requirement_id,
+    },
+    measures={
+        "count": func.count(),
+    },
+    date_column=Article.created_at
+)
+
+@router.get("/orders")
+async def get_order_aggregates(statement: Select = Depends(order_totals), session: AsyncSession = Depends(get_async_session)):
+    """Order count and money totals per group; group by status_id for counts per status"""
+    return aggregate_response(await session.exec(statement))
+
+@router.get("/article-orders")
+async def get_article_order_aggregates(statement: Select = Depends(article_order_totals), session: AsyncSession = Depends(get_async_session)):
+    """Article order count and total per group, dated by their order"""
+    return aggregate_response(await session.exec(statement))
+
+@router.get("/project-spend")
+async def get_project_spend(statement: Select = Depends(project_spend), session: AsyncSession = Depends(get_async_session)):
+    """Article order lines and total per project, supplier, currency and month.
+
+    Served from the order summary table, refreshed a few seconds behind
+    writes to orders and article orders.
+    """
+    return aggregate_response(await session.exec(statement))
+
+@router.get("/requirements")
+async def get_requirement_aggregates(statement: Select = Depends(requirement_counts), session: AsyncSession = Depends(get_async_session)):
+    """Requirement count and open/closed counts per group"""
+    return aggregate_response(await session.exec(statement))
+
+@router.get("/articles")
+async def get_article_aggregates(statement: Select = Depends(article_counts), session: AsyncSession = Depends(get_async_session)):
+    """Article count per group"""
+    return aggregate_response(await session.exec(statement))
@@ -1,16 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlmodel import Session, select
 from app.core.database import get_session
-from app.models import ArticleOrderStatus, ArticleOrderStatusCreate, ArticleOrderStatusResponse, ArticleOrderStatusUpdate
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.reference_cache import reference_cache
+from app.core.updates import RowUpdater
+from app.models import ArticleOrderStatus, ArticleOrderStatusCreate, ArticleOrderStatusResponse, ArticleOrderStatusUpdate, ArticleOrder
 
 router = APIRouter()
 
+article_order_status_list = ListQuery(
+    ArticleOrderStatus,
+    sort_fields=["name", "order", "created_at", "updated_at"],
+    filter_fields=["name", "active"]
+)
+
+# Cached rows carry the ETags of the reference cache
+article_order_status_updater = RowUpdater(
+    ArticleOrderStatus, ArticleOrderStatusResponse, not_found="Article order status not found", etag=False
+)
+article_order_status_deleter = RowDeleter(
+    ArticleOrderStatus, not_found="Article order status not found",
+    guards={ArticleOrder.status_id: "Cannot delete status that is being used by article orders"}
+)
+
 @router.get("/", response_model=list[ArticleOrderStatusResponse])
-def get_article_order_statuses(session: Session = Depends(get_session)):
+def get_article_order_statuses(request: Request, page: ListParams = Depends(article_order_status_list), session: Session = Depends(get_session)):
     """Get all article order statuses"""
-    statement = select(ArticleOrderStatus)
-    results = session.exec(statement)
+    if page.stream:
+        return page.stream_response(ArticleOrderStatusResponse)
+    cached = reference_cache.page_response(ArticleOrderStatus, page, request)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(ArticleOrderStatus))
     return [{
         "id": status.id,
         "name": status.name,
@@ -22,22 +44,9 @@ def get_article_order_statuses(session: Session = Depends(get_session)):
     } for status in results]
 
 @router.get("/{status_id}", response_model=ArticleOrderStatusResponse)
-def get_article_order_status(status_id: int, session: Session = Depends(get_session)):
+def get_article_order_status(status_id: int, request: Request):
     """Get a specific article order status by ID"""
-    statement = select(ArticleOrderStatus).where(ArticleOrderStatus.id == status_id)
-    result = session.exec(statement)
-    status = result.one_or_none()
-    if not status:
-        raise HTTPException(status_code=404, detail="Article order status not found")
-    return {
-        "id": status.id,
-        "name": status.name,
-        "description": status.description,
-        "order": status.order,
-        "active": status.active,
-        "created_at": status.created_at,
-        "updated_at": status.updated_at
-    }
+    return reference_cache.row_response(ArticleOrderStatus, status_id, request, "Article order status not found")
 
 @router.post("/", response_model=ArticleOrderStatusResponse)
 def create_article_order_status(status: ArticleOrderStatusCreate, session: Session = Depends(get_session)):
@@ -58,6 +67,7 @@ def create_article_order_status(status: ArticleOrderStatusCreate, session: Sessi
     db_status = ArticleOrderStatus.model_validate(status)
     session.add(db_status)
     session.commit()
+    reference_cache.invalidate(ArticleOrderStatus)
     session.refresh(db_status)
     return {
         "id": db_status.id,
@@ -72,63 +82,20 @@ def create_article_order_status(status: ArticleOrderStatusCreate, session: Sessi
 @router.delete("/{status_id}")
 def delete_article_order_status(status_id: int, session: Session = Depends(get_session)):
     """Delete an article order status"""
-    # First check if the status is being used by any article order
-    statement = select(ArticleOrderStatus).where(ArticleOrderStatus.id == status_id)
-    status = session.exec(statement).one_or_none()
-    if not status:
-        raise HTTPException(status_code=404, detail="Article order status not found")
-    
-    # Check if the status has any articles
-    if status.articles:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete status that is being used by article orders"
-        )
-    
-    statement = delete(ArticleOrderStatus).where(ArticleOrderStatus.id == status_id)
-    session.exec(statement)
-    session.commit()
+    article_order_status_deleter.apply(session, status_id)
+    reference_cache.invalidate(ArticleOrderStatus)
     return {"message": "Article order status deleted"}
 
 @router.put("/{status_id}", response_model=ArticleOrderStatusResponse)
-def update_article_order_status(status_id: int, status_update: ArticleOrderStatusUpdate, session: Session = Depends(get_session)):
+def update_article_order_status(status_id: int, status_update: ArticleOrderStatusUpdate, request: Request, session: Session = Depends(get_session)):
     """Update an article order status"""
-    # Get the existing status
-    statement = select(ArticleOrderStatus).where(ArticleOrderStatus.id == status_id)
-    result = session.exec(statement)
-    status = result.one_or_none()
-    if not status:
-        raise HTTPException(status_code=404, detail="Article order status not found")
-    
-    # If name is being updated, check if it conflicts with existing status
-    if status_update.name is not None and status_update.name != status.name:
-        existing_status = session.exec(
-            select(ArticleOrderStatus).where(ArticleOrderStatus.name == status_update.name)
-        ).one_or_none()
-        if existing_status:
-            raise HTTPException(
-                status_code=409,
-                detail=f"Article order status with name '{status_update.name}' already exists"
-            )
-    
+    # If name is being updated, check if it conflicts with another status
+    article_order_status_updater.ensure_unique(
+        session, status_id, "name", status_update.name,
+        f"Article order status with name '{status_update.name}' already exists", status_code=409
+    )
+
     # Update the status with the provided fields
-    status_data = status_update.model_dump(exclude_unset=True)
-    for key, value in status_data.items():
-        setattr(status, key, value)
-    
-    # Update the updated_at timestamp
-    status.updated_at = datetime.utcnow()
-    
-    session.add(status)
-    session.commit()
-    session.refresh(status)
-    
-    return {
-        "id": status.id,
-        "name": status.name,
-        "description": status.description,
-        "order": status.order,
-        "active": status.active,
-        "created_at": status.created_at,
-        "updated_at": status.updated_at
-    } 
\ No newline at end of file
+    response = article_order_status_updater.apply(session, request, status_id, status_update.model_dump(exclude_unset=True))
+    reference_cache.invalidate(ArticleOrderStatus)
+    return response
@@ -1,61 +1,70 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
-from app.core.database import get_session
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.batch import BatchWriter
+from app.core.conditional import RowValidator
+from app.core.database import get_session, get_async_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.serialization import rows_response, row_response, response_columns
+from app.core.streaming import StreamFormat, stream_response
+from app.core.updates import RowUpdater
 from app.models import (
     ArticleOrder, ArticleOrderCreate, ArticleOrderResponse, ArticleOrderUpdate,
-    Order, Article, ArticleOrderStatus
+    ArticleOrderBatch, ArticleOrderBatchResponse, Order, Article, ArticleOrderStatus
 )
-from decimal import Decimal
-from datetime import datetime
 
 router = APIRouter()
 
+article_order_list = ListQuery(
+    ArticleOrder,
+    sort_fields=["position", "total", "created_at", "updated_at"],
+    filter_fields=["order_id", "article_req_id", "status_id", "created_at"]
+)
+
+article_order_validator = RowValidator(ArticleOrder)
+
+article_order_updater = RowUpdater(ArticleOrder, ArticleOrderResponse, not_found="Article order not found")
+article_order_deleter = RowDeleter(ArticleOrder, not_found="Article order not found")
+
+article_order_batch = BatchWriter(
+    ArticleOrder, ArticleOrderResponse, not_found="Article order not found",
+    references={
+        "order_id": (Order, "Order not found"),
+        "article_req_id": (Article, "Article not found"),
+        "status_id": (ArticleOrderStatus, "Article order status not found"),
+    }
+)
+
 @router.get("/", response_model=list[ArticleOrderResponse])
-def get_article_orders(session: Session = Depends(get_session)):
+async def get_article_orders(page: ListParams = Depends(article_order_list), session: AsyncSession = Depends(get_async_session)):
     """Get all article orders"""
-    statement = select(ArticleOrder)
-    results = session.exec(statement)
-    return [{
-        "id": article_order.id,
-        "order_id": article_order.order_id,
-        "article_req_id": article_order.article_req_id,
-        "status_id": article_order.status_id,
-        "position": article_order.position,
-        "quantity": article_order.quantity,
-        "unit": article_order.unit,
-        "brand": article_order.brand,
-        "model": article_order.model,
-        "unit_price": article_order.unit_price,
-        "total": article_order.total,
-        "notes": article_order.notes,
-        "created_at": article_order.created_at,
-        "updated_at": article_order.updated_at
-    } for article_order in results]
+    if page.stream:
+        return page.stream_response(ArticleOrderResponse)
+    cached = await page.anot_modified(session)
+    if cached is not None:
+        return cached
+    results = await page.afetch(session, select(*response_columns(ArticleOrder, ArticleOrderResponse)))
+    return rows_response(results, ArticleOrderResponse, page.response.headers)
+
+@router.get("/export")
+async def export_article_orders(request: Request, format: StreamFormat = "ndjson"):
+    """Stream every article order matching the list filters as NDJSON or CSV"""
+    statement = article_order_list.export_statement(request, select(*response_columns(ArticleOrder, ArticleOrderResponse)))
+    return stream_response(statement, ArticleOrderResponse, format, filename="article-orders")
 
 @router.get("/{article_order_id}", response_model=ArticleOrderResponse)
-def get_article_order(article_order_id: int, session: Session = Depends(get_session)):
+async def get_article_order(article_order_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
     """Get a specific article order by ID"""
+    cached = await article_order_validator.anot_modified(session, request, article_order_id)
+    if cached is not None:
+        return cached
     statement = select(ArticleOrder).where(ArticleOrder.id == article_order_id)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     article_order = result.one_or_none()
     if not article_order:
         raise HTTPException(status_code=404, detail="Article order not found")
-    return {
-        "id": article_order.id,
-        "order_id": article_order.order_id,
-        "article_req_id": article_order.article_req_id,
-        "status_id": article_order.status_id,
-        "position": article_order.position,
-        "quantity": article_order.quantity,
-        "unit": article_order.unit,
-        "brand": article_order.brand,
-        "model": article_order.model,
-        "unit_price": article_order.unit_price,
-        "total": article_order.total,
-        "notes": article_order.notes,
-        "created_at": article_order.created_at,
-        "updated_at": article_order.updated_at
-    }
+    return article_order_validator.tag(row_response(article_order, ArticleOrderResponse), article_order)
 
 @router.post("/", response_model=ArticleOrderResponse)
 def create_article_order(article_order: ArticleOrderCreate, session: Session = Depends(get_session)):
@@ -94,33 +103,28 @@ def create_article_order(article_order: ArticleOrderCreate, session: Session = D
         "total": db_article_order.total,
         "notes": db_article_order.notes,
         "created_at": db_article_order.created_at,
-        "updated_at": db_article_order.updated_at
+        "updated_at": db_article_order.updated_at,
+        "version": db_article_order.version
     }
 
+@router.post("/batch", response_model=ArticleOrderBatchResponse)
+def batch_article_orders(batch: ArticleOrderBatch, session: Session = Depends(get_session)):
+    """Create, update and delete many article orders in one transaction"""
+    return article_order_batch.apply(session, batch)
+
 @router.delete("/{article_order_id}", response_model=dict)
 def delete_article_order(article_order_id: int, session: Session = Depends(get_session)):
     """Delete an article order by ID"""
-    statement = select(ArticleOrder).where(ArticleOrder.id == article_order_id)
-    article_order = session.exec(statement).first()
-    
-    if not article_order:
-        raise HTTPException(status_code=404, detail="Article order not found")
-    
-    session.delete(article_order)
-    session.commit()
-    
+    article_order_deleter.apply(session, article_order_id)
     return {"message": "Article order deleted"}
 
 @router.put("/{article_order_id}", response_model=ArticleOrderResponse)
-def update_article_order(article_order_id: int, article_order_update: ArticleOrderUpdate, session: Session = Depends(get_session)):
-    """Update an article order by ID"""
-    # Get the existing article order
-    statement = select(ArticleOrder).where(ArticleOrder.id == article_order_id)
-    result = session.exec(statement)
-    article_order = result.one_or_none()
-    if not article_order:
-        raise HTTPException(status_code=404, detail="Article order not found")
+def update_article_order(article_order_id: int, article_order_update: ArticleOrderUpdate, request: Request, session: Session = Depends(get_session)):
+    """Update an article order by ID.
 
+    Send the ETag of the article order as If-Match to have the update
+    refused with 412 when someone else changed it in the meantime.
+    """
     # Verify that the order exists if being updated
     if article_order_update.order_id is not None:
         order = session.exec(select(Order).where(Order.id == article_order_update.order_id)).first()
@@ -140,33 +144,6 @@ def update_article_order(article_order_id: int, article_order_update: ArticleOrd
             raise HTTPException(status_code=404, detail="Article order status not found")
 
     # Update the article order with the provided fields
-    article_order_data = article_order_update.model_dump(exclude_unset=True)
-    for key, value in article_order_data.items():
-        if key in ["quantity", "unit_price", "total"] and value is not None:
-            setattr(article_order, key, Decimal(str(value)))
-        else:
-            setattr(article_order, key, value)
-
-    # Update the updated_at timestamp
-    article_order.updated_at = datetime.utcnow()
-
-    session.add(article_order)
-    session.commit()
-    session.refresh(article_order)
-
-    return {
-        "id": article_order.id,
-        "order_id": article_order.order_id,
-        "article_req_id": article_order.article_req_id,
-        "status_id": article_order.status_id,
-        "position": article_order.position,
-        "quantity": article_order.quantity,
-        "unit": article_order.unit,
-        "brand": article_order.brand,
-        "model": article_order.model,
-        "unit_price": article_order.unit_price,
-        "total": article_order.total,
-        "notes": article_order.notes,
-        "created_at": article_order.created_at,
-        "updated_at": article_order.updated_at
-    } 
\ No newline at end of file
+    return article_order_updater.apply(
+        session, request, article_order_id, article_order_update.model_dump(exclude_unset=True)
+    )
@@ -1,64 +1,72 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
-from app.core.database import get_session
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.batch import BatchWriter
+from app.core.conditional import RowValidator
+from app.core.database import get_session, get_async_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.references import check_references
+from app.core.serialization import rows_response, row_response, response_columns
+from app.core.updates import RowUpdater
 from app.models import (
     Article, ArticleCreate, ArticleResponse, ArticleUpdate,
-    Requirement, ArticleState
+    ArticleBatch, ArticleBatchResponse, Requirement, ArticleState, ArticleOrder
 )
-from datetime import datetime
-from decimal import Decimal
 
 router = APIRouter()
 
+article_list = ListQuery(
+    Article,
+    sort_fields=["state_id", "created_at", "updated_at"],
+    filter_fields=["requirement_id", "state_id", "brand", "model", "created_at"]
+)
+
+article_validator = RowValidator(Article)
+
+article_updater = RowUpdater(Article, ArticleResponse, not_found="Article not found")
+article_deleter = RowDeleter(
+    Article, not_found="Article not found",
+    guards={ArticleOrder.article_req_id: (409, "Article has article orders")}
+)
+
+article_batch = BatchWriter(
+    Article, ArticleResponse, not_found="Article not found",
+    references={
+        "requirement_id": (Requirement, "Invalid requirement_id"),
+        "state_id": (ArticleState, "Invalid state_id"),
+    }
+)
+
 @router.get("/", response_model=list[ArticleResponse])
-def get_articles(session: Session = Depends(get_session)):
-    statement = select(Article)
-    results = session.exec(statement)
-    return [{
-        "id": article.id,
-        "requirement_id": article.requirement_id,
-        "requirement_consecutive": article.requirement_consecutive,
-        "quantity": article.quantity,
-        "unit": article.unit,
-        "brand": article.brand,
-        "model": article.model,
-        "dimensions": article.dimensions,
-        "state_id": article.state_id,
-        "notes": article.notes
-    } for article in results]
-    
+async def get_articles(page: ListParams = Depends(article_list), session: AsyncSession = Depends(get_async_session)):
+    if page.stream:
+        return page.stream_response(ArticleResponse)
+    cached = await page.anot_modified(session)
+    if cached is not None:
+        return cached
+    results = await page.afetch(session, select(*response_columns(Article, ArticleResponse)))
+    return rows_response(results, ArticleResponse, page.response.headers)
+
 @router.get("/{article_id}", response_model=ArticleResponse)
-def get_article(article_id: int, session: Session = Depends(get_session)):
+async def get_article(article_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
+    cached = await article_validator.anot_modified(session, request, article_id)
+    if cached is not None:
+        return cached
     statement = select(Article).where(Article.id == article_id)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     article = result.one_or_none()
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-    return {
-        "id": article.id,
-        "requirement_id": article.requirement_id,
-        "requirement_consecutive": article.requirement_consecutive,
-        "quantity": article.quantity,
-        "unit": article.unit,
-        "brand": article.brand,
-        "model": article.model,
-        "dimensions": article.dimensions,
-        "state_id": article.state_id,
-        "notes": article.notes
-    }
+    return article_validator.tag(row_response(article, ArticleResponse), article)
 
 @router.post("/", response_model=ArticleResponse)
 def create_article(article: ArticleCreate, session: Session = Depends(get_session)):
     # Verify that the referenced entities exist
-    if article.requirement_id:
-        requirement = session.get(Requirement, article.requirement_id)
-        if not requirement:
-            raise HTTPException(status_code=400, detail="Invalid requirement_id")
-    
-    if article.state_id:
-        state = session.get(ArticleState, article.state_id)
-        if not state:
-            raise HTTPException(status_code=400, detail="Invalid state_id")
+    check_references(session, [
+        (Requirement, article.requirement_id, "Invalid requirement_id"),
+        (ArticleState, article.state_id, "Invalid state_id"),
+    ])
     
     db_article = Article.model_validate(article)
     session.add(db_article)
@@ -77,59 +85,20 @@ def create_article(article: ArticleCreate, session: Session = Depends(get_sessio
         "notes": db_article.notes
     }
 
-@router.put("/{article_id}", response_model=ArticleResponse)
-def update_article(article_id: int, article_update: ArticleUpdate, session: Session = Depends(get_session)):
-    # Get the existing article
-    statement = select(Article).where(Article.id == article_id)
-    result = session.exec(statement)
-    article = result.one_or_none()
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
-    
-    # Verify that the referenced entities exist if they are being updated
-    if article_update.requirement_id is not None:
-        requirement = session.get(Requirement, article_update.requirement_id)
-        if not requirement:
-            raise HTTPException(status_code=400, detail="Invalid requirement_id")
-    
-    if article_update.state_id is not None:
-        state = session.get(ArticleState, article_update.state_id)
-        if not state:
-            raise HTTPException(status_code=400, detail="Invalid state_id")
-    
-    # Update the article with the provided fields
-    article_data = article_update.model_dump(exclude_unset=True)
-    for key, value in article_data.items():
-        if key == "quantity" and value is not None:
-            setattr(article, key, Decimal(str(value)))
-        else:
-            setattr(article, key, value)
-    
-    # Update the updated_at timestamp
-    article.updated_at = datetime.utcnow()
-    
-    session.add(article)
-    session.commit()
-    session.refresh(article)
+@router.post("/batch", response_model=ArticleBatchResponse)
+def batch_articles(batch: ArticleBatch, session: Session = Depends(get_session)):
+    """Create, update and delete many articles in one transaction"""
+    return article_batch.apply(session, batch)
 
-    print(article.quantity)
-    
-    return {
-        "id": article.id,
-        "requirement_id": article.requirement_id,
-        "requirement_consecutive": article.requirement_consecutive,
-        "quantity": article.quantity,
-        "unit": article.unit,
-        "brand": article.brand,
-        "model": article.model,
-        "dimensions": article.dimensions,
-        "state_id": article.state_id,
-        "notes": article.notes
-    }
+@router.put("/{article_id}", response_model=ArticleResponse)
+def update_article(article_id: int, article_update: ArticleUpdate, request: Request, session: Session = Depends(get_session)):
+    # Update the article with the provided fields, once the referenced entities being updated are verified
+    return article_updater.apply(session, request, article_id, article_update.model_dump(exclude_unset=True), [
+        (Requirement, article_update.requirement_id, "Invalid requirement_id"),
+        (ArticleState, article_update.state_id, "Invalid state_id"),
+    ])
 
 @router.delete("/{article_id}")
 def delete_article(article_id: int, session: Session = Depends(get_session)):
-    statement = delete(Article).where(Article.id == article_id)
-    session.exec(statement)
-    session.commit()
-    return {"message": "Article deleted"} 
\ No newline at end of file
+    article_deleter.apply(session, article_id)
+    return {"message": "Article deleted"}
\ No newline at end of file
@@ -1,46 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.serialization import rows_response, row_response
+from app.core.updates import RowUpdater
 from app.models import Budget, BudgetCreate, BudgetRead, BudgetUpdate, Client, Contact, Project
-from datetime import datetime
 
 router = APIRouter()
 
+budget_list = ListQuery(
+    Budget,
+    sort_fields=["number", "name", "delivery_date", "created_at", "updated_at"],
+    filter_fields=["client_id", "contact_id", "number", "delivery_date"]
+)
+
+budget_validator = RowValidator(Budget)
+
+budget_updater = RowUpdater(Budget, BudgetRead, not_found="Budget not found")
+budget_deleter = RowDeleter(
+    Budget, not_found="Budget not found",
+    guards={Project.budget_id: "Cannot delete budget that is associated with a project"}
+)
+
 @router.get("/", response_model=list[BudgetRead])
-def get_budgets(session: Session = Depends(get_session)):
+def get_budgets(page: ListParams = Depends(budget_list), session: Session = Depends(get_session)):
     """Get all budgets"""
-    statement = select(Budget)
-    results = session.exec(statement)
-    return [{
-        "id": budget.id,
-        "number": budget.number,
-        "name": budget.name,
-        "client_id": budget.client_id,
-        "contact_id": budget.contact_id,
-        "delivery_date": budget.delivery_date,
-        "created_at": budget.created_at,
-        "updated_at": budget.updated_at
-    } for budget in results]
+    if page.stream:
+        return page.stream_response(BudgetRead)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(Budget))
+    return rows_response(results, BudgetRead, page.response.headers)
 
 @router.get("/{budget_id}", response_model=BudgetRead)
-def get_budget(budget_id: int, session: Session = Depends(get_session)):
+def get_budget(budget_id: int, request: Request, session: Session = Depends(get_session)):
     """Get a specific budget by ID"""
+    cached = budget_validator.not_modified(session, request, budget_id)
+    if cached is not None:
+        return cached
     statement = select(Budget).where(Budget.id == budget_id)
     result = session.exec(statement)
     budget = result.one_or_none()
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    return {
-        "id": budget.id,
-        "number": budget.number,
-        "name": budget.name,
-        "client_id": budget.client_id,
-        "contact_id": budget.contact_id,
-        "delivery_date": budget.delivery_date,
-        "created_at": budget.created_at,
-        "updated_at": budget.updated_at
-    }
+    return budget_validator.tag(row_response(budget, BudgetRead), budget)
 
 @router.post("/", response_model=BudgetRead)
 def create_budget(budget: BudgetCreate, session: Session = Depends(get_session)):
@@ -79,24 +86,16 @@ def create_budget(budget: BudgetCreate, session: Session = Depends(get_session))
     }
 
 @router.put("/{budget_id}", response_model=BudgetRead)
-def update_budget(budget_id: int, budget_data: BudgetUpdate, session: Session = Depends(get_session)):
+def update_budget(budget_id: int, budget_data: BudgetUpdate, request: Request, session: Session = Depends(get_session)):
     """Update a budget"""
-    # Get the existing budget
-    statement = select(Budget).where(Budget.id == budget_id)
-    result = session.exec(statement)
-    db_budget = result.one_or_none()
-    
-    if not db_budget:
-        raise HTTPException(status_code=404, detail="Budget not found")
-    
     # If client_id is being updated, verify that the new client exists
-    if budget_data.client_id is not None and budget_data.client_id != db_budget.client_id:
+    if budget_data.client_id is not None:
         client = session.get(Client, budget_data.client_id)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
     
     # If contact_id is being updated, verify that the new contact exists
-    if budget_data.contact_id is not None and budget_data.contact_id != db_budget.contact_id:
+    if budget_data.contact_id is not None:
         contact = session.get(Contact, budget_data.contact_id)
         if not contact:
             raise HTTPException(status_code=404, detail="Contact not found")
@@ -109,51 +108,22 @@ def update_budget(budget_id: int, budget_data: BudgetUpdate, session: Session =
                     detail="Contact does not belong to the specified client"
                 )
         # If client_id is not being updated, verify contact belongs to current client
-        elif contact.client_id != db_budget.client_id:
-            raise HTTPException(
-                status_code=400,
-                detail="Contact does not belong to the budget's client"
-            )
+        else:
+            budget_client_id = session.exec(select(Budget.client_id).where(Budget.id == budget_id)).one_or_none()
+            if budget_client_id is None:
+                raise HTTPException(status_code=404, detail="Budget not found")
+            if contact.client_id != budget_client_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Contact does not belong to the budget's client"
+                )
     
     # Update the provided fields
     budget_data_dict = budget_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in budget_data_dict.items():
-        setattr(db_budget, key, value)
-    
-    # Update the modification date
-    db_budget.updated_at = datetime.utcnow()
-    
-    session.add(db_budget)
-    session.commit()
-    session.refresh(db_budget)
-    
-    return {
-        "id": db_budget.id,
-        "number": db_budget.number,
-        "name": db_budget.name,
-        "client_id": db_budget.client_id,
-        "contact_id": db_budget.contact_id,
-        "delivery_date": db_budget.delivery_date,
-        "created_at": db_budget.created_at,
-        "updated_at": db_budget.updated_at
-    }
+    return budget_updater.apply(session, request, budget_id, budget_data_dict)
 
 @router.delete("/{budget_id}")
 def delete_budget(budget_id: int, session: Session = Depends(get_session)):
     """Delete a budget"""
-    # First check if the budget exists
-    statement = select(Budget).where(Budget.id == budget_id)
-    budget = session.exec(statement).one_or_none()
-    if not budget:
-        raise HTTPException(status_code=404, detail="Budget not found")
-    
-    # Check if the budget is associated with any project
-    if budget.project:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete budget that is associated with a project"
-        )
-    
-    session.delete(budget)
-    session.commit()
-    return {"message": "Budget deleted"} 
\ No newline at end of file
+    budget_deleter.apply(session, budget_id)
+    return {"message": "Budget deleted"}
\ No newline at end of file
@@ -1,20 +1,46 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from pydantic_core import to_json
+from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.serialization import JSONBytesResponse, response_columns, response_fields
+from app.core.updates import RowUpdater
 from app.models import (
     Client, ClientCreate, ClientResponse, ClientUpdate, 
     ProjectBasicResponse, ContactBasicResponse, BudgetBasicResponse,
-    FullClientResponse
+    FullClientResponse, Project, Contact, Budget
 )
-from datetime import datetime
 from typing import List
 
 router = APIRouter()
 
+# Projects, contacts and budgets returned by get_full_client
+LATEST_LIMIT = 5
+
+client_list = ListQuery(
+    Client,
+    sort_fields=["name", "created_at", "updated_at"],
+    filter_fields=["name"]
+)
+
+client_validator = RowValidator(Client)
+
+client_updater = RowUpdater(Client, ClientResponse, not_found="Client not found")
+client_deleter = RowDeleter(
+    Client, not_found="Client not found", detach=[Project.client_id],
+    guards={Contact.client_id: (409, "Client has contacts"), Budget.client_id: (409, "Client has budgets")}
+)
+
 @router.get("/", response_model=list[ClientResponse])
-def get_clients(session: Session = Depends(get_session)):
-    statement = select(Client)
-    results = session.exec(statement)
+def get_clients(page: ListParams = Depends(client_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(ClientResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(Client))
     return [{
         "id": client.id,
         "name": client.name,
@@ -23,7 +49,10 @@ def get_clients(session: Session = Depends(get_session)):
     } for client in results]
     
 @router.get("/{client_id}", response_model=ClientResponse)
-def get_client(client_id: int, session: Session = Depends(get_session)):
+def get_client(client_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
+    cached = client_validator.not_modified(session, request, client_id)
+    if cached is not None:
+        return cached
     statement = select(Client).where(Client.id == client_id)
     result = session.exec(statement)
     client = result.one_or_none()
@@ -38,6 +67,7 @@ def get_client(client_id: int, session: Session = Depends(get_session)):
             "name": project.name
         })
     
+    client_validator.tag(response, client)
     return {
         "id": client.id,
         "name": client.name,
@@ -48,57 +78,34 @@ def get_client(client_id: int, session: Session = Depends(get_session)):
 
 @router.get("/fullclient/{client_id}", response_model=FullClientResponse)
 def get_full_client(client_id: int, session: Session = Depends(get_session)):
-    # Get the client
-    statement = select(Client).where(Client.id == client_id)
-    result = session.exec(statement)
-    client = result.one_or_none()
+    """Get a client with its latest projects, contacts and budgets.
+
+    Each list is an ORDER BY ... LIMIT query walking a client_id-leading index, so
+    the cost does not grow with the client's history.
+    """
+    connection = session.connection()
+    client = connection.execute(
+        select(*response_columns(Client, ClientResponse)).where(Client.id == client_id)
+    ).one_or_none()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    
-    # Get latest 5 projects
-    projects = sorted(client.projects, key=lambda x: x.date, reverse=True)[:5]
-    latest_projects = [
-        ProjectBasicResponse(
-            id=project.id,
-            name=project.name,
-            number=project.number,
-            date=project.date,
-            state_id=project.state_id
-        ) for project in projects
-    ]
-    
-    # Get latest 5 contacts
-    contacts = sorted(client.contacts, key=lambda x: x.created_at, reverse=True)[:5]
-    latest_contacts = [
-        ContactBasicResponse(
-            id=contact.id,
-            name=contact.name,
-            email=contact.email,
-            phone=contact.phone,
-            position=contact.position
-        ) for contact in contacts
-    ]
-    
-    # Get latest 5 budgets
-    budgets = sorted(client.budgets, key=lambda x: x.created_at, reverse=True)[:5]
-    latest_budgets = [
-        BudgetBasicResponse(
-            id=budget.id,
-            name=budget.name,
-            delivery_date=budget.delivery_date,
-            contact_id=budget.contact_id
-        ) for budget in budgets
-    ]
-    
-    return {
-        "id": client.id,
-        "name": client.name,
-        "created_at": client.created_at,
-        "updated_at": client.updated_at,
-        "latest_projects": latest_projects,
-        "latest_contacts": latest_contacts,
-        "latest_budgets": latest_budgets
-    }
+
+    def latest(model, response_model, date_column):
+        statement = (
+            select(*response_columns(model, response_model))
+            .where(model.client_id == client_id)
+            .order_by(date_column.desc(), model.id.desc())
+            .limit(LATEST_LIMIT)
+        )
+        return connection.execute(statement).all()
+
+    fields = response_fields(ClientResponse)
+    return JSONBytesResponse(to_json({
+        **{field: getattr(client, field) for field in fields},
+        "latest_projects": [row._asdict() for row in latest(Project, ProjectBasicResponse, Project.date)],
+        "latest_contacts": [row._asdict() for row in latest(Contact, ContactBasicResponse, Contact.created_at)],
+        "latest_budgets": [row._asdict() for row in latest(Budget, BudgetBasicResponse, Budget.created_at)],
+    }))
 
 @router.post("/", response_model=ClientResponse)
 def create_client(client: ClientCreate, session: Session = Depends(get_session)):
@@ -114,47 +121,13 @@ def create_client(client: ClientCreate, session: Session = Depends(get_session))
     }
 
 @router.put("/{client_id}", response_model=ClientResponse)
-def update_client(client_id: int, client_update: ClientUpdate, session: Session = Depends(get_session)):
-    statement = select(Client).where(Client.id == client_id)
-    result = session.exec(statement)
-    client = result.one_or_none()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    # If name is being updated, check if it conflicts with existing client
-    if client_update.name is not None and client_update.name != client.name:
-        existing_client = session.exec(
-            select(Client).where(Client.name == client_update.name)
-        ).one_or_none()
-        if existing_client:
-            raise HTTPException(
-                status_code=400,
-                detail="Client name already exists"
-            )
-    
-    client_data = client_update.model_dump(exclude_unset=True)
-    for key, value in client_data.items():
-        setattr(client, key, value)
-    
-    client.updated_at = datetime.utcnow()
-    session.add(client)
-    session.commit()
-    session.refresh(client)
-    return {
-        "id": client.id,
-        "name": client.name,
-        "created_at": client.created_at,
-        "updated_at": client.updated_at
-    }
+def update_client(client_id: int, client_update: ClientUpdate, request: Request, session: Session = Depends(get_session)):
+    # If name is being updated, check if it conflicts with another client
+    client_updater.ensure_unique(session, client_id, "name", client_update.name, "Client name already exists")
+
+    return client_updater.apply(session, request, client_id, client_update.model_dump(exclude_unset=True))
 
 @router.delete("/{client_id}")
 def delete_client(client_id: int, session: Session = Depends(get_session)):
-    statement = select(Client).where(Client.id == client_id)
-    result = session.exec(statement)
-    client = result.one_or_none()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    session.delete(client)
-    session.commit()
-    return {"message": "Client deleted"} 
\ No newline at end of file
+    client_deleter.apply(session, client_id)
+    return {"message": "Client deleted"}
\ No newline at end of file
@@ -1,15 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
-from app.models import Contact, ContactCreate, ContactRead, ContactUpdate, Client
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.updates import RowUpdater
+from app.models import Contact, ContactCreate, ContactRead, ContactUpdate, Client, Budget
 
 router = APIRouter()
 
+contact_list = ListQuery(
+    Contact,
+    sort_fields=["name", "created_at", "updated_at"],
+    filter_fields=["client_id", "name", "email"]
+)
+
+contact_validator = RowValidator(Contact)
+
+contact_updater = RowUpdater(Contact, ContactRead, not_found="Contact not found")
+contact_deleter = RowDeleter(
+    Contact, not_found="Contact not found", guards={Budget.contact_id: (409, "Contact has budgets")}
+)
+
 @router.get("/", response_model=list[ContactRead])
-def get_contacts(session: Session = Depends(get_session)):
-    statement = select(Contact)
-    results = session.exec(statement)
+def get_contacts(page: ListParams = Depends(contact_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(ContactRead)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(Contact))
     return [{
         "id": contact.id,
         "name": contact.name,
@@ -22,13 +42,17 @@ def get_contacts(session: Session = Depends(get_session)):
     } for contact in results]
 
 @router.get("/{contact_id}", response_model=ContactRead)
-def get_contact(contact_id: int, session: Session = Depends(get_session)):
+def get_contact(contact_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
+    cached = contact_validator.not_modified(session, request, contact_id)
+    if cached is not None:
+        return cached
     statement = select(Contact).where(Contact.id == contact_id)
     result = session.exec(statement)
     contact = result.one_or_none()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
+    contact_validator.tag(response, contact)
     return {
         "id": contact.id,
         "name": contact.name,
@@ -42,14 +66,7 @@ def get_contact(contact_id: int, session: Session = Depends(get_session)):
 
 @router.delete("/{contact_id}")
 def delete_contact(contact_id: int, session: Session = Depends(get_session)):
-    # First check if the contact exists
-    statement = select(Contact).where(Contact.id == contact_id)
-    contact = session.exec(statement).one_or_none()
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
-    session.delete(contact)
-    session.commit()
+    contact_deleter.apply(session, contact_id)
     return {"message": "Contact deleted"}
 
 @router.post("/", response_model=ContactRead)
@@ -75,40 +92,13 @@ def create_contact(contact: ContactCreate, session: Session = Depends(get_sessio
     }
 
 @router.put("/{contact_id}", response_model=ContactRead)
-def update_contact(contact_id: int, contact_data: ContactUpdate, session: Session = Depends(get_session)):
-    # Get the existing contact
-    statement = select(Contact).where(Contact.id == contact_id)
-    result = session.exec(statement)
-    db_contact = result.one_or_none()
-    
-    if not db_contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
+def update_contact(contact_id: int, contact_data: ContactUpdate, request: Request, session: Session = Depends(get_session)):
     # If client_id is being updated, verify that the new client exists
-    if contact_data.client_id is not None and contact_data.client_id != db_contact.client_id:
+    if contact_data.client_id is not None:
         client = session.get(Client, contact_data.client_id)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
     
     # Update the provided fields
     contact_data_dict = contact_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in contact_data_dict.items():
-        setattr(db_contact, key, value)
-    
-    # Update the modification date
-    db_contact.updated_at = datetime.utcnow()
-    
-    session.add(db_contact)
-    session.commit()
-    session.refresh(db_contact)
-    
-    return {
-        "id": db_contact.id,
-        "name": db_contact.name,
-        "email": db_contact.email,
-        "phone": db_contact.phone,
-        "position": db_contact.position,
-        "client_id": db_contact.client_id,
-        "created_at": db_contact.created_at,
-        "updated_at": db_contact.updated_at
-    } 
\ No newline at end of file
+    return contact_updater.apply(session, request, contact_id, contact_data_dict)
@@ -1,27 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.updates import RowUpdater
 from app.models import DedicatedTime, DedicatedTimeCreate, DedicatedTimeResponse, DedicatedTimeUpdate, User, Report
-from datetime import datetime
 
 router = APIRouter()
 
+dedicated_time_list = ListQuery(
+    DedicatedTime,
+    sort_fields=["created_at", "updated_at"],
+    filter_fields=["user_id", "report_id", "created_at"]
+)
+
+dedicated_time_validator = RowValidator(DedicatedTime)
+
+dedicated_time_updater = RowUpdater(DedicatedTime, DedicatedTimeResponse, not_found="Dedicated time not found")
+dedicated_time_deleter = RowDeleter(DedicatedTime, not_found="Dedicated time not found")
+
 @router.get("/", response_model=list[DedicatedTimeResponse])
-def get_dedicated_times(session: Session = Depends(get_session)):
+def get_dedicated_times(page: ListParams = Depends(dedicated_time_list), session: Session = Depends(get_session)):
     """Get all dedicated times"""
-    statement = select(DedicatedTime)
-    results = session.exec(statement)
-    dedicated_times = results.all()
+    if page.stream:
+        return page.stream_response(DedicatedTimeResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    dedicated_times = page.fetch(session, select(DedicatedTime))
     return dedicated_times
 
 @router.get("/{dedicated_time_id}", response_model=DedicatedTimeResponse)
-def get_dedicated_time(dedicated_time_id: int, session: Session = Depends(get_session)):
+def get_dedicated_time(dedicated_time_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
     """Get a specific dedicated time by ID"""
+    cached = dedicated_time_validator.not_modified(session, request, dedicated_time_id)
+    if cached is not None:
+        return cached
     statement = select(DedicatedTime).where(DedicatedTime.id == dedicated_time_id)
     result = session.exec(statement)
     dedicated_time = result.first()
     if not dedicated_time:
         raise HTTPException(status_code=404, detail="Dedicated time not found")
+    dedicated_time_validator.tag(response, dedicated_time)
     return dedicated_time
 
 @router.post("/", response_model=DedicatedTimeResponse)
@@ -51,26 +72,12 @@ def create_dedicated_time(dedicated_time: DedicatedTimeCreate, session: Session
 @router.delete("/{dedicated_time_id}")
 def delete_dedicated_time(dedicated_time_id: int, session: Session = Depends(get_session)):
     """Delete a dedicated time by ID"""
-    statement = select(DedicatedTime).where(DedicatedTime.id == dedicated_time_id)
-    result = session.exec(statement)
-    dedicated_time = result.first()
-    if not dedicated_time:
-        raise HTTPException(status_code=404, detail="Dedicated time not found")
-    
-    session.delete(dedicated_time)
-    session.commit()
+    dedicated_time_deleter.apply(session, dedicated_time_id)
     return {"message": "Dedicated time deleted"}
 
 @router.put("/{dedicated_time_id}", response_model=DedicatedTimeResponse)
-def update_dedicated_time(dedicated_time_id: int, dedicated_time_update: DedicatedTimeUpdate, session: Session = Depends(get_session)):
+def update_dedicated_time(dedicated_time_id: int, dedicated_time_update: DedicatedTimeUpdate, request: Request, session: Session = Depends(get_session)):
     """Update a dedicated time"""
-    # Get the dedicated time
-    statement = select(DedicatedTime).where(DedicatedTime.id == dedicated_time_id)
-    result = session.exec(statement)
-    dedicated_time = result.first()
-    if not dedicated_time:
-        raise HTTPException(status_code=404, detail="Dedicated time not found")
-
     # Validate related entities if they are being updated
     if dedicated_time_update.user_id is not None:
         user_statement = select(User).where(User.id == dedicated_time_update.user_id)
@@ -87,14 +94,6 @@ def update_dedicated_time(dedicated_time_id: int, dedicated_time_update: Dedicat
             raise HTTPException(status_code=400, detail="Invalid report_id")
 
     # Update dedicated time fields
-    for field, value in dedicated_time_update.model_dump(exclude_unset=True).items():
-        setattr(dedicated_time, field, value)
-    
-    # Update the updated_at timestamp
-    dedicated_time.updated_at = datetime.utcnow()
-    
-    session.add(dedicated_time)
-    session.commit()
-    session.refresh(dedicated_time)
-    
-    return dedicated_time 
\ No newline at end of file
+    return dedicated_time_updater.apply(
+        session, request, dedicated_time_id, dedicated_time_update.model_dump(exclude_unset=True)
+    )
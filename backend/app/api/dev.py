@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from sqlmodel import SQLModel, Session, select
-from app.core.database import get_session, engine
+from app.core.database import get_session, engine, pool_metrics, async_engine, async_pool_metrics
+from app.core.order_summary import rebuild_order_summary
 from app.models import (
     User, UserCreate, UserResponse,
     Client, ClientCreate,
@@ -39,6 +40,21 @@ def delete_database():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/pool-metrics")
+def get_pool_metrics():
+    """Connection pool checkout/checkin counters and current pool state"""
+    return {
+        "sync": pool_metrics.snapshot(engine),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine),
+    }
+
+@router.post("/rebuild-order-summary")
+def rebuild_summary():
+    """Recompute the order summary table from orders and article orders"""
+    with engine.begin() as connection:
+        rebuild_order_summary(connection)
+    return {"message": "Order summary rebuilt"}
+
 @router.post("/create-test-data")
 def create_test_data():
     try:
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, Depends, Request
+from sqlmodel import Session, select
 from app.core.database import get_session
-from app.models import OrderStatus, OrderStatusCreate, OrderStatusResponse, OrderStatusUpdate
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.reference_cache import reference_cache
+from app.core.updates import RowUpdater
+from app.models import OrderStatus, OrderStatusCreate, OrderStatusResponse, OrderStatusUpdate, Order
 
 router = APIRouter()
 
+order_status_list = ListQuery(
+    OrderStatus,
+    sort_fields=["name", "order", "created_at", "updated_at"],
+    filter_fields=["name", "active"]
+)
+
+# Cached rows carry the ETags of the reference cache
+order_status_updater = RowUpdater(OrderStatus, OrderStatusResponse, not_found="Order status not found", etag=False)
+order_status_deleter = RowDeleter(
+    OrderStatus, not_found="Order status not found", guards={Order.status_id: (409, "Order status has orders")}
+)
+
 @router.get("/", response_model=list[OrderStatusResponse])
-def get_order_statuses(session: Session = Depends(get_session)):
-    statement = select(OrderStatus)
-    results = session.exec(statement)
+def get_order_statuses(request: Request, page: ListParams = Depends(order_status_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(OrderStatusResponse)
+    cached = reference_cache.page_response(OrderStatus, page, request)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(OrderStatus))
     return [{
         "id": status.id,
         "name": status.name,
@@ -21,27 +40,13 @@ def get_order_statuses(session: Session = Depends(get_session)):
     } for status in results]
 
 @router.get("/{status_id}", response_model=OrderStatusResponse)
-def get_order_status(status_id: int, session: Session = Depends(get_session)):
-    statement = select(OrderStatus).where(OrderStatus.id == status_id)
-    result = session.exec(statement)
-    status = result.one_or_none()
-    if not status:
-        raise HTTPException(status_code=404, detail="Order status not found")
-    return {
-        "id": status.id,
-        "name": status.name,
-        "description": status.description,
-        "order": status.order,
-        "active": status.active,
-        "created_at": status.created_at,
-        "updated_at": status.updated_at
-    }
-    
+def get_order_status(status_id: int, request: Request):
+    return reference_cache.row_response(OrderStatus, status_id, request, "Order status not found")
+
 @router.delete("/{status_id}")
 def delete_order_status(status_id: int, session: Session = Depends(get_session)):
-    statement = delete(OrderStatus).where(OrderStatus.id == status_id)
-    session.exec(statement)
-    session.commit()
+    order_status_deleter.apply(session, status_id)
+    reference_cache.invalidate(OrderStatus)
     return {"message": "Order status deleted"}
 
 @router.post("/", response_model=OrderStatusResponse)
@@ -49,6 +54,7 @@ def create_order_status(status: OrderStatusCreate, session: Session = Depends(ge
     db_status = OrderStatus.model_validate(status)
     session.add(db_status)
     session.commit()
+    reference_cache.invalidate(OrderStatus)
     session.refresh(db_status)
     return {
         "id": db_status.id,
@@ -61,32 +67,8 @@ def create_order_status(status: OrderStatusCreate, session: Session = Depends(ge
     }
 
 @router.put("/{status_id}", response_model=OrderStatusResponse)
-def update_order_status(status_id: int, status_update: OrderStatusUpdate, session: Session = Depends(get_session)):
-    # Get the existing status
-    statement = select(OrderStatus).where(OrderStatus.id == status_id)
-    result = session.exec(statement)
-    status = result.one_or_none()
-    if not status:
-        raise HTTPException(status_code=404, detail="Order status not found")
-    
+def update_order_status(status_id: int, status_update: OrderStatusUpdate, request: Request, session: Session = Depends(get_session)):
     # Update the status with the provided fields
-    status_data = status_update.model_dump(exclude_unset=True)
-    for key, value in status_data.items():
-        setattr(status, key, value)
-    
-    # Update the updated_at timestamp
-    status.updated_at = datetime.utcnow()
-    
-    session.add(status)
-    session.commit()
-    session.refresh(status)
-    
-    return {
-        "id": status.id,
-        "name": status.name,
-        "description": status.description,
-        "order": status.order,
-        "active": status.active,
-        "created_at": status.created_at,
-        "updated_at": status.updated_at
-    }
\ No newline at end of file
+    response = order_status_updater.apply(session, request, status_id, status_update.model_dump(exclude_unset=True))
+    reference_cache.invalidate(OrderStatus)
+    return response
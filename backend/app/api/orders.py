@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
-from app.core.database import get_session
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlmodel import Session, select
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.conditional import RowValidator
+from app.core.database import get_session, get_async_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.references import check_references, missing_ids
+from app.core.serialization import rows_response, row_response, response_columns
+from app.core.streaming import StreamFormat, stream_response
+from app.core.updates import RowUpdater
 from app.models import (
     Order, OrderCreate, OrderResponse, OrderUpdate, Supplier, PaymentCondition, 
     Address, OrderStatus, User, OrderWithArticlesCreate,
@@ -11,112 +20,71 @@ from decimal import Decimal
 
 router = APIRouter()
 
+order_list = ListQuery(
+    Order,
+    sort_fields=["date", "total", "created_at", "updated_at"],
+    filter_fields=[
+        "supplier_id", "status_id", "currency", "date", "payment_condition_id",
+        "shipping_address_id", "requested_by_id", "approved_by_id"
+    ],
+    default_sort="-date"
+)
+
+order_validator = RowValidator(Order)
+
+order_updater = RowUpdater(Order, OrderResponse, not_found="Order not found")
+order_deleter = RowDeleter(
+    Order, not_found="Order not found", cascade={ArticleOrder.order_id: "Order has article orders"}
+)
+
 @router.get("/", response_model=list[OrderResponse])
-def get_orders(session: Session = Depends(get_session)):
-    """Get all orders"""
-    statement = select(Order)
-    results = session.exec(statement)
-    return [{
-        "id": order.id,
-        "supplier_id": order.supplier_id,
-        "address": order.address,
-        "bank_details": order.bank_details,
-        "date": order.date,
-        "delivery_time": order.delivery_time,
-        "payment_condition_id": order.payment_condition_id,
-        "currency": order.currency,
-        "supplier_reference": order.supplier_reference,
-        "acceptance_id": order.acceptance_id,
-        "requested_by_id": order.requested_by_id,
-        "reviewed_by_id": order.reviewed_by_id,
-        "approved_by_id": order.approved_by_id,
-        "subtotal": order.subtotal,
-        "vat": order.vat,
-        "discount": order.discount,
-        "total": order.total,
-        "notes": order.notes,
-        "shipping_address_id": order.shipping_address_id,
-        "status_id": order.status_id,
-        "created_at": order.created_at,
-        "updated_at": order.updated_at
-    } for order in results]
+async def get_orders(page: ListParams = Depends(order_list), session: AsyncSession = Depends(get_async_session)):
+    """Get a page of orders, newest first by default.
+
+    Pages are keyed on (date, id): pass the X-Next-Cursor header of a
+    response as ``cursor`` to fetch the following page.
+    """
+    if page.stream:
+        return page.stream_response(OrderResponse)
+    cached = await page.anot_modified(session)
+    if cached is not None:
+        return cached
+    results = await page.afetch(session, select(*response_columns(Order, OrderResponse)))
+    return rows_response(results, OrderResponse, page.response.headers)
+
+@router.get("/export")
+async def export_orders(request: Request, format: StreamFormat = "ndjson"):
+    """Stream every order matching the list filters as NDJSON or CSV"""
+    statement = order_list.export_statement(request, select(*response_columns(Order, OrderResponse)))
+    return stream_response(statement, OrderResponse, format, filename="orders")
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(order_id: int, session: Session = Depends(get_session)):
+async def get_order(order_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
     """Get a specific order by ID"""
+    cached = await order_validator.anot_modified(session, request, order_id)
+    if cached is not None:
+        return cached
     statement = select(Order).where(Order.id == order_id)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     order = result.one_or_none()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return {
-        "id": order.id,
-        "supplier_id": order.supplier_id,
-        "address": order.address,
-        "bank_details": order.bank_details,
-        "date": order.date,
-        "delivery_time": order.delivery_time,
-        "payment_condition_id": order.payment_condition_id,
-        "currency": order.currency,
-        "supplier_reference": order.supplier_reference,
-        "acceptance_id": order.acceptance_id,
-        "requested_by_id": order.requested_by_id,
-        "reviewed_by_id": order.reviewed_by_id,
-        "approved_by_id": order.approved_by_id,
-        "subtotal": order.subtotal,
-        "vat": order.vat,
-        "discount": order.discount,
-        "total": order.total,
-        "notes": order.notes,
-        "shipping_address_id": order.shipping_address_id,
-        "status_id": order.status_id,
-        "created_at": order.created_at,
-        "updated_at": order.updated_at
-    }
+    return order_validator.tag(row_response(order, OrderResponse), order)
 
 @router.post("/", response_model=OrderResponse)
 def create_order(order: OrderCreate, session: Session = Depends(get_session)):
     """Create a new order"""
-    # Verify that the supplier exists
-    supplier = session.get(Supplier, order.supplier_id)
-    if not supplier:
-        raise HTTPException(status_code=400, detail="Supplier not found")
-
-    # Verify that the payment condition exists
-    payment_condition = session.get(PaymentCondition, order.payment_condition_id)
-    if not payment_condition:
-        raise HTTPException(status_code=400, detail="Payment condition not found")
-
-    # Verify that the shipping address exists
-    shipping_address = session.get(Address, order.shipping_address_id)
-    if not shipping_address:
-        raise HTTPException(status_code=400, detail="Shipping address not found")
-
-    # Verify that the status exists
-    status = session.get(OrderStatus, order.status_id)
-    if not status:
-        raise HTTPException(status_code=400, detail="Order status not found")
-
-    # Verify that the users exist if provided
-    if order.acceptance_id:
-        user = session.get(User, order.acceptance_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Acceptance user not found")
-    
-    if order.requested_by_id:
-        user = session.get(User, order.requested_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Requested by user not found")
-    
-    if order.reviewed_by_id:
-        user = session.get(User, order.reviewed_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Reviewed by user not found")
-    
-    if order.approved_by_id:
-        user = session.get(User, order.approved_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Approved by user not found")
+    # Verify every referenced entity in a single query
+    check_references(session, [
+        (Supplier, order.supplier_id, "Supplier not found"),
+        (PaymentCondition, order.payment_condition_id, "Payment condition not found"),
+        (Address, order.shipping_address_id, "Shipping address not found"),
+        (OrderStatus, order.status_id, "Order status not found"),
+        (User, order.acceptance_id, "Acceptance user not found"),
+        (User, order.requested_by_id, "Requested by user not found"),
+        (User, order.reviewed_by_id, "Reviewed by user not found"),
+        (User, order.approved_by_id, "Approved by user not found"),
+    ])
 
     db_order = Order.model_validate(order)
     session.add(db_order)
@@ -144,7 +112,8 @@ def create_order(order: OrderCreate, session: Session = Depends(get_session)):
         "shipping_address_id": db_order.shipping_address_id,
         "status_id": db_order.status_id,
         "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at
+        "updated_at": db_order.updated_at,
+        "version": db_order.version
     }
 
 @router.post("/with-articles", response_model=OrderResponse)
@@ -153,90 +122,42 @@ def create_order_with_articles(
     session: Session = Depends(get_session)
 ):
     """Create an order with its associated article orders"""
-    # Verify that the referenced entities exist for the order
-    if data.order.supplier_id:
-        supplier = session.get(Supplier, data.order.supplier_id)
-        if not supplier:
-            raise HTTPException(status_code=400, detail="Invalid supplier_id")
-    
-    if data.order.payment_condition_id:
-        payment_condition = session.get(PaymentCondition, data.order.payment_condition_id)
-        if not payment_condition:
-            raise HTTPException(status_code=400, detail="Invalid payment_condition_id")
-    
-    if data.order.shipping_address_id:
-        shipping_address = session.get(Address, data.order.shipping_address_id)
-        if not shipping_address:
-            raise HTTPException(status_code=400, detail="Invalid shipping_address_id")
-    
-    if data.order.status_id:
-        status = session.get(OrderStatus, data.order.status_id)
-        if not status:
-            raise HTTPException(status_code=400, detail="Invalid status_id")
-
-    # Verify that the users exist if provided
-    if data.order.acceptance_id:
-        user = session.get(User, data.order.acceptance_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid acceptance_id")
-    
-    if data.order.requested_by_id:
-        user = session.get(User, data.order.requested_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid requested_by_id")
-    
-    if data.order.reviewed_by_id:
-        user = session.get(User, data.order.reviewed_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid reviewed_by_id")
-    
-    if data.order.approved_by_id:
-        user = session.get(User, data.order.approved_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid approved_by_id")
-
-    # Create the order
+    # Verify every entity referenced by the order in a single query
+    check_references(session, [
+        (Supplier, data.order.supplier_id, "Invalid supplier_id"),
+        (PaymentCondition, data.order.payment_condition_id, "Invalid payment_condition_id"),
+        (Address, data.order.shipping_address_id, "Invalid shipping_address_id"),
+        (OrderStatus, data.order.status_id, "Invalid status_id"),
+        (User, data.order.acceptance_id, "Invalid acceptance_id"),
+        (User, data.order.requested_by_id, "Invalid requested_by_id"),
+        (User, data.order.reviewed_by_id, "Invalid reviewed_by_id"),
+        (User, data.order.approved_by_id, "Invalid approved_by_id"),
+    ])
+
+    # Verify the articles and statuses of every line with one set-based query each
+    if missing_ids(session, Article, (line.article_req_id for line in data.articles if line.article_req_id)):
+        raise HTTPException(status_code=400, detail="Invalid article_req_id")
+    if missing_ids(session, ArticleOrderStatus, (line.status_id for line in data.articles)):
+        raise HTTPException(status_code=400, detail="Invalid article order status_id")
+
+    # Create the order and its lines in a single transaction
     db_order = Order.model_validate(data.order)
     session.add(db_order)
-    session.commit()
-    session.refresh(db_order)
-
-    # Create the article orders
-    created_article_orders = []
-    for article_data in data.articles:
-        # Verify that the referenced entities exist for each article order
-        if article_data.article_req_id:
-            article = session.get(Article, article_data.article_req_id)
-            if not article:
-                raise HTTPException(status_code=400, detail="Invalid article_req_id")
-        
-        if article_data.status_id:
-            article_order_status = session.get(ArticleOrderStatus, article_data.status_id)
-            if not article_order_status:
-                raise HTTPException(status_code=400, detail="Invalid article order status_id")
-        
-        # Create the article order with the order_id
-        db_article_order = ArticleOrder(
-            order_id=db_order.id,
-            article_req_id=article_data.article_req_id,
-            status_id=article_data.status_id,
-            position=article_data.position,
-            quantity=article_data.quantity,
-            unit=article_data.unit,
-            brand=article_data.brand,
-            model=article_data.model,
-            unit_price=article_data.unit_price,
-            total=article_data.total,
-            notes=article_data.notes,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+    session.flush()
+
+    if data.articles:
+        now = datetime.utcnow()
+        session.connection().execute(
+            insert(ArticleOrder.__table__),
+            [
+                {**line.model_dump(), "order_id": db_order.id, "created_at": now, "updated_at": now}
+                for line in data.articles
+            ],
         )
-        session.add(db_article_order)
-        created_article_orders.append(db_article_order)
-    
+
     session.commit()
     session.refresh(db_order)
-    
+
     return {
         "id": db_order.id,
         "supplier_id": db_order.supplier_id,
@@ -259,118 +180,31 @@ def create_order_with_articles(
         "shipping_address_id": db_order.shipping_address_id,
         "status_id": db_order.status_id,
         "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at
+        "updated_at": db_order.updated_at,
+        "version": db_order.version
     }
 
 @router.put("/{order_id}", response_model=OrderResponse)
-def update_order(order_id: int, order_update: OrderUpdate, session: Session = Depends(get_session)):
-    """Update an existing order"""
-    # Get the existing order
-    statement = select(Order).where(Order.id == order_id)
-    result = session.exec(statement)
-    order = result.one_or_none()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    # Verify that the supplier exists if being updated
-    if order_update.supplier_id is not None:
-        supplier = session.get(Supplier, order_update.supplier_id)
-        if not supplier:
-            raise HTTPException(status_code=400, detail="Supplier not found")
-
-    # Verify that the payment condition exists if being updated
-    if order_update.payment_condition_id is not None:
-        payment_condition = session.get(PaymentCondition, order_update.payment_condition_id)
-        if not payment_condition:
-            raise HTTPException(status_code=400, detail="Payment condition not found")
-
-    # Verify that the shipping address exists if being updated
-    if order_update.shipping_address_id is not None:
-        shipping_address = session.get(Address, order_update.shipping_address_id)
-        if not shipping_address:
-            raise HTTPException(status_code=400, detail="Shipping address not found")
-
-    # Verify that the status exists if being updated
-    if order_update.status_id is not None:
-        status = session.get(OrderStatus, order_update.status_id)
-        if not status:
-            raise HTTPException(status_code=400, detail="Order status not found")
-
-    # Verify that the users exist if being updated
-    if order_update.acceptance_id is not None:
-        user = session.get(User, order_update.acceptance_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Acceptance user not found")
-    
-    if order_update.requested_by_id is not None:
-        user = session.get(User, order_update.requested_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Requested by user not found")
-    
-    if order_update.reviewed_by_id is not None:
-        user = session.get(User, order_update.reviewed_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Reviewed by user not found")
-    
-    if order_update.approved_by_id is not None:
-        user = session.get(User, order_update.approved_by_id)
-        if not user:
-            raise HTTPException(status_code=400, detail="Approved by user not found")
-
-    # Update only the fields that were provided
-    update_data = order_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    # Update the updated_at timestamp
-    order.updated_at = datetime.utcnow()
-
-    session.add(order)
-    session.commit()
-    session.refresh(order)
-
-    return {
-        "id": order.id,
-        "supplier_id": order.supplier_id,
-        "address": order.address,
-        "bank_details": order.bank_details,
-        "date": order.date,
-        "delivery_time": order.delivery_time,
-        "payment_condition_id": order.payment_condition_id,
-        "currency": order.currency,
-        "supplier_reference": order.supplier_reference,
-        "acceptance_id": order.acceptance_id,
-        "requested_by_id": order.requested_by_id,
-        "reviewed_by_id": order.reviewed_by_id,
-        "approved_by_id": order.approved_by_id,
-        "subtotal": order.subtotal,
-        "vat": order.vat,
-        "discount": order.discount,
-        "total": order.total,
-        "notes": order.notes,
-        "shipping_address_id": order.shipping_address_id,
-        "status_id": order.status_id,
-        "created_at": order.created_at,
-        "updated_at": order.updated_at
-    }
+def update_order(order_id: int, order_update: OrderUpdate, request: Request, session: Session = Depends(get_session)):
+    """Update an existing order.
+
+    Send the ETag of the order as If-Match to have the update refused with
+    412 when someone else changed the order in the meantime.
+    """
+    # Update only the fields that were provided, once every reference being updated is verified
+    return order_updater.apply(session, request, order_id, order_update.model_dump(exclude_unset=True), [
+        (Supplier, order_update.supplier_id, "Supplier not found"),
+        (PaymentCondition, order_update.payment_condition_id, "Payment condition not found"),
+        (Address, order_update.shipping_address_id, "Shipping address not found"),
+        (OrderStatus, order_update.status_id, "Order status not found"),
+        (User, order_update.acceptance_id, "Acceptance user not found"),
+        (User, order_update.requested_by_id, "Requested by user not found"),
+        (User, order_update.reviewed_by_id, "Reviewed by user not found"),
+        (User, order_update.approved_by_id, "Approved by user not found"),
+    ])
 
 @router.delete("/{order_id}")
-def delete_order(order_id: int, session: Session = Depends(get_session)):
-    """Delete an order"""
-    # First check if the order exists
-    statement = select(Order).where(Order.id == order_id)
-    order = session.exec(statement).one_or_none()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    # Check if the order has any articles
-    # if order.articles:
-    #     raise HTTPException(
-    #         status_code=400,
-    #         detail="Cannot delete order that has articles"
-    #     )
-    
-    statement = delete(Order).where(Order.id == order_id)
-    session.exec(statement)
-    session.commit()
-    return {"message": "Order deleted"} 
\ No newline at end of file
+def delete_order(order_id: int, cascade: bool = False, session: Session = Depends(get_session)):
+    """Delete an order; with cascade=true its article orders go with it, otherwise they refuse the delete"""
+    order_deleter.apply(session, order_id, cascade)
+    return {"message": "Order deleted"}
\ No newline at end of file
@@ -1,26 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlmodel import Session, select
-from app.models import PaymentCondition, PaymentConditionCreate, PaymentConditionResponse, PaymentConditionUpdate
+from app.models import (
+    PaymentCondition, PaymentConditionCreate, PaymentConditionResponse, PaymentConditionUpdate,
+    Order, Supplier
+)
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.reference_cache import reference_cache
+from app.core.updates import RowUpdater
 from typing import List
-from datetime import datetime
 
 router = APIRouter()
 
+payment_condition_list = ListQuery(
+    PaymentCondition,
+    sort_fields=["name", "created_at", "updated_at"],
+    filter_fields=["name", "active"]
+)
+
+# Cached rows carry the ETags of the reference cache
+payment_condition_updater = RowUpdater(
+    PaymentCondition, PaymentConditionResponse, not_found="Payment condition not found", etag=False
+)
+payment_condition_deleter = RowDeleter(
+    PaymentCondition, not_found="Payment condition not found",
+    guards={
+        Order.payment_condition_id: (409, "Payment condition has orders"),
+        Supplier.payment_condition_id: (409, "Payment condition has suppliers"),
+    }
+)
+
 @router.get("/", response_model=List[PaymentConditionResponse])
-def get_payment_conditions(session: Session = Depends(get_session)):
+def get_payment_conditions(request: Request, page: ListParams = Depends(payment_condition_list), session: Session = Depends(get_session)):
     """Get all payment conditions"""
-    statement = select(PaymentCondition)
-    conditions = session.exec(statement).all()
+    if page.stream:
+        return page.stream_response(PaymentConditionResponse)
+    cached = reference_cache.page_response(PaymentCondition, page, request)
+    if cached is not None:
+        return cached
+    conditions = page.fetch(session, select(PaymentCondition))
     return conditions
 
 @router.get("/{condition_id}", response_model=PaymentConditionResponse)
-def get_payment_condition(condition_id: int, session: Session = Depends(get_session)):
+def get_payment_condition(condition_id: int, request: Request):
     """Get a specific payment condition by ID"""
-    condition = session.get(PaymentCondition, condition_id)
-    if not condition:
-        raise HTTPException(status_code=404, detail="Payment condition not found")
-    return condition
+    return reference_cache.row_response(PaymentCondition, condition_id, request, "Payment condition not found")
 
 @router.post("/", response_model=PaymentConditionResponse)
 def create_payment_condition(condition: PaymentConditionCreate, session: Session = Depends(get_session)):
@@ -28,37 +53,26 @@ def create_payment_condition(condition: PaymentConditionCreate, session: Session
     db_condition = PaymentCondition.model_validate(condition)
     session.add(db_condition)
     session.commit()
+    reference_cache.invalidate(PaymentCondition)
     session.refresh(db_condition)
     return db_condition
 
 @router.delete("/{condition_id}")
 def delete_payment_condition(condition_id: int, session: Session = Depends(get_session)):
     """Delete a payment condition"""
-    condition = session.get(PaymentCondition, condition_id)
-    if not condition:
-        raise HTTPException(status_code=404, detail="Payment condition not found")
-    session.delete(condition)
-    session.commit()
+    payment_condition_deleter.apply(session, condition_id)
+    reference_cache.invalidate(PaymentCondition)
     return {"message": "Payment condition deleted"}
 
 @router.put("/{condition_id}", response_model=PaymentConditionResponse)
 def update_payment_condition(
     condition_id: int, 
     condition_data: PaymentConditionUpdate, 
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    # Get existing condition
-    condition = session.get(PaymentCondition, condition_id)
-    if not condition:
-        raise HTTPException(status_code=404, detail="Payment condition not found")
-    
     # Update the condition with new data (only provided fields)
     condition_dict = condition_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in condition_dict.items():
-        setattr(condition, key, value)
-    
-    condition.updated_at = datetime.utcnow()
-    session.add(condition)
-    session.commit()
-    session.refresh(condition)
-    return condition 
\ No newline at end of file
+    response = payment_condition_updater.apply(session, request, condition_id, condition_dict)
+    reference_cache.invalidate(PaymentCondition)
+    return response
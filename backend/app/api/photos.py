@@ -1,127 +1,211 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import FileResponse
 from sqlmodel import Session, select
-from app.core.database import get_session
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.conditional import ETAG_HEADER, RowValidator, etag_matches
+from app.core.config import settings
+from app.core.database import get_session, get_async_session
+from app.core.deletes import RowDeleter
+from app.core.images import (
+    encodable_formats, file_digest, image_pool, inspect_upload, pick_derivative, render_photo, save_upload
+)
+from app.core.pagination import ListQuery, ListParams
 from app.models import Photo, PhotoCreate, PhotoResponse, Report
 import os
 import shutil
 from typing import Optional
 import uuid
-from PIL import Image
-from io import BytesIO
 from pathlib import Path
 
 router = APIRouter()
 
+photo_list = ListQuery(
+    Photo,
+    sort_fields=["created_at", "updated_at"],
+    filter_fields=["report_id", "created_at"]
+)
+
+photo_validator = RowValidator(Photo)
+
+photo_deleter = RowDeleter(
+    Photo, not_found="Photo not found", returning=[Photo.path, Photo.thumbnail, Photo.derivatives]
+)
+
 # Set up upload directories
 UPLOAD_DIR = Path("uploads/photos")
 THUMBNAIL_DIR = Path("uploads/thumbnails")
+DERIVATIVE_DIR = Path("uploads/derivatives")
 
 # Create directories if they don't exist
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+DERIVATIVE_DIR.mkdir(parents=True, exist_ok=True)
+
+def remove_files(path: str, thumbnail: str, derivatives: list[dict]) -> None:
+    """Remove every file of a photo, ignoring those already gone"""
+    for file_path in (path, thumbnail, *(derivative["path"] for derivative in derivatives)):
+        Path(file_path).unlink(missing_ok=True)
 
-def create_thumbnail(image_data: bytes, max_size: tuple = (200, 200)) -> bytes:
-    """Create a thumbnail from image data"""
-    img = Image.open(BytesIO(image_data))
-    img.thumbnail(max_size)
-    output = BytesIO()
-    if img.mode == 'RGBA':
-        img = img.convert('RGB')
-    img.save(output, format='JPEG')
-    output.seek(0)
-    return output.getvalue()
+def file_response(request: Request, path: str, digest: Optional[str], media_type: Optional[str] = None,
+                  vary: bool = False) -> Response:
+    """Serve a photo file with its content hash as a strong ETag and immutable caching.
+
+    FileResponse sends the file from disk in chunks and answers Range and
+    If-Range requests itself; If-None-Match is answered here with a 304.
+    """
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Photo file not found")
+    headers = {
+        ETAG_HEADER: f'"{digest or file_digest(path)}"',
+        "Cache-Control": settings.image_cache_control,
+    }
+    if vary:
+        headers["Vary"] = "Accept"
+    if etag_matches(request, headers[ETAG_HEADER]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 @router.get("/", response_model=list[PhotoResponse])
-def get_photos(session: Session = Depends(get_session)):
+def get_photos(page: ListParams = Depends(photo_list), session: Session = Depends(get_session)):
     """Get all photos"""
-    statement = select(Photo)
-    results = session.exec(statement)
-    photos = results.all()
+    if page.stream:
+        return page.stream_response(PhotoResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    photos = page.fetch(session, select(Photo))
     return photos
 
 @router.get("/{photo_id}", response_model=PhotoResponse)
-def get_photo(photo_id: int, session: Session = Depends(get_session)):
+def get_photo(photo_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
     """Get a specific photo by ID"""
+    cached = photo_validator.not_modified(session, request, photo_id)
+    if cached is not None:
+        return cached
     statement = select(Photo).where(Photo.id == photo_id)
     result = session.exec(statement)
     photo = result.first()
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
+    photo_validator.tag(response, photo)
     return photo
 
+@router.get("/{photo_id}/file")
+def get_photo_file(photo_id: int, request: Request, session: Session = Depends(get_session)):
+    """Serve the original image of a photo"""
+    row = session.connection().execute(
+        select(Photo.path, Photo.sha256).where(Photo.id == photo_id)
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return file_response(request, row.path, row.sha256)
+
+@router.get("/{photo_id}/thumbnail")
+def get_photo_thumbnail(photo_id: int, request: Request, session: Session = Depends(get_session)):
+    """Serve the JPEG thumbnail of a photo"""
+    row = session.connection().execute(
+        select(Photo.thumbnail, Photo.thumbnail_sha256).where(Photo.id == photo_id)
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return file_response(request, row.thumbnail, row.thumbnail_sha256, media_type="image/jpeg")
+
+@router.get("/{photo_id}/rendition")
+def get_photo_rendition(
+    photo_id: int,
+    request: Request,
+    width: Optional[int] = Query(None, ge=1, description="Display width in pixels; the smallest derivative at least this wide is served"),
+    format: Optional[str] = Query(None, description="Derivative format; by default the best one the Accept header allows"),
+    session: Session = Depends(get_session)
+):
+    """Serve the smallest adequate rendition of a photo.
+
+    Without a derivative in an acceptable format, the original is served.
+    """
+    row = session.connection().execute(
+        select(Photo.path, Photo.sha256, Photo.derivatives).where(Photo.id == photo_id)
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    if format is not None:
+        formats = [format]
+    else:
+        accept = request.headers.get("accept", "")
+        formats = [candidate for candidate in settings.image_derivative_formats if f"image/{candidate}" in accept]
+    derivative = pick_derivative(row.derivatives, width, formats)
+    # The rendition depends on the Accept header unless the format was named
+    vary = format is None
+    if derivative is None:
+        return file_response(request, row.path, row.sha256, vary=vary)
+    return file_response(
+        request, derivative["path"], derivative.get("sha256"), media_type=f"image/{derivative['format']}", vary=vary
+    )
+
 @router.post("/", response_model=PhotoResponse)
 async def create_photo(
     report_id: int = Form(...),
     image: UploadFile = File(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Upload a new photo for a report"""
-    # Verify file is an image
+    # Everything that can refuse the upload is checked before any byte is written or decoded
     if not image.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Read the file
-    image_data = await image.read()
+    if not await session.scalar(select(exists().where(Report.id == report_id))):
+        raise HTTPException(status_code=404, detail="Report not found")
     
-    # Generate a unique filename
-    file_extension = image.filename.split(".")[-1]
+    # The stored extension follows the sniffed format, not the client's filename
+    _, file_extension = await inspect_upload(image, settings.image_max_bytes, settings.image_upload_chunk_bytes)
     unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    
-    # Create thumbnail
-    thumbnail_data = create_thumbnail(image_data)
-    thumbnail_filename = f"thumbnail_{unique_filename}"
-    
-    # Save full image
     full_image_path = UPLOAD_DIR / unique_filename
-    with open(full_image_path, "wb") as f:
-        f.write(image_data)
-    
-    # Save thumbnail
-    thumbnail_path = THUMBNAIL_DIR / thumbnail_filename
-    with open(thumbnail_path, "wb") as f:
-        f.write(thumbnail_data)
+    thumbnail_path = THUMBNAIL_DIR / f"thumbnail_{unique_filename}"
     
-    # Verify report exists
-    report_statement = select(Report).where(Report.id == report_id)
-    report_result = session.exec(report_statement)
-    report = report_result.first()
-    if not report:
-        # Delete saved files if report doesn't exist
-        os.remove(full_image_path)
-        os.remove(thumbnail_path)
-        raise HTTPException(status_code=404, detail="Report not found")
+    # Stream the upload to disk, then render the thumbnail and derivatives in the
+    # process pool; neither holds the whole image in memory nor blocks the event loop
+    with image_pool.slot():
+        digest = await save_upload(image, full_image_path, settings.image_max_bytes, settings.image_upload_chunk_bytes)
+        try:
+            thumbnail_digest, derivatives = await image_pool.compute(
+                render_photo, full_image_path, thumbnail_path, DERIVATIVE_DIR, full_image_path.stem,
+                settings.image_derivative_sizes, encodable_formats(tuple(settings.image_derivative_formats)),
+                settings.image_derivative_quality,
+            )
+        except Exception:
+            await image_pool.io(os.remove, full_image_path)
+            raise
     
     # Create photo record
     db_photo = Photo(
         path=str(full_image_path),
         thumbnail=str(thumbnail_path),
-        report_id=report_id
+        report_id=report_id,
+        sha256=digest,
+        thumbnail_sha256=thumbnail_digest,
+        derivatives=derivatives
     )
     session.add(db_photo)
-    session.commit()
-    session.refresh(db_photo)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # The report was deleted while the files were being written
+        await image_pool.io(remove_files, str(full_image_path), str(thumbnail_path), derivatives)
+        raise HTTPException(status_code=404, detail="Report not found")
+    await session.refresh(db_photo)
     return db_photo
 
 @router.delete("/{photo_id}")
 def delete_photo(photo_id: int, session: Session = Depends(get_session)):
     """Delete a photo by ID"""
-    statement = select(Photo).where(Photo.id == photo_id)
-    result = session.exec(statement)
-    photo = result.first()
-    if not photo:
-        raise HTTPException(status_code=404, detail="Photo not found")
+    photo = photo_deleter.apply(session, photo_id)
     
-    # Delete the files
+    # Delete the files once the record is gone
     try:
-        if os.path.exists(photo.path):
-            os.remove(photo.path)
-        if os.path.exists(photo.thumbnail):
-            os.remove(photo.thumbnail)
+        remove_files(photo.path, photo.thumbnail, photo.derivatives)
     except Exception as e:
-        # Log the error but continue with deletion
+        # Log the error, the record is already deleted
         print(f"Error deleting files: {e}")
     
-    # Delete the database record
-    session.delete(photo)
-    session.commit()
-    return {"message": "Photo deleted"} 
\ No newline at end of file
+    return {"message": "Photo deleted"}
\ No newline at end of file
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, Depends, Request
+from sqlmodel import Session, select
 from app.core.database import get_session
-from app.models import ProjectState, ProjectStateCreate, ProjectStateResponse, ProjectStateUpdate
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.reference_cache import reference_cache
+from app.core.updates import RowUpdater
+from app.models import ProjectState, ProjectStateCreate, ProjectStateResponse, ProjectStateUpdate, Project
 
 router = APIRouter()
 
+project_state_list = ListQuery(
+    ProjectState,
+    sort_fields=["name", "order", "created_at", "updated_at"],
+    filter_fields=["name", "active"]
+)
+
+# Cached rows carry the ETags of the reference cache
+project_state_updater = RowUpdater(ProjectState, ProjectStateResponse, not_found="Project state not found", etag=False)
+project_state_deleter = RowDeleter(
+    ProjectState, not_found="Project state not found", guards={Project.state_id: (409, "Project state has projects")}
+)
+
 @router.get("/", response_model=list[ProjectStateResponse])
-def get_project_states(session: Session = Depends(get_session)):
-    statement = select(ProjectState)
-    results = session.exec(statement)
+def get_project_states(request: Request, page: ListParams = Depends(project_state_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(ProjectStateResponse)
+    cached = reference_cache.page_response(ProjectState, page, request)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(ProjectState))
     return [{
         "id": state.id,
         "name": state.name,
@@ -21,27 +40,13 @@ def get_project_states(session: Session = Depends(get_session)):
     } for state in results]
     
 @router.get("/{state_id}", response_model=ProjectStateResponse)
-def get_project_state(state_id: int, session: Session = Depends(get_session)):
-    statement = select(ProjectState).where(ProjectState.id == state_id)
-    result = session.exec(statement)
-    state = result.one_or_none()
-    if not state:
-        raise HTTPException(status_code=404, detail="Project state not found")
-    return {
-        "id": state.id,
-        "name": state.name,
-        "description": state.description,
-        "order": state.order,
-        "active": state.active,
-        "created_at": state.created_at,
-        "updated_at": state.updated_at
-    }
-    
+def get_project_state(state_id: int, request: Request):
+    return reference_cache.row_response(ProjectState, state_id, request, "Project state not found")
+
 @router.delete("/{state_id}")
 def delete_project_state(state_id: int, session: Session = Depends(get_session)):
-    statement = delete(ProjectState).where(ProjectState.id == state_id)
-    session.exec(statement)
-    session.commit()
+    project_state_deleter.apply(session, state_id)
+    reference_cache.invalidate(ProjectState)
     return {"message": "Project state deleted"}
 
 @router.post("/", response_model=ProjectStateResponse)
@@ -49,6 +54,7 @@ def create_project_state(state: ProjectStateCreate, session: Session = Depends(g
     db_state = ProjectState.model_validate(state)
     session.add(db_state)
     session.commit()
+    reference_cache.invalidate(ProjectState)
     session.refresh(db_state)
     return {
         "id": db_state.id,
@@ -61,40 +67,12 @@ def create_project_state(state: ProjectStateCreate, session: Session = Depends(g
     }
 
 @router.put("/{state_id}", response_model=ProjectStateResponse)
-def update_project_state(state_id: int, state_data: ProjectStateUpdate, session: Session = Depends(get_session)):
-    # Obtener el estado de proyecto existente
-    statement = select(ProjectState).where(ProjectState.id == state_id)
-    result = session.exec(statement)
-    db_state = result.one_or_none()
-    
-    if not db_state:
-        raise HTTPException(status_code=404, detail="Project state not found")
-    
+def update_project_state(state_id: int, state_data: ProjectStateUpdate, request: Request, session: Session = Depends(get_session)):
     # Si se actualiza el nombre, verificar que no exista ya otro estado con ese nombre
-    if state_data.name is not None and state_data.name != db_state.name:
-        name_check = select(ProjectState).where(ProjectState.name == state_data.name)
-        existing_state = session.exec(name_check).first()
-        if existing_state:
-            raise HTTPException(status_code=400, detail="Project state name already exists")
+    project_state_updater.ensure_unique(session, state_id, "name", state_data.name, "Project state name already exists")
     
     # Actualizar los campos proporcionados
     state_data_dict = state_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in state_data_dict.items():
-        setattr(db_state, key, value)
-    
-    # Actualizar la fecha de modificación
-    db_state.updated_at = datetime.utcnow()
-    
-    session.add(db_state)
-    session.commit()
-    session.refresh(db_state)
-    
-    return {
-        "id": db_state.id,
-        "name": db_state.name,
-        "description": db_state.description,
-        "order": db_state.order,
-        "active": db_state.active,
-        "created_at": db_state.created_at,
-        "updated_at": db_state.updated_at
-    } 
\ No newline at end of file
+    response = project_state_updater.apply(session, request, state_id, state_data_dict)
+    reference_cache.invalidate(ProjectState)
+    return response
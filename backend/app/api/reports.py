@@ -1,52 +1,54 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.serialization import rows_response, row_response
+from app.core.updates import RowUpdater
 from app.models import (
     Report, ReportCreate, ReportResponse,
     ReportUpdate,
-    Project, User
+    Project, User, Photo, DedicatedTime
 )
-from datetime import datetime
 
 router = APIRouter()
 
+report_list = ListQuery(
+    Report,
+    sort_fields=["title", "created_at", "updated_at"],
+    filter_fields=["project_id", "responsible_id", "created_at"]
+)
+
+report_validator = RowValidator(Report)
+
+report_updater = RowUpdater(Report, ReportResponse, not_found="Report not found")
+report_deleter = RowDeleter(
+    Report, not_found="Report not found",
+    guards={Photo.report_id: (409, "Report has photos"), DedicatedTime.report_id: (409, "Report has dedicated times")}
+)
+
 @router.get("/", response_model=list[ReportResponse])
-def get_reports(session: Session = Depends(get_session)):
-    statement = select(Report)
-    results = session.exec(statement)
-    reports = [{
-        "id": report.id,
-        "title": report.title,
-        "description": report.description,
-        "duration": report.duration,
-        "dead_time": report.dead_time,
-        "dead_time_cause": report.dead_time_cause,
-        "project_id": report.project_id,
-        "responsible_id": report.responsible_id,
-        "created_at": report.created_at,
-        "updated_at": report.updated_at
-    } for report in results]
-    return reports
+def get_reports(page: ListParams = Depends(report_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(ReportResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(Report))
+    return rows_response(results, ReportResponse, page.response.headers)
 
 @router.get("/{report_id}", response_model=ReportResponse)
-def get_report(report_id: int, session: Session = Depends(get_session)):
+def get_report(report_id: int, request: Request, session: Session = Depends(get_session)):
+    cached = report_validator.not_modified(session, request, report_id)
+    if cached is not None:
+        return cached
     statement = select(Report).where(Report.id == report_id)
     result = session.exec(statement)
     report = result.one_or_none()
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    return {
-        "id": report.id,
-        "title": report.title,
-        "description": report.description,
-        "duration": report.duration,
-        "dead_time": report.dead_time,
-        "dead_time_cause": report.dead_time_cause,
-        "project_id": report.project_id,
-        "responsible_id": report.responsible_id,
-        "created_at": report.created_at,
-        "updated_at": report.updated_at
-    }
+    return report_validator.tag(row_response(report, ReportResponse), report)
 
 @router.post("/", response_model=ReportResponse)
 def create_report(report: ReportCreate, session: Session = Depends(get_session)):
@@ -78,21 +80,12 @@ def create_report(report: ReportCreate, session: Session = Depends(get_session))
 
 @router.delete("/{report_id}")
 def delete_report(report_id: int, session: Session = Depends(get_session)):
-    statement = delete(Report).where(Report.id == report_id)
-    session.exec(statement)
-    session.commit()
+    report_deleter.apply(session, report_id)
     return {"message": "Report deleted"}
 
 @router.put("/{report_id}", response_model=ReportResponse)
-def update_report(report_id: int, report_update: ReportUpdate, session: Session = Depends(get_session)):
+def update_report(report_id: int, report_update: ReportUpdate, request: Request, session: Session = Depends(get_session)):
     """Update a report"""
-    # Get the report
-    statement = select(Report).where(Report.id == report_id)
-    result = session.exec(statement)
-    report = result.one_or_none()
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-
     # Validate related entities if they are being updated
     if report_update.project_id is not None:
         project = session.get(Project, report_update.project_id)
@@ -105,25 +98,4 @@ def update_report(report_id: int, report_update: ReportUpdate, session: Session
             raise HTTPException(status_code=400, detail="Invalid responsible_id")
 
     # Update report fields
-    for field, value in report_update.model_dump(exclude_unset=True).items():
-        setattr(report, field, value)
-    
-    # Update the updated_at timestamp
-    report.updated_at = datetime.utcnow()
-    
-    session.add(report)
-    session.commit()
-    session.refresh(report)
-    
-    return {
-        "id": report.id,
-        "title": report.title,
-        "description": report.description,
-        "duration": report.duration,
-        "dead_time": report.dead_time,
-        "dead_time_cause": report.dead_time_cause,
-        "project_id": report.project_id,
-        "responsible_id": report.responsible_id,
-        "created_at": report.created_at,
-        "updated_at": report.updated_at
-    }
\ No newline at end of file
+    return report_updater.apply(session, request, report_id, report_update.model_dump(exclude_unset=True))
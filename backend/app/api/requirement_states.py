@@ -1,15 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, Depends, Request
+from sqlmodel import Session, select
 from app.core.database import get_session
-from app.models import RequirementState, RequirementStateCreate, RequirementStateResponse, RequirementStateUpdate
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.reference_cache import reference_cache
+from app.core.updates import RowUpdater
+from app.models import (
+    RequirementState, RequirementStateCreate, RequirementStateResponse, RequirementStateUpdate, Requirement
+)
 
 router = APIRouter()
 
+requirement_state_list = ListQuery(
+    RequirementState,
+    sort_fields=["name", "order", "created_at", "updated_at"],
+    filter_fields=["name", "active"]
+)
+
+# Cached rows carry the ETags of the reference cache
+requirement_state_updater = RowUpdater(
+    RequirementState, RequirementStateResponse, not_found="Requirement state not found", etag=False
+)
+requirement_state_deleter = RowDeleter(
+    RequirementState, not_found="Requirement state not found",
+    guards={Requirement.state_id: (409, "Requirement state has requirements")}
+)
+
 @router.get("/", response_model=list[RequirementStateResponse])
-def get_requirement_states(session: Session = Depends(get_session)):
-    statement = select(RequirementState)
-    results = session.exec(statement)
+def get_requirement_states(request: Request, page: ListParams = Depends(requirement_state_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(RequirementStateResponse)
+    cached = reference_cache.page_response(RequirementState, page, request)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(RequirementState))
     return [{
         "id": state.id,
         "name": state.name,
@@ -17,23 +41,13 @@ def get_requirement_states(session: Session = Depends(get_session)):
     } for state in results]
     
 @router.get("/{state_id}", response_model=RequirementStateResponse)
-def get_requirement_state(state_id: int, session: Session = Depends(get_session)):
-    statement = select(RequirementState).where(RequirementState.id == state_id)
-    result = session.exec(statement)
-    state = result.one_or_none()
-    if not state:
-        raise HTTPException(status_code=404, detail="Requirement state not found")
-    return {
-        "id": state.id,
-        "name": state.name,
-        "description": state.description
-    }
-    
+def get_requirement_state(state_id: int, request: Request):
+    return reference_cache.row_response(RequirementState, state_id, request, "Requirement state not found")
+
 @router.delete("/{state_id}")
 def delete_requirement_state(state_id: int, session: Session = Depends(get_session)):
-    statement = delete(RequirementState).where(RequirementState.id == state_id)
-    session.exec(statement)
-    session.commit()
+    requirement_state_deleter.apply(session, state_id)
+    reference_cache.invalidate(RequirementState)
     return {"message": "Requirement state deleted"}
 
 @router.post("/", response_model=RequirementStateResponse)
@@ -41,6 +55,7 @@ def create_requirement_state(state: RequirementStateCreate, session: Session = D
     db_state = RequirementState.model_validate(state)
     session.add(db_state)
     session.commit()
+    reference_cache.invalidate(RequirementState)
     session.refresh(db_state)
     return {
         "id": db_state.id,
@@ -54,32 +69,11 @@ def create_requirement_state(state: RequirementStateCreate, session: Session = D
 def update_requirement_state(
     state_id: int, 
     state_data: RequirementStateUpdate, 
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    # Get existing state
-    statement = select(RequirementState).where(RequirementState.id == state_id)
-    result = session.exec(statement)
-    db_state = result.one_or_none()
-    
-    if not db_state:
-        raise HTTPException(status_code=404, detail="Requirement state not found")
-    
     # Update the state with new data (only provided fields)
     state_dict = state_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in state_dict.items():
-        setattr(db_state, key, value)
-    
-    db_state.updated_at = datetime.utcnow()
-    session.add(db_state)
-    session.commit()
-    session.refresh(db_state)
-    
-    return {
-        "id": db_state.id,
-        "name": db_state.name,
-        "description": db_state.description,
-        "order": db_state.order,
-        "active": db_state.active,
-        "created_at": db_state.created_at,
-        "updated_at": db_state.updated_at
-    }
\ No newline at end of file
+    response = requirement_state_updater.apply(session, request, state_id, state_dict)
+    reference_cache.invalidate(RequirementState)
+    return response
@@ -1,6 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
-from app.core.database import get_session
+from sqlmodel import Session, select
+from sqlalchemy import Integer, column, func, insert, literal, values
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.references import check_references, missing_ids
+from app.core.serialization import rows_response
 from app.models import (
     Requirement, RequirementCreate, RequirementResponse, RequirementWithArticlesCreate,
     Project, User, RequirementState, Article, ArticleState, ArticleCreateWithoutRequirement
@@ -10,32 +16,37 @@ from decimal import Decimal
 
 router = APIRouter()
 
+# Articles written per INSERT statement by create_requirement_with_articles
+ARTICLE_INSERT_CHUNK = 1000
+
+requirement_list = ListQuery(
+    Requirement,
+    sort_fields=["request_date", "state_id"],
+    filter_fields=["project_id", "requested_by", "state_id", "request_date", "closing_date"]
+)
+
+requirement_deleter = RowDeleter(
+    Requirement, not_found="Requirement not found", guards={Article.requirement_id: (409, "Requirement has articles")}
+)
+
 @router.get("/", response_model=list[RequirementResponse])
-def get_requirements(session: Session = Depends(get_session)):
-    statement = select(Requirement)
-    results = session.exec(statement)
-    requirements = [{
-        "id": requirement.id,
-        "project_id": requirement.project_id,
-        "request_date": requirement.request_date,
-        "requested_by_id": requirement.requested_by,
-        "state_id": requirement.state_id,
-        "closing_date": requirement.closing_date,
-        "articles": requirement.articles
-    } for requirement in results]
-    return requirements
-    
+async def get_requirements(page: ListParams = Depends(requirement_list), session: AsyncSession = Depends(get_async_session)):
+    if page.stream:
+        return page.stream_response(RequirementResponse)
+    results = await page.afetch(session, select(Requirement))
+    return rows_response(results, RequirementResponse, page.response.headers)
+
 @router.get("/{requirement_id}", response_model=RequirementResponse)
-def get_requirement(requirement_id: int, session: Session = Depends(get_session)):
+async def get_requirement(requirement_id: int, session: AsyncSession = Depends(get_async_session)):
     statement = select(Requirement).where(Requirement.id == requirement_id)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     requirement = result.one_or_none()
     if not requirement:
         raise HTTPException(status_code=404, detail="Requirement not found")
     
     # Cargar los artículos relacionados
     statement = select(Article).where(Article.requirement_id == requirement_id)
-    articles = session.exec(statement).all()
+    articles = (await session.exec(statement)).all()
     
     return {
         "id": requirement.id,
@@ -49,27 +60,17 @@ def get_requirement(requirement_id: int, session: Session = Depends(get_session)
     
 @router.delete("/{requirement_id}")
 def delete_requirement(requirement_id: int, session: Session = Depends(get_session)):
-    statement = delete(Requirement).where(Requirement.id == requirement_id)
-    session.exec(statement)
-    session.commit()
+    requirement_deleter.apply(session, requirement_id)
     return {"message": "Requirement deleted"}
 
 @router.post("/", response_model=RequirementResponse)
 def create_requirement(requirement: RequirementCreate, session: Session = Depends(get_session)):
     # Verify that the referenced entities exist
-    if requirement.project_id:
-        project = session.get(Project, requirement.project_id)
-        if not project:
-            raise HTTPException(status_code=400, detail="Invalid project_id")
-    
-    if requirement.requested_by:
-        user = session.get(User, requirement.requested_by)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid requested_by")
-    
-    state = session.get(RequirementState, requirement.state_id)
-    if not state:
-        raise HTTPException(status_code=400, detail="Invalid state_id")
+    check_references(session, [
+        (Project, requirement.project_id, "Invalid project_id"),
+        (User, requirement.requested_by, "Invalid requested_by"),
+        (RequirementState, requirement.state_id, "Invalid state_id"),
+    ])
     
     db_requirement = Requirement.model_validate(requirement)
     session.add(db_requirement)
@@ -91,61 +92,67 @@ def create_requirement_with_articles(
     session: Session = Depends(get_session)
 ):
     """Create a requirement with its associated articles"""
-    # Verify that the referenced entities exist for the requirement
-    if data.requirement.project_id:
-        project = session.get(Project, data.requirement.project_id)
-        if not project:
-            raise HTTPException(status_code=400, detail="Invalid project_id")
-    
-    if data.requirement.requested_by:
-        user = session.get(User, data.requirement.requested_by)
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid requested_by")
-    
-    state = session.get(RequirementState, data.requirement.state_id)
-    if not state:
-        raise HTTPException(status_code=400, detail="Invalid state_id")
+    # Verify the requirement references in one query, and the distinct article states in another
+    check_references(session, [
+        (Project, data.requirement.project_id, "Invalid project_id"),
+        (User, data.requirement.requested_by, "Invalid requested_by"),
+        (RequirementState, data.requirement.state_id, "Invalid state_id"),
+    ])
+    if missing_ids(session, ArticleState, {article.state_id for article in data.articles}):
+        raise HTTPException(status_code=400, detail="Invalid article state_id")
 
-    # Create the requirement
+    # Create the requirement and its articles in a single transaction
     db_requirement = Requirement.model_validate(data.requirement)
     session.add(db_requirement)
-    session.commit()
-    session.refresh(db_requirement)
+    session.flush()
+
+    # Chunked to stay below the bind parameter limit of a single statement
+    for start in range(0, len(data.articles), ARTICLE_INSERT_CHUNK):
+        chunk = data.articles[start:start + ARTICLE_INSERT_CHUNK]
+        session.connection().execute(insert_articles_statement(db_requirement.id, chunk))
 
-    # Create the articles
-    created_articles = []
-    for article_data in data.articles:
-        # Verify that the referenced entities exist for each article
-        if article_data.state_id:
-            article_state = session.get(ArticleState, article_data.state_id)
-            if not article_state:
-                raise HTTPException(status_code=400, detail="Invalid article state_id")
-        
-        # Create the article with the requirement_id
-        db_article = Article(
-            requirement_id=db_requirement.id,
-            quantity=article_data.quantity,
-            unit=article_data.unit,
-            brand=article_data.brand,
-            model=article_data.model,
-            dimensions=article_data.dimensions,
-            state_id=article_data.state_id,
-            notes=article_data.notes,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        session.add(db_article)
-        created_articles.append(db_article)
-    
     session.commit()
     session.refresh(db_requirement)
-    
+
     return {
         "id": db_requirement.id,
         "project_id": db_requirement.project_id,
         "request_date": db_requirement.request_date,
         "requested_by": db_requirement.requested_by,
         "state_id": db_requirement.state_id,
-        "closing_date": db_requirement.closing_date,
-        "articles": created_articles
-    } 
\ No newline at end of file
+        "closing_date": db_requirement.closing_date
+    }
+
+
+def insert_articles_statement(requirement_id: int, articles: list[ArticleCreateWithoutRequirement]):
+    """Multi-row INSERT of the articles of a requirement.
+
+    requirement_consecutive is computed by the database: the highest
+    consecutive already used by the requirement plus the position of the
+    article in the request.
+    """
+    table = Article.__table__
+    fields = list(ArticleCreateWithoutRequirement.model_fields)
+    rows = values(
+        column("position", Integer), *(column(field, table.c[field].type) for field in fields),
+        name="new_article",
+    ).data([
+        (position, *(getattr(article, field) for field in fields))
+        for position, article in enumerate(articles, start=1)
+    ])
+    last_consecutive = (
+        select(func.coalesce(func.max(table.c.requirement_consecutive), 0))
+        .where(table.c.requirement_id == requirement_id)
+        .scalar_subquery()
+    )
+    now = datetime.utcnow()
+    return insert(table).from_select(
+        ["requirement_id", "requirement_consecutive", *fields, "created_at", "updated_at"],
+        select(
+            literal(requirement_id, Integer),
+            last_consecutive + rows.c.position,
+            *(rows.c[field] for field in fields),
+            literal(now, table.c.created_at.type),
+            literal(now, table.c.updated_at.type),
+        ).order_by(rows.c.position),
+    )
@@ -1,34 +1,49 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import Session, select
+from app.core.conditional import RowValidator
 from app.core.database import get_session
-from app.models import Supplier, SupplierCreate, SupplierResponse, SupplierUpdate, Address, PaymentCondition
-from datetime import datetime
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.serialization import rows_response, response_columns
+from app.core.updates import RowUpdater
+from app.models import Supplier, SupplierCreate, SupplierResponse, SupplierUpdate, Address, PaymentCondition, Order
 
 router = APIRouter()
 
+supplier_list = ListQuery(
+    Supplier,
+    sort_fields=["name", "rfc", "created_at", "updated_at"],
+    filter_fields=["name", "rfc", "currency", "address_id", "payment_condition_id"]
+)
+
+supplier_validator = RowValidator(Supplier)
+
+supplier_updater = RowUpdater(Supplier, SupplierResponse, not_found="Supplier not found")
+supplier_deleter = RowDeleter(
+    Supplier, not_found="Supplier not found", guards={Order.supplier_id: (409, "Supplier has orders")}
+)
+
 @router.get("/", response_model=list[SupplierResponse])
-def get_suppliers(session: Session = Depends(get_session)):
-    statement = select(Supplier)
-    results = session.exec(statement)
-    return [{
-        "id": supplier.id,
-        "rfc": supplier.rfc,
-        "name": supplier.name,
-        "address_id": supplier.address_id,
-        "bank_details": supplier.bank_details,
-        "delivery_time": supplier.delivery_time,
-        "payment_condition_id": supplier.payment_condition_id,
-        "currency": supplier.currency,
-        "notes": supplier.notes
-    } for supplier in results]
+def get_suppliers(page: ListParams = Depends(supplier_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(SupplierResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(*response_columns(Supplier, SupplierResponse)))
+    return rows_response(results, SupplierResponse, page.response.headers)
     
 @router.get("/{supplier_id}", response_model=SupplierResponse)
-def get_supplier(supplier_id: int, session: Session = Depends(get_session)):
+def get_supplier(supplier_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
+    cached = supplier_validator.not_modified(session, request, supplier_id)
+    if cached is not None:
+        return cached
     statement = select(Supplier).where(Supplier.id == supplier_id)
     result = session.exec(statement)
     supplier = result.one_or_none()
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
+    supplier_validator.tag(response, supplier)
     return {
         "id": supplier.id,
         "rfc": supplier.rfc,    
@@ -43,9 +58,7 @@ def get_supplier(supplier_id: int, session: Session = Depends(get_session)):
     
 @router.delete("/{supplier_id}")
 def delete_supplier(supplier_id: int, session: Session = Depends(get_session)):
-    statement = delete(Supplier).where(Supplier.id == supplier_id)
-    session.exec(statement)
-    session.commit()
+    supplier_deleter.apply(session, supplier_id)
     return {"message": "Supplier deleted"}
 
 @router.post("/", response_model=SupplierResponse)
@@ -67,14 +80,7 @@ def create_supplier(supplier: SupplierCreate, session: Session = Depends(get_ses
     }
 
 @router.put("/{supplier_id}", response_model=SupplierResponse)
-def update_supplier(supplier_id: int, supplier_update: SupplierUpdate, session: Session = Depends(get_session)):
-    # Get the existing supplier
-    statement = select(Supplier).where(Supplier.id == supplier_id)
-    result = session.exec(statement)
-    supplier = result.one_or_none()
-    if not supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-
+def update_supplier(supplier_id: int, supplier_update: SupplierUpdate, request: Request, session: Session = Depends(get_session)):
     # Verify that the address exists if being updated
     if supplier_update.address_id is not None:
         address = session.get(Address, supplier_update.address_id)
@@ -88,28 +94,7 @@ def update_supplier(supplier_id: int, supplier_update: SupplierUpdate, session:
             raise HTTPException(status_code=400, detail="Payment condition not found")
 
     # Update only the fields that were provided
-    update_data = supplier_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(supplier, field, value)
-    
-    # Update the updated_at timestamp
-    supplier.updated_at = datetime.utcnow()
-
-    session.add(supplier)
-    session.commit()
-    session.refresh(supplier)
-
-    return {
-        "id": supplier.id,
-        "rfc": supplier.rfc,
-        "name": supplier.name,
-        "address_id": supplier.address_id,
-        "bank_details": supplier.bank_details,
-        "delivery_time": supplier.delivery_time,
-        "payment_condition_id": supplier.payment_condition_id,
-        "currency": supplier.currency,
-        "notes": supplier.notes
-    }
+    return supplier_updater.apply(session, request, supplier_id, supplier_update.model_dump(exclude_unset=True))
 
 # @router.get("/{supplier_id}", response_model=SupplierResponse)
 # def get_supplier(supplier_id: int, session: Session = get_session):
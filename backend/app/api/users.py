@@ -1,15 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, delete
-from app.models import User, UserCreate, UserResponse, UserUpdate
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import Session, select
+from app.models import (
+    User, UserCreate, UserResponse, UserUpdate, DedicatedTime, Order, Project, Report, Requirement
+)
+from app.core.conditional import RowValidator
 from app.core.database import get_session
+from app.core.deletes import RowDeleter
+from app.core.pagination import ListQuery, ListParams
+from app.core.updates import RowUpdater
 from typing import Optional
 
 router = APIRouter()
 
+user_list = ListQuery(
+    User,
+    sort_fields=["username", "full_name", "created_at", "updated_at"],
+    filter_fields=["username", "full_name"]
+)
+
+user_validator = RowValidator(User)
+
+user_updater = RowUpdater(User, UserResponse, not_found="User not found")
+user_deleter = RowDeleter(
+    User, not_found="User not found",
+    guards={
+        DedicatedTime.user_id: (409, "User has dedicated times"),
+        Order.acceptance_id: (409, "User has orders"),
+        Order.requested_by_id: (409, "User has orders"),
+        Order.reviewed_by_id: (409, "User has orders"),
+        Order.approved_by_id: (409, "User has orders"),
+        Project.responsible_id: (409, "User has projects"),
+        Report.responsible_id: (409, "User has reports"),
+        Requirement.requested_by: (409, "User has requirements"),
+    }
+)
+
 @router.get("/", response_model=list[UserResponse])
-def get_users(session: Session = Depends(get_session)):
-    statement = select(User)
-    results = session.exec(statement)
+def get_users(page: ListParams = Depends(user_list), session: Session = Depends(get_session)):
+    if page.stream:
+        return page.stream_response(UserResponse)
+    cached = page.not_modified(session)
+    if cached is not None:
+        return cached
+    results = page.fetch(session, select(User))
     users = [{
         "id": user.id,
         "username": user.username,
@@ -19,12 +52,16 @@ def get_users(session: Session = Depends(get_session)):
     return users
     
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, session: Session = Depends(get_session)):
+def get_user(user_id: int, request: Request, response: Response, session: Session = Depends(get_session)):
+    cached = user_validator.not_modified(session, request, user_id)
+    if cached is not None:
+        return cached
     statement = select(User).where(User.id == user_id)
     result = session.exec(statement)
     user = result.one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_validator.tag(response, user)
     return {
         "id": user.id,
         "username": user.username,
@@ -34,9 +71,7 @@ def get_user(user_id: int, session: Session = Depends(get_session)):
     
 @router.delete("/{user_id}")
 def delete_user(user_id: int, session: Session = Depends(get_session)):
-    statement = delete(User).where(User.id == user_id)
-    session.exec(statement)
-    session.commit()
+    user_deleter.apply(session, user_id)
     return {"message": "User deleted"}
 
 @router.post("/", response_model=UserResponse)
@@ -59,38 +94,10 @@ def create_user(user: UserCreate, session: Session = Depends(get_session)):
     }
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_data: UserUpdate, session: Session = Depends(get_session)):
-    # Obtener el usuario existente
-    statement = select(User).where(User.id == user_id)
-    result = session.exec(statement)
-    db_user = result.one_or_none()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+def update_user(user_id: int, user_data: UserUpdate, request: Request, session: Session = Depends(get_session)):
     # Si se actualiza el nombre de usuario, verificar que no exista
-    if user_data.username is not None and user_data.username != db_user.username:
-        username_check = select(User).where(User.username == user_data.username)
-        existing_user = session.exec(username_check).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already exists")
+    user_updater.ensure_unique(session, user_id, "username", user_data.username, "Username already exists")
     
     # Actualizar los campos proporcionados
     user_data_dict = user_data.model_dump(exclude_unset=True, exclude_none=True)
-    for key, value in user_data_dict.items():
-        setattr(db_user, key, value)
-    
-    # Actualizar la fecha de modificación
-    from datetime import datetime
-    db_user.updated_at = datetime.utcnow()
-    
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
-    
-    return {
-        "id": db_user.id,
-        "username": db_user.username,
-        "full_name": db_user.full_name,
-        "password_hash": db_user.password_hash
-    } 
\ No newline at end of file
+    return user_updater.apply(session, request, user_id, user_data_dict)
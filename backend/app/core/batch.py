@@ -0,0 +1,142 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from pydantic_core import to_json
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlmodel import Session, SQLModel
+
+from app.core.config import settings
+from app.core.references import missing_ids
+from app.core.serialization import JSONBytesResponse, response_columns, response_fields
+
+
+class BatchWriter:
+    """Create, update and delete many rows of one table in a single transaction.
+
+    An instance is configured once per router with the foreign keys of its
+    table and the message reported for each missing reference::
+
+        article_batch = BatchWriter(
+            Article, ArticleResponse, not_found="Article not found",
+            references={"state_id": (ArticleState, "Invalid state_id")},
+        )
+
+        @router.post("/batch")
+        def batch_articles(batch: ArticleBatch, session: Session = Depends(get_session)):
+            return article_batch.apply(session, batch)
+
+    A batch has ``create`` (new rows), ``update`` (partial rows carrying
+    their ``id``) and ``delete`` (ids). Every foreign key is validated with
+    one IN query over the distinct ids of the whole batch, and the update and
+    delete ids with one more. If any item fails, nothing is written and a 400
+    lists every failure as ``{"operation", "index", "detail"}``.
+
+    Otherwise creates are a single executemany INSERT ... RETURNING, updates
+    one executemany UPDATE per distinct set of fields and deletes a single
+    DELETE ... IN, all committed together. The response holds the created
+    rows, the updated rows and the deleted ids, each in request order.
+    """
+
+    def __init__(self, model, response_model: type[SQLModel], not_found: str,
+                 references: Optional[dict[str, tuple[Any, str]]] = None):
+        self.model = model
+        self.table = model.__table__
+        self.response_model = response_model
+        self.not_found = not_found
+        self.references = references or {}
+
+    def apply(self, session: Session, batch) -> JSONBytesResponse:
+        total = len(batch.create) + len(batch.update) + len(batch.delete)
+        if total > settings.batch_max_items:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A batch may hold at most {settings.batch_max_items} items"
+            )
+
+        creates = [item.model_dump() for item in batch.create]
+        updates = [item.model_dump(exclude_unset=True) for item in batch.update]
+        errors = self.validate(session, creates, updates, batch.delete)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
+
+        created = self.insert_rows(session, creates)
+        updated = self.update_rows(session, updates)
+        if batch.delete:
+            session.connection().execute(delete(self.table).where(self.table.c.id.in_(batch.delete)))
+        session.commit()
+
+        fields = response_fields(self.response_model)
+        return JSONBytesResponse(to_json({
+            "created": [{field: getattr(row, field) for field in fields} for row in created],
+            "updated": [{field: getattr(row, field) for field in fields} for row in updated],
+            "deleted": batch.delete,
+        }))
+
+    def validate(self, session: Session, creates: list[dict], updates: list[dict],
+                 deletes: list[int]) -> list[dict]:
+        """Per-item errors of the whole batch, found with one query per foreign key"""
+        errors = []
+
+        # An existing row may be touched at most once per batch
+        targets = [data["id"] for data in updates] + list(deletes)
+        repeated = {row_id for row_id, count in Counter(targets).items() if count > 1}
+        absent = missing_ids(session, self.model, targets)
+        for operation, ids in (("update", [data["id"] for data in updates]), ("delete", deletes)):
+            for index, row_id in enumerate(ids):
+                if row_id in absent:
+                    errors.append({"operation": operation, "index": index, "detail": self.not_found})
+                elif row_id in repeated:
+                    errors.append({"operation": operation, "index": index, "detail": "Duplicate id in batch"})
+
+        for field, (model, message) in self.references.items():
+            absent = missing_ids(session, model, (
+                data[field] for data in creates + updates if data.get(field) is not None
+            ))
+            if not absent:
+                continue
+            for operation, items in (("create", creates), ("update", updates)):
+                for index, data in enumerate(items):
+                    if data.get(field) in absent:
+                        errors.append({"operation": operation, "index": index, "detail": message})
+        return errors
+
+    def insert_rows(self, session: Session, creates: list[dict]) -> list:
+        if not creates:
+            return []
+        statement = insert(self.table).returning(
+            *response_columns(self.model, self.response_model), sort_by_parameter_order=True
+        )
+        return session.connection().execute(statement, creates).all()
+
+    def update_rows(self, session: Session, updates: list[dict]) -> list:
+        if not updates:
+            return []
+        now = datetime.utcnow()
+
+        # Rows setting the same fields share one executemany UPDATE
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for data in updates:
+            fields = tuple(sorted(field for field in data if field != "id"))
+            groups.setdefault(fields, []).append(
+                {f"b_{field}": value for field, value in data.items()} | {"b_updated_at": now}
+            )
+        connection = session.connection()
+        for fields, params in groups.items():
+            values = {field: bindparam(f"b_{field}") for field in fields + ("updated_at",)}
+            if "version" in self.table.c:
+                values["version"] = self.table.c.version + 1
+            statement = (
+                update(self.table)
+                .where(self.table.c.id == bindparam("b_id"))
+                .values(values)
+            )
+            connection.execute(statement, params)
+
+        ids = [data["id"] for data in updates]
+        rows = connection.execute(
+            select(*response_columns(self.model, self.response_model)).where(self.table.c.id.in_(ids))
+        ).all()
+        by_id = {row.id: row for row in rows}
+        return [by_id[row_id] for row_id in ids]
@@ -0,0 +1,164 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+
+def weak_etag(data: bytes) -> str:
+    """Weak validator derived from the bytes that identify a representation"""
+    return f'W/"{hashlib.blake2b(data, digest_size=12).hexdigest()}"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Weak validator derived from values that change whenever a representation does"""
+    return weak_etag("|".join(map(str, parts)).encode())
+
+
+def version_tag(version: int) -> str:
+    """Strong validator of a row version, the value If-Match sends back"""
+    return f'"{version}"'
+
+
+def as_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(as_utc(value), usegmt=True)
+
+
+def has_preconditions(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names etag, using the weak comparison of RFC 9110"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def if_match_versions(request: Request) -> Optional[list[int]]:
+    """Row versions named by If-Match, or None when any version will do.
+
+    Only strong tags name a version; weak ones never match under the strong
+    comparison If-Match calls for.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for candidate in header.split(","):
+        opaque = candidate.strip()
+        if len(opaque) > 2 and opaque[0] == opaque[-1] == '"' and opaque[1:-1].isdigit():
+            versions.append(int(opaque[1:-1]))
+    return versions
+
+
+def is_fresh(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's copy is current.
+
+    If-Modified-Since is only consulted when If-None-Match is absent, as
+    RFC 9110 requires; Last-Modified has whole second resolution.
+    """
+    if "if-none-match" in request.headers:
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if since is None or last_modified is None:
+        return False
+    try:
+        since = as_utc(parsedate_to_datetime(since))
+    except (TypeError, ValueError):
+        return False
+    return as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict[str, str]:
+    headers = {ETAG_HEADER: etag}
+    if last_modified is not None:
+        headers[LAST_MODIFIED_HEADER] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+class RowValidator:
+    """ETag and Last-Modified of single rows.
+
+    The ETag is the strong tag of the row's ``version`` column where the
+    table has one, so it can be sent back in If-Match, and otherwise a weak
+    tag of its ``updated_at``. An instance is configured once per router and
+    used by its detail endpoint::
+
+        order_validator = RowValidator(Order)
+
+        @router.get("/{order_id}")
+        async def get_order(order_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
+            cached = await order_validator.anot_modified(session, request, order_id)
+            if cached is not None:
+                return cached
+            ...
+            return order_validator.tag(row_response(order, OrderResponse), order)
+
+    A conditional request costs a primary key lookup of the version columns
+    only, and a 304 is answered before the row is loaded or serialized.
+    """
+
+    def __init__(self, model):
+        self.table = model.__table__
+        self.version_column = self.table.c.get("version")
+        self.modified_column = self.table.c.get("updated_at")
+        self.columns = [column for column in (self.version_column, self.modified_column) if column is not None]
+
+    def validators(self, row: Any) -> tuple[str, Optional[datetime]]:
+        """ETag and Last-Modified of a row, or of a row of the version columns"""
+        last_modified = getattr(row, self.modified_column.name) if self.modified_column is not None else None
+        if self.version_column is not None:
+            return version_tag(getattr(row, self.version_column.name)), last_modified
+        return version_etag(self.table.name, row.id, last_modified), last_modified
+
+    def headers(self, row: Any) -> dict[str, str]:
+        return validator_headers(*self.validators(row))
+
+    def version_statement(self, row_id: int):
+        return select(self.table.c.id, *self.columns).where(self.table.c.id == row_id)
+
+    def check(self, request: Request, row: Any) -> Optional[Response]:
+        """A 304 when the client holds the current row; None for a missing row"""
+        if row is None:
+            return None
+        etag, last_modified = self.validators(row)
+        if is_fresh(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        return None
+
+    def not_modified(self, session: Session, request: Request, row_id: int) -> Optional[Response]:
+        if not has_preconditions(request):
+            return None
+        return self.check(request, session.connection().execute(self.version_statement(row_id)).one_or_none())
+
+    async def anot_modified(self, session: AsyncSession, request: Request, row_id: int) -> Optional[Response]:
+        if not has_preconditions(request):
+            return None
+        connection = await session.connection()
+        return self.check(request, (await connection.execute(self.version_statement(row_id))).one_or_none())
+
+    def tag(self, response: Response, row: Any) -> Response:
+        """Set the validators of row on response (a returned or an injected one)"""
+        response.headers.update(self.headers(row))
+        return response
@@ -0,0 +1,71 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Application settings loaded from environment variables and the .env file"""
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Database connection
+    postgres_user: str = "postgres"
+    postgres_password: str = "postgres"
+    postgres_host: str = "localhost"
+    postgres_port: int = 5432
+    postgres_db: str = "requerimientos_db"
+
+    # Connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Server-side session parameters
+    db_statement_timeout_ms: int = 30000
+    db_application_name: str = "inamex-backend"
+    db_echo: bool = False
+
+    # List endpoints report an estimated total above this many rows
+    list_count_estimate_threshold: int = 100000
+
+    # Rows fetched per server-side cursor round trip by streaming responses
+    stream_batch_size: int = 1000
+
+    # Most creates, updates and deletes accepted by one /batch request
+    batch_max_items: int = 1000
+
+    # Lookup tables (states, statuses, payment conditions) held in memory
+    reference_cache_ttl_seconds: float = 300
+
+    # Seconds between order summary outbox drains; 0 disables the worker
+    order_summary_refresh_seconds: float = 5
+
+    # Processes decoding and encoding uploaded images; 0 means one per core
+    image_process_workers: int = 0
+    # Threads writing image files to disk
+    image_io_threads: int = 4
+    # Uploads processed at once per worker before further ones get a 503
+    image_max_pending: int = 16
+    image_retry_after_seconds: int = 2
+    # Largest accepted photo upload, and the chunk size it is streamed to disk in
+    image_max_bytes: int = 25 * 1024 * 1024
+    image_upload_chunk_bytes: int = 1024 * 1024
+    # Largest accepted photo dimensions, checked from the header before decoding
+    image_max_dimension: int = 12000
+    image_max_pixels: int = 60_000_000
+    # Longest sides of the derivatives written for every photo
+    image_derivative_sizes: list[int] = [320, 640, 1280, 2048]
+    # Derivative formats, preferred first; those this Pillow build cannot write are skipped
+    image_derivative_formats: list[str] = ["avif", "webp"]
+    image_derivative_quality: dict[str, int] = {"avif": 60, "webp": 80}
+    # Photo files never change under their URL, so browsers may keep them for good
+    image_cache_control: str = "private, max-age=31536000, immutable"
+
+    @property
+    def database_url(self) -> str:
+        return (
+            f"postgresql+psycopg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+        )
+
+
+settings = Settings()
@@ -1,19 +1,113 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends
 from contextlib import contextmanager
-# Database configuration
-# TODO: In production, these should be environment variables
-DB_USER = "postgres"
-DB_PASSWORD = "postgres"
-DB_HOST = "localhost"
-DB_PORT = "5432"
-DB_NAME = "requerimientos_db"
+from threading import Lock
+from app.core.config import Settings, settings
 
 # Database URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = settings.database_url
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+
+class PoolMetrics:
+    """Counters fed by pool events, used to size the pool against real traffic"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, engine: Engine) -> dict:
+        """Return the event counters together with the live pool state"""
+        pool = engine.pool
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+            }
+        data.update({
+            "pool_size": pool.size(),
+            "pool_checked_in": pool.checkedin(),
+            "pool_overflow": pool.overflow(),
+            "pool_status": pool.status(),
+        })
+        return data
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self.on_connect)
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "checkin", self.on_checkin)
+        event.listen(engine, "invalidate", self.on_invalidate)
+
+
+def build_engine_kwargs(config: Settings) -> dict:
+    """Pool and connection options shared by every engine built from the settings"""
+    return {
+        "echo": config.db_echo,
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+        "pool_recycle": config.db_pool_recycle,
+        "pool_pre_ping": config.db_pool_pre_ping,
+        "connect_args": {
+            "application_name": config.db_application_name,
+            "options": f"-c statement_timeout={config.db_statement_timeout_ms}",
+        },
+    }
+
+
+def create_db_engine(config: Settings = settings, metrics: PoolMetrics = None) -> Engine:
+    """Create a pooled engine configured from the settings"""
+    db_engine = create_engine(config.database_url, **build_engine_kwargs(config))
+    if metrics is not None:
+        metrics.attach(db_engine)
+    return db_engine
+
+
+def create_async_db_engine(config: Settings = settings, metrics: PoolMetrics = None) -> AsyncEngine:
+    """Create a pooled async engine (psycopg 3 async) configured from the settings"""
+    db_engine = create_async_engine(config.database_url, **build_engine_kwargs(config))
+    if metrics is not None:
+        metrics.attach(db_engine.sync_engine)
+    return db_engine
+
+
+# Create engines
+pool_metrics = PoolMetrics()
+engine = create_db_engine(settings, pool_metrics)
+
+async_pool_metrics = PoolMetrics()
+async_engine = create_async_db_engine(settings, async_pool_metrics)
 
 # Create all tables
 def create_db_and_tables():
@@ -28,6 +122,11 @@ def get_session():
     finally:
         session.close()
 
+# Get an async database session for FastAPI dependency injection
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
 # Context manager for manual session management
 @contextmanager
 def get_session_context():
@@ -39,4 +138,4 @@ def get_session_context():
         session.rollback()
         raise
     finally:
-        session.close() 
\ No newline at end of file
+        session.close()
@@ -0,0 +1,90 @@
+from typing import Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Column, delete, exists, select, update
+from sqlmodel import Session
+
+
+class RowDeleter:
+    """Delete one row in a single ``DELETE ... RETURNING``.
+
+    An instance is configured once per router and used by its DELETE endpoint::
+
+        order_deleter = RowDeleter(
+            Order, not_found="Order not found", cascade={ArticleOrder.order_id: "Order has article orders"}
+        )
+
+        @router.delete("/{order_id}")
+        def delete_order(order_id: int, cascade: bool = False, session: Session = Depends(get_session)):
+            order_deleter.apply(session, order_id, cascade)
+            return {"message": "Order deleted"}
+
+    ``cascade`` maps foreign key columns whose rows may go with the deleted
+    one to the detail of the 409 returned while they exist and the caller
+    did not pass ``cascade=True``: removing children is never implied. When
+    asked for, they are removed by data-modifying CTEs of the same
+    statement, so no child is loaded and the foreign key checks at the end
+    of the statement see both sides gone. ``detach`` names nullable foreign
+    key columns set to NULL the same way, as the ORM did for children it
+    does not delete. ``guards`` maps the other foreign key columns to the
+    detail returned while rows still reference the one deleted, with 400,
+    or with the status of a ``(status_code, detail)`` pair. Guards become
+    ``NOT EXISTS`` conditions of the DELETE, and only a refused delete
+    costs a second look at the table. ``returning`` adds columns the
+    caller needs once the row is gone.
+    """
+
+    def __init__(self, model, not_found: str, cascade: dict = None, detach: Sequence[Column] = (),
+                 guards: dict = None, returning: Sequence[Column] = ()):
+        self.model = model
+        self.not_found = not_found
+        self.table = model.__table__
+        # Model attributes are accepted for the table columns they map
+        self.cascade = {column.expression: detail for column, detail in (cascade or {}).items()}
+        self.detach = [column.expression for column in detach]
+        self.guards = {
+            column.expression: detail if isinstance(detail, tuple) else (400, detail)
+            for column, detail in (guards or {}).items()
+        }
+        self.returning = [column.expression for column in returning]
+
+    def active_guards(self, cascade: bool) -> dict:
+        """Guards of a delete, with the cascade columns among them unless it cascades"""
+        if cascade:
+            return self.guards
+        return {**self.guards, **{column: (409, detail) for column, detail in self.cascade.items()}}
+
+    def statement(self, row_id: int, cascade: bool = False):
+        statement = delete(self.table).where(self.table.c.id == row_id)
+        for column in self.active_guards(cascade):
+            statement = statement.where(~exists().where(column == row_id))
+        statement = statement.returning(self.table.c.id, *self.returning)
+        cascaded = list(self.cascade) if cascade else []
+        if not cascaded and not self.detach:
+            return statement
+        deleted = statement.cte("deleted")
+        query = select(deleted)
+        for position, column in enumerate(cascaded):
+            query = query.add_cte(
+                delete(column.table).where(column.in_(select(deleted.c.id))).cte(f"cascade_{position}")
+            )
+        for position, column in enumerate(self.detach):
+            query = query.add_cte(
+                update(column.table).where(column.in_(select(deleted.c.id))).values({column.name: None})
+                .cte(f"detach_{position}")
+            )
+        return query
+
+    def apply(self, session: Session, row_id: int, cascade: bool = False):
+        """Delete row_id (and its cascade, if asked for) and return the deleted row's RETURNING columns"""
+        connection = session.connection()
+        row = connection.execute(self.statement(row_id, cascade)).one_or_none()
+        if row is None:
+            guards = self.active_guards(cascade)
+            if guards and connection.execute(select(exists().where(self.table.c.id == row_id))).scalar():
+                for column, (status_code, detail) in guards.items():
+                    if connection.execute(select(exists().where(column == row_id))).scalar():
+                        raise HTTPException(status_code=status_code, detail=detail)
+            raise HTTPException(status_code=404, detail=self.not_found)
+        session.commit()
+        return row
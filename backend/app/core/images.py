@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps, features
+
+from app.core.config import settings
+
+
+# Leading bytes of the accepted formats, and the extension files are stored under
+IMAGE_SIGNATURES = {
+    "JPEG": ((b"\xff\xd8\xff",), "jpg"),
+    "PNG": ((b"\x89PNG\r\n\x1a\n",), "png"),
+    "GIF": ((b"GIF87a", b"GIF89a"), "gif"),
+    "WEBP": ((b"RIFF",), "webp"),
+}
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Image format named by the file's magic bytes, whatever its Content-Type claims"""
+    for name, (signatures, _) in IMAGE_SIGNATURES.items():
+        if head.startswith(signatures):
+            # RIFF is a container; only the WEBP form of it is an image
+            if name == "WEBP" and head[8:12] != b"WEBP":
+                continue
+            return name
+    return None
+
+
+def image_size(head: bytes, format: str) -> Optional[tuple[int, int]]:
+    """Dimensions from the header in head, or None while head is too short to hold all of it"""
+    try:
+        with Image.open(BytesIO(head), formats=[format]) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+async def inspect_upload(upload: UploadFile, max_bytes: int, chunk_size: int) -> tuple[str, str]:
+    """Format and file extension of an upload from its header, refusing it with 400 or 413 if unacceptable.
+
+    Only the header is parsed, which Image.open does without decoding any
+    pixels, so oversized or disguised files are turned away before they are
+    written or decoded. A JPEG header runs up to its image data, past every
+    EXIF, XMP and ICC segment, so reading goes on (in growing chunks) until
+    the header parses or max_bytes is crossed. The upload is rewound after.
+    """
+    head = bytearray()
+    while True:
+        chunk = await upload.read(chunk_size)
+        head += chunk
+        if len(head) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image exceeds the limit of {max_bytes} bytes")
+        format = sniff_format(head)
+        if format is None:
+            # Magic bytes are at most 12 long
+            if chunk and len(head) < 12:
+                continue
+            raise HTTPException(status_code=400, detail="File must be a JPEG, PNG, GIF or WebP image")
+        size = image_size(bytes(head), format)
+        if size is not None:
+            break
+        if not chunk:
+            raise HTTPException(status_code=400, detail="Image header could not be read")
+        chunk_size *= 2
+    await upload.seek(0)
+    width, height = size
+    if max(width, height) > settings.image_max_dimension or width * height > settings.image_max_pixels:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image dimensions {width}x{height} exceed the limit of "
+                   f"{settings.image_max_dimension} pixels a side and {settings.image_max_pixels} pixels"
+        )
+    return format, IMAGE_SIGNATURES[format][1]
+
+
+@lru_cache(maxsize=None)
+def encodable_formats(formats: tuple[str, ...]) -> tuple[str, ...]:
+    """The derivative formats among formats that this Pillow build can write"""
+    return tuple(format for format in formats if features.check(format))
+
+
+def save_atomically(img: Image.Image, path: Path, format: str, **params) -> tuple[int, str]:
+    """Encode img to path through a synced temporary file; returns its size and SHA-256"""
+    # Renditions are small enough to encode in memory, and hash on the way out
+    encoded = BytesIO()
+    img.save(encoded, format=format, **params)
+    data = encoded.getvalue()
+    output = temporary_file(path)
+    try:
+        output.write(data)
+        finish_file(output, path)
+    except BaseException:
+        discard(output)
+        raise
+    return len(data), hashlib.sha256(data).hexdigest()
+
+
+def render_photo(source: Path, thumbnail: Path, directory: Path, stem: str, sizes: Sequence[int],
+                 formats: Sequence[str], quality: dict, thumbnail_size: tuple = (200, 200)) -> tuple[str, list[dict]]:
+    """Write the JPEG thumbnail and the derivatives of the image file source.
+
+    The image is decoded once, at the scale draft() allows for the largest
+    rendition, and turned upright from its EXIF orientation. Derivatives are
+    written for each size (the longest side, capped at the original's) in
+    each format, named ``<stem>_<side>.<format>`` in directory. EXIF, ICC
+    and XMP data are not carried over. Returns the thumbnail's SHA-256 and
+    the PhotoDerivative dicts, smallest first; on failure every file
+    written so far is removed.
+    """
+    written = []
+    try:
+        with Image.open(source) as img:
+            largest = max(*sizes, *thumbnail_size)
+            img.draft("RGB", (largest, largest))
+            img = ImageOps.exif_transpose(img)
+        alpha = img.has_transparency_data
+        img.info = {}
+        img = img.convert("RGBA" if alpha else "RGB")
+
+        thumb = img.convert("RGB")
+        thumb.thumbnail(thumbnail_size)
+        _, thumbnail_digest = save_atomically(thumb, thumbnail, "JPEG")
+        written.append(thumbnail)
+
+        derivatives = []
+        for side in sorted({min(size, max(img.size)) for size in sizes}):
+            resized = img.copy()
+            resized.thumbnail((side, side), Image.Resampling.LANCZOS)
+            for format in formats:
+                path = directory / f"{stem}_{side}.{format}"
+                size, digest = save_atomically(resized, path, format.upper(), quality=quality.get(format, 80))
+                written.append(path)
+                derivatives.append({
+                    "format": format, "width": resized.width, "height": resized.height,
+                    "path": str(path), "bytes": size, "sha256": digest,
+                })
+        return thumbnail_digest, derivatives
+    except BaseException:
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+
+
+def pick_derivative(derivatives: Sequence[dict], width: Optional[int], formats: Sequence[str]) -> Optional[dict]:
+    """The smallest derivative at least width wide in the first of formats that has one.
+
+    Falls back to the widest derivative when none is wide enough, and to
+    the widest of all when width is None; None when no derivative is in
+    any of formats.
+    """
+    for format in formats:
+        candidates = [derivative for derivative in derivatives if derivative["format"] == format]
+        if not candidates:
+            continue
+        if width is not None:
+            wide_enough = [derivative for derivative in candidates if derivative["width"] >= width]
+            if wide_enough:
+                return min(wide_enough, key=lambda derivative: derivative["width"])
+        return max(candidates, key=lambda derivative: derivative["width"])
+    return None
+
+
+def temporary_file(path: Path):
+    """Hidden temporary file next to path, on the same filesystem for the final rename"""
+    return tempfile.NamedTemporaryFile(dir=path.parent, prefix=".upload-", delete=False)
+
+
+def sync_file(file) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def replace_atomically(temp_path: Path, path: Path) -> None:
+    """Move a fully written and synced file into place, and make the rename durable"""
+    os.replace(temp_path, path)
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def discard(file) -> None:
+    file.close()
+    Path(file.name).unlink(missing_ok=True)
+
+
+def finish_file(file, path: Path) -> None:
+    sync_file(file)
+    file.close()
+    replace_atomically(Path(file.name), path)
+
+
+async def save_upload(upload: UploadFile, path: Path, max_bytes: int, chunk_size: int) -> str:
+    """Stream upload to path chunk by chunk and return its SHA-256.
+
+    At most one chunk is held in memory. The bytes go to a temporary file
+    that is synced and renamed into place only once complete, so path never
+    holds a partial image. Uploads larger than max_bytes are refused with
+    413 as soon as they cross the limit.
+    """
+    file = await image_pool.io(temporary_file, path)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Image exceeds the limit of {max_bytes} bytes")
+            digest.update(chunk)
+            await image_pool.io(file.write, chunk)
+        await image_pool.io(finish_file, file, path)
+    except BaseException:
+        discard(file)
+        raise
+    return digest.hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file written before digests were recorded, cached while it is unchanged"""
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size, chunk_size)
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImagePool:
+    """Runs image work off the event loop, with bounded admission.
+
+    Decoding and encoding go to a process pool, so uploads use every core
+    instead of contending for one interpreter lock; file writes go to a
+    small thread pool. At most ``image_max_pending`` jobs are admitted per
+    worker process. Beyond that a request is refused at once with 503 and
+    Retry-After rather than queued, so a burst of large uploads cannot pile
+    up memory or hold connections open while it waits.
+
+    Both pools start on first use and are stopped by shutdown() when the
+    application exits.
+    """
+
+    def __init__(self):
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # Forking a process that runs an event loop and pool threads is unsafe
+            self._processes = ProcessPoolExecutor(
+                max_workers=settings.image_process_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._processes
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=settings.image_io_threads, thread_name_prefix="image-io"
+            )
+        return self._threads
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Admit one upload's image work for the duration of the block, or refuse it with 503"""
+        # Only the event loop thread counts, so no lock is needed
+        if self._pending >= settings.image_max_pending:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many images being processed, retry shortly",
+                headers={"Retry-After": str(settings.image_retry_after_seconds)},
+            )
+        self._pending += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+
+    async def compute(self, function: Callable, *args):
+        """Run a CPU bound function in the process pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.processes, function, *args)
+
+    async def io(self, function: Callable, *args):
+        """Run a blocking file operation in the I/O thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.threads, function, *args)
+
+    def shutdown(self) -> None:
+        if self._processes is not None:
+            self._processes.shutdown(cancel_futures=True)
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown()
+            self._threads = None
+
+
+image_pool = ImagePool()
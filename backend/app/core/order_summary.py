@@ -0,0 +1,99 @@
+import asyncio
+import logging
+
+from sqlalchemy import Connection, delete, func, insert, select, text, tuple_
+
+from app.core.aggregates import month
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models import Article, ArticleOrder, Order, OrderSummary, OrderSummaryOutbox, Requirement
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key of the advisory lock held while the summary is rewritten
+REFRESH_LOCK_KEY = 0x6F726473
+
+# Outbox rows claimed per refresh transaction
+REFRESH_BATCH = 1000
+
+
+def summary_select():
+    """Article order totals per project, supplier, currency and month, from the base tables"""
+    order_month = month(Order.date)
+    return (
+        select(
+            Requirement.project_id, Order.supplier_id, Order.currency, order_month,
+            func.sum(ArticleOrder.total), func.count(),
+        )
+        .select_from(ArticleOrder)
+        .join(Order, ArticleOrder.order_id == Order.id)
+        .outerjoin(Article, ArticleOrder.article_req_id == Article.id)
+        .outerjoin(Requirement, Article.requirement_id == Requirement.id)
+        .group_by(Requirement.project_id, Order.supplier_id, Order.currency, order_month)
+    ), order_month
+
+
+def summary_insert(statement):
+    return insert(OrderSummary).from_select(
+        ["project_id", "supplier_id", "currency", "month", "total", "line_count"], statement
+    )
+
+
+def refresh_order_summary(connection: Connection, limit: int = REFRESH_BATCH) -> int:
+    """Recompute the slices queued in the outbox and return how many outbox rows were consumed.
+
+    Each distinct (supplier, currency, month) slice is replaced as a whole
+    from the base tables, so refreshing is idempotent. A transaction-level
+    advisory lock keeps two workers from rewriting the same slice at once;
+    the caller commits.
+    """
+    if not connection.execute(select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_KEY))).scalar():
+        return 0
+
+    outbox = OrderSummaryOutbox.__table__
+    claimed = select(outbox.c.id).order_by(outbox.c.id).limit(limit).with_for_update(skip_locked=True)
+    rows = connection.execute(
+        delete(outbox)
+        .where(outbox.c.id.in_(claimed.scalar_subquery()))
+        .returning(outbox.c.supplier_id, outbox.c.currency, outbox.c.month)
+    ).all()
+    if not rows:
+        return 0
+
+    slices = list({tuple(row) for row in rows})
+    summary = OrderSummary.__table__
+    connection.execute(delete(summary).where(
+        tuple_(summary.c.supplier_id, summary.c.currency, summary.c.month).in_(slices)
+    ))
+    statement, order_month = summary_select()
+    connection.execute(summary_insert(
+        statement.where(tuple_(Order.supplier_id, Order.currency, order_month).in_(slices))
+    ))
+    return len(rows)
+
+
+def rebuild_order_summary(connection: Connection) -> None:
+    """Recompute the whole summary from the base tables and empty the outbox.
+
+    Writers to order and articleorder wait on the outbox lock until the
+    caller commits, so no change slips between the rebuild and the outbox.
+    """
+    connection.execute(select(func.pg_advisory_xact_lock(REFRESH_LOCK_KEY)))
+    connection.execute(text("LOCK TABLE ordersummaryoutbox IN EXCLUSIVE MODE"))
+    connection.execute(delete(OrderSummaryOutbox.__table__))
+    connection.execute(delete(OrderSummary.__table__))
+    statement, _ = summary_select()
+    connection.execute(summary_insert(statement))
+
+
+async def run_order_summary_worker() -> None:
+    """Drain the outbox every order_summary_refresh_seconds, until cancelled"""
+    while True:
+        try:
+            consumed = REFRESH_BATCH
+            while consumed == REFRESH_BATCH:
+                async with async_engine.begin() as connection:
+                    consumed = await connection.run_sync(refresh_order_summary)
+        except Exception:
+            logger.exception("Order summary refresh failed")
+        await asyncio.sleep(settings.order_summary_refresh_seconds)
@@ -0,0 +1,326 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Query, Request, Response
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.conditional import ETAG_HEADER, has_preconditions, is_fresh, not_modified, validator_headers, version_etag
+from app.core.config import settings
+from app.core.serialization import response_columns
+from app.core.streaming import StreamFormat, stream_response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Count-Estimated"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":"),
+        default=str,
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor produced by encode_cursor, validating each value against types"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return TypeAdapter(tuple[types]).validate_python(values)
+    except (ValueError, TypeError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def column_python_type(column) -> type:
+    """Python type of a table column, looking through TypeDecorators such as AutoString"""
+    column_type = column.type
+    try:
+        return column_type.python_type
+    except NotImplementedError:
+        return column_type.impl_instance.python_type
+
+
+class ListQuery:
+    """Paging, sorting and filtering shared by every list endpoint.
+
+    An instance is configured once per router with the whitelisted sort and
+    filter fields of its table, and is then used as a dependency::
+
+        user_list = ListQuery(User, sort_fields=["id", "username"], filter_fields=["username"])
+
+        @router.get("/")
+        def get_users(page: ListParams = Depends(user_list), session: Session = Depends(get_session)):
+            return page.fetch(session, select(User))
+
+    Supported query parameters:
+
+    - ``limit`` (default 100, max 1000) and either ``offset`` or ``cursor``
+    - ``sort``: a whitelisted field, prefixed with ``-`` for descending order
+    - ``<field>=value`` for equality (repeat the parameter for IN) and
+      ``<field>_from`` / ``<field>_to`` for inclusive ranges
+    - ``with_total=true`` to get ``X-Total-Count``; above
+      ``list_count_estimate_threshold`` rows it is a planner estimate and
+      ``X-Total-Count-Estimated: true`` is set
+    - ``stream=ndjson`` (or ``csv``) to receive every matching row, sorted
+      and filtered but not paged, through a server-side cursor; routers
+      opt in by returning ``page.stream_response(ResponseModel)``
+
+    Pages of tables with an ``updated_at`` column carry a weak ETag and a
+    Last-Modified derived from the count, max(updated_at) and id sum of
+    their rows. Routers answer conditional requests with
+    ``page.not_modified(session)`` before fetching the page.
+    """
+
+    def __init__(
+        self,
+        model,
+        sort_fields: list[str],
+        filter_fields: list[str] = (),
+        default_sort: str = "id",
+        default_limit: int = 100,
+        max_limit: int = 1000,
+    ):
+        self.model = model
+        self.table = model.__table__
+        self.sort_fields = set(sort_fields) | {"id"}
+        self.filter_fields = list(filter_fields)
+        self.default_sort = default_sort
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.version_column = self.table.c.get("updated_at")
+
+    def __call__(
+        self,
+        request: Request,
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1),
+        offset: Optional[int] = Query(None, ge=0),
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        with_total: bool = False,
+        stream: Optional[StreamFormat] = None,
+    ) -> "ListParams":
+        if offset is not None and cursor is not None:
+            raise HTTPException(status_code=400, detail="Use either offset or cursor, not both")
+        if stream is not None and (offset is not None or cursor is not None):
+            raise HTTPException(status_code=400, detail="A streamed list cannot be combined with offset or cursor")
+        limit = min(limit or self.default_limit, self.max_limit)
+        sort = sort or self.default_sort
+        if sort.lstrip("-") not in self.sort_fields:
+            raise HTTPException(status_code=400, detail=f"Invalid sort field '{sort.lstrip('-')}'")
+        return ListParams(
+            self, response, limit, offset, cursor, sort, with_total,
+            self.parse_filters(request), stream, request,
+        )
+
+    def export_statement(self, request: Request, statement: Select) -> Select:
+        """statement with the filters of request, in default sort order and unbounded"""
+        conditions = self.parse_filters(request)
+        if conditions:
+            statement = statement.where(*conditions)
+        return self.sort_order(statement, self.default_sort)
+
+    def sort_order(self, statement: Select, sort: str) -> Select:
+        """Order statement by a sort field, with id as tie-breaker"""
+        sort_column = self.table.c[sort.lstrip("-")]
+        id_column = self.table.c["id"]
+        if sort.startswith("-"):
+            return statement.order_by(sort_column.desc(), id_column.desc())
+        return statement.order_by(sort_column.asc(), id_column.asc())
+
+    def parse_filters(self, request: Request) -> list:
+        """Turn whitelisted query parameters into SQL conditions"""
+        conditions = []
+        params = request.query_params
+        for field in self.filter_fields:
+            column = self.table.c[field]
+            values = [self.coerce(field, column, value) for value in params.getlist(field)]
+            if len(values) == 1:
+                conditions.append(column == values[0])
+            elif values:
+                conditions.append(column.in_(values))
+            if f"{field}_from" in params:
+                conditions.append(column >= self.coerce(field, column, params[f"{field}_from"]))
+            if f"{field}_to" in params:
+                conditions.append(column <= self.coerce(field, column, params[f"{field}_to"]))
+        return conditions
+
+    @staticmethod
+    def coerce(field: str, column, value: str):
+        try:
+            return TypeAdapter(column_python_type(column)).validate_python(value)
+        except ValidationError:
+            raise HTTPException(status_code=400, detail=f"Invalid value for filter '{field}'")
+
+
+class ListParams:
+    """Paging, sort and filter values of a single list request"""
+
+    def __init__(self, query: ListQuery, response: Response, limit: int, offset: Optional[int],
+                 cursor: Optional[str], sort: str, with_total: bool, filters: list,
+                 stream: Optional[StreamFormat] = None, request: Optional[Request] = None):
+        self.query = query
+        self.response = response
+        self.limit = limit
+        self.offset = offset
+        self.cursor = cursor
+        self.sort = sort
+        self.with_total = with_total
+        self.filters = filters
+        self.stream = stream
+        self.request = request
+        self.descending = sort.startswith("-")
+        self.sort_field = sort.lstrip("-")
+        self.sort_column = query.table.c[self.sort_field]
+        self.id_column = query.table.c["id"]
+
+    def apply_filters(self, statement: Select) -> Select:
+        return statement.where(*self.filters) if self.filters else statement
+
+    def page_statement(self, statement: Select) -> Select:
+        """Filtered, sorted and bounded statement, fetching one extra row to detect a next page"""
+        statement = self.apply_filters(statement)
+        sort_key = tuple_(self.sort_column, self.id_column)
+        if self.cursor is not None:
+            sort, value, row_id = decode_cursor(self.cursor, str, column_python_type(self.sort_column), int)
+            if sort != self.sort:
+                raise HTTPException(status_code=400, detail="Cursor does not match sort")
+            boundary = tuple_(value, row_id)
+            statement = statement.where(sort_key < boundary if self.descending else sort_key > boundary)
+        statement = self.query.sort_order(statement, self.sort)
+        if self.offset:
+            statement = statement.offset(self.offset)
+        return statement.limit(self.limit + 1)
+
+    def finish(self, rows: list) -> list:
+        """Trim the look-ahead row and publish the cursor of the next page"""
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            self.response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                self.sort, getattr(last, self.sort_field), last.id
+            )
+        self.tag(rows)
+        return rows
+
+    def page_validators(self, count: int, last_modified: Optional[datetime], id_sum: Optional[int]) -> tuple:
+        """ETag and Last-Modified of a page, from values that change with any of its rows"""
+        return version_etag(self.query.table.name, count, last_modified, id_sum), last_modified
+
+    def tag(self, rows: list) -> None:
+        """Set the validators of the fetched page, unless the router already set an ETag"""
+        name = self.query.version_column.name if self.query.version_column is not None else None
+        if name is None or self.with_total or ETAG_HEADER in self.response.headers:
+            return
+        if rows and not hasattr(rows[0], name):
+            return
+        etag, last_modified = self.page_validators(
+            len(rows),
+            max((getattr(row, name) for row in rows), default=None),
+            sum(row.id for row in rows) if rows else None,
+        )
+        self.response.headers.update(validator_headers(etag, last_modified))
+
+    def validator_statement(self) -> Select:
+        """count, max(updated_at) and sum(id) of the rows of this page, computed in the database"""
+        page = self.page_statement(select(self.id_column, self.query.version_column)).limit(self.limit).subquery()
+        return select(func.count(), func.max(page.c[self.query.version_column.name]), func.sum(page.c.id))
+
+    def check(self, validators) -> Optional[Response]:
+        etag, last_modified = self.page_validators(*validators)
+        if is_fresh(self.request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        return None
+
+    def conditional(self) -> bool:
+        return (
+            self.query.version_column is not None and self.request is not None
+            and self.stream is None and not self.with_total and has_preconditions(self.request)
+        )
+
+    def not_modified(self, session: Session) -> Optional[Response]:
+        """A 304 when the client holds the current page, answered before the page is fetched"""
+        if not self.conditional():
+            return None
+        return self.check(session.connection().execute(self.validator_statement()).one())
+
+    async def anot_modified(self, session: AsyncSession) -> Optional[Response]:
+        if not self.conditional():
+            return None
+        connection = await session.connection()
+        return self.check((await connection.execute(self.validator_statement())).one())
+
+    def stream_response(self, model):
+        """Stream every filtered row in sort order, encoded as the stream format asked for.
+
+        Only the columns behind the fields of model are read, so a full-table
+        read holds one batch of plain rows at a time.
+        """
+        statement = select(*response_columns(self.query.model, model))
+        statement = self.query.sort_order(self.apply_filters(statement), self.sort)
+        return stream_response(statement, model, self.stream)
+
+    def fetch(self, session: Session, statement: Select) -> list:
+        """Run the page query on a sync session"""
+        rows = session.exec(self.page_statement(statement)).all()
+        if self.with_total:
+            connection = session.connection()
+            estimate = connection.execute(*self.estimate_query()).scalar()
+            if estimate < settings.list_count_estimate_threshold:
+                self.set_total(connection.execute(self.count_query(statement)).scalar(), False)
+            elif not self.filters:
+                self.set_total(estimate, True)
+            else:
+                sql, params = self.explain_query(statement, connection.dialect)
+                plan = connection.exec_driver_sql(sql, params).scalar()
+                self.set_total(plan[0]["Plan"]["Plan Rows"], True)
+        return self.finish(rows)
+
+    async def afetch(self, session: AsyncSession, statement: Select) -> list:
+        """Run the page query on an async session"""
+        rows = (await session.exec(self.page_statement(statement))).all()
+        if self.with_total:
+            connection = await session.connection()
+            estimate = (await connection.execute(*self.estimate_query())).scalar()
+            if estimate < settings.list_count_estimate_threshold:
+                self.set_total((await connection.execute(self.count_query(statement))).scalar(), False)
+            elif not self.filters:
+                self.set_total(estimate, True)
+            else:
+                sql, params = self.explain_query(statement, connection.dialect)
+                plan = (await connection.exec_driver_sql(sql, params)).scalar()
+                self.set_total(plan[0]["Plan"]["Plan Rows"], True)
+        return self.finish(rows)
+
+    def estimate_query(self) -> tuple:
+        """Row count estimate kept by ANALYZE/autovacuum, free to read"""
+        return (
+            text("SELECT coalesce(max(reltuples), -1)::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": f'"{self.query.table.name}"'},
+        )
+
+    def count_query(self, statement: Select) -> Select:
+        return select(func.count()).select_from(self.apply_filters(statement).order_by(None).subquery())
+
+    def explain_query(self, statement: Select, dialect) -> tuple:
+        """EXPLAIN of the filtered query, whose top plan node estimates the matching rows.
+
+        IN filters compile to post-compile placeholders, expanded here so the
+        driver receives plain SQL and parameters.
+        """
+        compiled = self.apply_filters(statement).compile(
+            dialect=dialect, compile_kwargs={"render_postcompile": True}
+        )
+        return f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+
+    def set_total(self, total: int, estimated: bool) -> None:
+        self.response.headers[TOTAL_COUNT_HEADER] = str(max(int(total), 0))
+        if estimated:
+            self.response.headers[TOTAL_ESTIMATED_HEADER] = "true"
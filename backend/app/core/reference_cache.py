@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from threading import Lock
+from typing import Iterable, Optional
+
+import psycopg
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import DDL, event, select
+from sqlmodel import SQLModel
+
+from app.core.conditional import ETAG_HEADER, etag_matches, not_modified, weak_etag
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pagination import ListParams
+from app.core.serialization import JSONBytesResponse, encode_row, encode_rows, response_columns, rows_response
+from app.models import (
+    ArticleState, ArticleStateResponse,
+    ArticleOrderStatus, ArticleOrderStatusResponse,
+    OrderStatus, OrderStatusResponse,
+    ProjectState, ProjectStateResponse,
+    RequirementState, RequirementStateResponse,
+    PaymentCondition, PaymentConditionResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "reference_cache"
+
+
+class ReferenceTable:
+    """Immutable snapshot of one cached table, ordered by id"""
+
+    def __init__(self, rows: list, response_model):
+        self.rows = rows
+        self.loaded_at = time.monotonic()
+        self.bodies = {row.id: encode_row(row, response_model) for row in rows}
+        self.etags = {row_id: weak_etag(body) for row_id, body in self.bodies.items()}
+        self.etag = weak_etag(encode_rows(rows, response_model))
+
+
+class ReferenceCache:
+    """In-process copy of the small, rarely written lookup tables.
+
+    Every write to a cached table, whoever makes it, is announced by a
+    trigger on a PostgreSQL NOTIFY channel, and listen_for_invalidations()
+    drops the table named. A copy is only served while that listener is
+    connected; without it (a worker started without the lifespan, or a
+    connection that cannot LISTEN) every read loads the table afresh. The
+    routers also drop their table right after committing, so a worker
+    sees its own writes before the notification comes back. Copies are
+    reloaded after ``reference_cache_ttl_seconds`` at the latest.
+
+    Ids missing from the cache are confirmed against the table before they
+    are reported, so rows created moments ago are never rejected.
+    """
+
+    def __init__(self, models: dict):
+        self.models = models
+        self.by_table_name = {model.__table__.name: model for model in models}
+        self._tables: dict = {}
+        self._generations = {model: 0 for model in models}
+        self._lock = Lock()
+        # Set by the listener while it receives invalidations
+        self.listening = False
+
+    def __contains__(self, model) -> bool:
+        return model in self.models
+
+    def get(self, model) -> ReferenceTable:
+        table = self._tables.get(model)
+        if (table is None or not self.listening
+                or time.monotonic() - table.loaded_at > settings.reference_cache_ttl_seconds):
+            table = self.load(model)
+        return table
+
+    def load(self, model) -> ReferenceTable:
+        with self._lock:
+            generation = self._generations[model]
+        response_model = self.models[model]
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(*response_columns(model, response_model)).order_by(model.id)
+            ).all()
+        table = ReferenceTable(rows, response_model)
+        with self._lock:
+            # Keep the snapshot only if no write invalidated the table meanwhile
+            if self._generations[model] == generation:
+                self._tables[model] = table
+        return table
+
+    def load_all(self) -> None:
+        for model in self.models:
+            self.load(model)
+
+    def invalidate(self, model) -> None:
+        """Drop the cached copy of model's table after a write to it"""
+        with self._lock:
+            self._generations[model] += 1
+            self._tables.pop(model, None)
+
+    def clear(self) -> None:
+        for model in self.models:
+            self.invalidate(model)
+
+    def lookup(self, model, ids: Iterable[int]) -> tuple[ReferenceTable, set[int]]:
+        """The table snapshot and the ids absent from it.
+
+        Ids missing from the snapshot are probed with one primary key query;
+        if any of them exists after all, the table is reloaded.
+        """
+        table = self.get(model)
+        missing = {row_id for row_id in ids if row_id not in table.bodies}
+        if missing:
+            with engine.connect() as connection:
+                found = connection.execute(select(model.id).where(model.id.in_(missing))).scalars().all()
+            if found:
+                table = self.load(model)
+                missing = {row_id for row_id in missing if row_id not in table.bodies}
+        return table, missing
+
+    def missing_ids(self, model, ids: Iterable[int]) -> set[int]:
+        return self.lookup(model, ids)[1]
+
+    def page_response(self, model, page: ListParams, request: Request) -> Optional[Response]:
+        """Answer a list request from the cache.
+
+        Returns a 304 when If-None-Match holds the table's ETag, the page
+        itself for unfiltered id-ordered pages, and None when the page has to
+        be read from the database (its response still carries the ETag).
+        """
+        table = self.get(model)
+        if etag_matches(request, table.etag):
+            return not_modified(table.etag)
+        page.response.headers[ETAG_HEADER] = table.etag
+        if page.filters or page.cursor or page.offset or page.with_total or page.sort != "id":
+            return None
+        rows = page.finish(table.rows[:page.limit + 1])
+        return rows_response(rows, self.models[model], page.response.headers)
+
+    def row_response(self, model, row_id: int, request: Request, not_found: str) -> Response:
+        """Answer a detail request from the cache, with a per-row ETag"""
+        table, missing = self.lookup(model, [row_id])
+        if missing:
+            raise HTTPException(status_code=404, detail=not_found)
+        etag = table.etags[row_id]
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return JSONBytesResponse(table.bodies[row_id], headers={ETAG_HEADER: etag})
+
+
+reference_cache = ReferenceCache({
+    ArticleState: ArticleStateResponse,
+    ArticleOrderStatus: ArticleOrderStatusResponse,
+    OrderStatus: OrderStatusResponse,
+    ProjectState: ProjectStateResponse,
+    RequirementState: RequirementStateResponse,
+    PaymentCondition: PaymentConditionResponse,
+})
+
+
+# Statement-level triggers announce every write to the cached tables,
+# including those made outside the routers (scripts, psql, other services)
+REFERENCE_CACHE_TRIGGERS = [
+f"""
+CREATE OR REPLACE FUNCTION reference_cache_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', TG_TABLE_NAME);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+]
+for model in reference_cache.models:
+    REFERENCE_CACHE_TRIGGERS += [
+        f"""
+DROP TRIGGER IF EXISTS reference_cache_notify ON {model.__table__.name}
+""",
+        f"""
+CREATE TRIGGER reference_cache_notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {model.__table__.name}
+    FOR EACH STATEMENT EXECUTE FUNCTION reference_cache_notify()
+""",
+    ]
+
+# Installed after every create_all, once the lookup tables exist
+for statement in REFERENCE_CACHE_TRIGGERS:
+    event.listen(SQLModel.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+async def listen_for_invalidations(cache: ReferenceCache = reference_cache) -> None:
+    """Drop cached tables named on the NOTIFY channel, until cancelled"""
+    conninfo = settings.database_url.replace("postgresql+psycopg://", "postgresql://", 1)
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                await connection.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Writes made while nobody was listening went unannounced
+                cache.clear()
+                cache.listening = True
+                try:
+                    async for notify in connection.notifies():
+                        model = cache.by_table_name.get(notify.payload)
+                        if model is not None:
+                            cache.invalidate(model)
+                finally:
+                    cache.listening = False
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Reference cache listener failed, reconnecting")
+            await asyncio.sleep(5)
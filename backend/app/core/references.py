@@ -0,0 +1,66 @@
+from typing import Any, Iterable, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import exists, select
+from sqlmodel import Session
+
+from app.core.reference_cache import reference_cache
+
+# (model, id, message): the message is reported when no row of model has that id
+Reference = tuple[Any, Optional[int], str]
+
+
+def reference_statement(references: Sequence[Reference]):
+    """One SELECT with an EXISTS column per distinct (table, id) pair, or None if nothing to check"""
+    keys = list(dict.fromkeys((model, ref_id) for model, ref_id, _ in references if ref_id is not None))
+    if not keys:
+        return None, keys
+    statement = select(*(
+        exists().where(model.id == ref_id).label(f"ref_{index}")
+        for index, (model, ref_id) in enumerate(keys)
+    ))
+    return statement, keys
+
+
+def missing_references(session: Session, references: Sequence[Reference]) -> list[str]:
+    """Messages of every reference whose row does not exist, resolved in a single round trip.
+
+    References with a None id are optional and skipped. Lookup tables held
+    by the reference cache are checked in memory, without a query.
+    """
+    found = {}
+    for model, ref_id, _ in references:
+        if ref_id is not None and model in reference_cache:
+            found[(model, ref_id)] = not reference_cache.missing_ids(model, [ref_id])
+    statement, keys = reference_statement([
+        reference for reference in references if reference[0] not in reference_cache
+    ])
+    if statement is not None:
+        found.update(zip(keys, session.connection().execute(statement).one()))
+    return [
+        message for model, ref_id, message in references
+        if ref_id is not None and not found[(model, ref_id)]
+    ]
+
+
+def check_references(session: Session, references: Sequence[Reference]) -> None:
+    """Raise a single 400 listing every missing reference.
+
+    Create and update handlers alike call it, so references to lookup
+    tables (states, statuses, payment conditions) are validated in memory
+    from the reference cache and the rest with one query.
+    """
+    missing = missing_references(session, references)
+    if missing:
+        raise HTTPException(status_code=400, detail="; ".join(missing))
+
+
+def missing_ids(session: Session, model, ids: Iterable[int]) -> set[int]:
+    """Ids among ids with no row in model's table, checked with one IN query"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    if model in reference_cache:
+        return reference_cache.missing_ids(model, ids)
+    found = session.connection().execute(select(model.id).where(model.id.in_(ids))).scalars()
+    return ids - set(found)
@@ -0,0 +1,54 @@
+from functools import lru_cache
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi.responses import Response
+from pydantic_core import to_json
+from sqlmodel import SQLModel
+
+
+class JSONBytesResponse(Response):
+    """Response whose content is already encoded JSON"""
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def response_fields(model: type[SQLModel]) -> tuple[str, ...]:
+    """Field names of a response model, in the order FastAPI would emit them"""
+    return tuple(model.model_fields)
+
+
+@lru_cache(maxsize=None)
+def response_columns(table_model: type[SQLModel], model: type[SQLModel]) -> tuple:
+    """Table columns backing the fields of a response model.
+
+    ``select(*response_columns(Order, OrderResponse))`` returns plain rows
+    instead of ORM entities: no identity map, no instance state and no
+    relationship proxies, only the scalar values the response needs.
+    """
+    columns = table_model.__table__.c
+    return tuple(columns[field] for field in response_fields(model) if field in columns)
+
+
+def encode_rows(rows: Iterable[Any], model: type[SQLModel]) -> bytes:
+    """Encode ORM objects or Core rows to a JSON array in a single pass.
+
+    Only the fields of ``model`` are read from each row. Decimal, datetime and
+    timedelta values are encoded by pydantic-core exactly as response_model
+    serialization would, without validating every row first.
+    """
+    fields = response_fields(model)
+    return to_json({field: getattr(row, field) for field in fields} for row in rows)
+
+
+def encode_row(row: Any, model: type[SQLModel]) -> bytes:
+    """Encode a single ORM object or Core row to a JSON object"""
+    return to_json({field: getattr(row, field) for field in response_fields(model)})
+
+
+def rows_response(rows: Iterable[Any], model: type[SQLModel],
+                  headers: Optional[Mapping[str, str]] = None) -> JSONBytesResponse:
+    return JSONBytesResponse(encode_rows(rows, model), headers=headers)
+
+
+def row_response(row: Any, model: type[SQLModel]) -> JSONBytesResponse:
+    return JSONBytesResponse(encode_row(row, model))
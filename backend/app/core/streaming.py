@@ -0,0 +1,73 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json, to_jsonable_python
+from sqlalchemy import Select
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.serialization import response_fields
+
+StreamFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def stream_partitions(statement: Select, batch_size: int) -> AsyncIterator[Sequence[Any]]:
+    """Rows of statement in batches of batch_size, read through a server-side cursor.
+
+    The connection is checked out when iteration starts and returned when it
+    ends, so it lives exactly as long as the response body.
+    """
+    async with async_engine.connect() as connection:
+        result = await connection.stream(statement.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+def encode_ndjson(rows: Sequence[Any], fields: Sequence[str]) -> bytes:
+    """One JSON object per row, newline terminated"""
+    return b"".join(to_json({field: getattr(row, field) for field in fields}) + b"\n" for row in rows)
+
+
+def encode_csv(rows: Sequence[Any], fields: Sequence[str], header: bool = False) -> bytes:
+    """CSV lines for rows, values formatted as in the JSON responses"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    writer.writerows(to_jsonable_python([getattr(row, field) for field in fields]) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def encode_stream(statement: Select, model: type[SQLModel], format: StreamFormat,
+                        batch_size: int) -> AsyncIterator[bytes]:
+    fields = response_fields(model)
+    if format == "csv":
+        yield encode_csv((), fields, header=True)
+    async for rows in stream_partitions(statement, batch_size):
+        yield encode_ndjson(rows, fields) if format == "ndjson" else encode_csv(rows, fields)
+
+
+def stream_response(statement: Select, model: type[SQLModel], format: StreamFormat = "ndjson",
+                    filename: str = None) -> StreamingResponse:
+    """Stream every row of statement as NDJSON or CSV with flat memory use.
+
+    Rows are fetched ``stream_batch_size`` at a time from a server-side
+    cursor and each batch is encoded and sent before the next is read.
+    Pass ``filename`` to have browsers download the body as an attachment.
+    """
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return StreamingResponse(
+        encode_stream(statement, model, format, settings.stream_batch_size),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+    )
@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Request
+from sqlalchemy import exists, select, update
+from sqlmodel import Session, SQLModel
+
+from app.core.conditional import RowValidator, if_match_versions
+from app.core.references import Reference, missing_references
+from app.core.serialization import JSONBytesResponse, encode_row, response_columns
+
+
+class RowUpdater:
+    """Partial update of one row in a single ``UPDATE ... RETURNING``.
+
+    An instance is configured once per router and used by its PUT endpoint::
+
+        order_updater = RowUpdater(Order, OrderResponse, not_found="Order not found")
+
+        @router.put("/{order_id}")
+        def update_order(order_id: int, order_update: OrderUpdate, request: Request, session: Session = Depends(get_session)):
+            return order_updater.apply(session, request, order_id, order_update.model_dump(exclude_unset=True), [
+                (Supplier, order_update.supplier_id, "Supplier not found"),
+            ])
+
+    The statement sets the given fields and ``updated_at``, if the table
+    has one. On tables with a ``version`` column it also increments the
+    version, and an If-Match header adds ``AND version IN (...)`` to the
+    WHERE clause: a concurrent edit is refused with 412 instead of being
+    overwritten, without any row lock held while the request is handled.
+    The response carries the new ETag, unless ``etag=False`` because the
+    router's GETs tag rows some other way.
+
+    A missing row is reported with 404 ahead of any other refusal: when
+    the references passed to apply() or a value checked by ensure_unique()
+    are refused, the row is looked up before the 400 is raised, so only
+    refused updates pay for the extra query.
+    """
+
+    def __init__(self, model, response_model: type[SQLModel], not_found: str, etag: bool = True):
+        self.model = model
+        self.response_model = response_model
+        self.not_found = not_found
+        self.table = model.__table__
+        self.validator = RowValidator(model)
+        # Without updated_at or version nothing tells one state of a row from another
+        self.etag = etag and bool(self.validator.columns)
+
+    def refuse(self, session: Session, row_id: int, status_code: int, detail: str):
+        """Raise the given error, or 404 when row_id does not exist at all"""
+        if not session.connection().execute(select(exists().where(self.table.c.id == row_id))).scalar():
+            raise HTTPException(status_code=404, detail=self.not_found)
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    def ensure_unique(self, session: Session, row_id: int, field: str, value: Any,
+                      detail: str, status_code: int = 400) -> None:
+        """Refuse value for field when a row other than row_id already holds it"""
+        if value is None:
+            return
+        column = self.table.c[field]
+        taken = session.connection().execute(
+            select(exists().where(column == value, self.table.c.id != row_id))
+        ).scalar()
+        if taken:
+            self.refuse(session, row_id, status_code, detail)
+
+    def statement(self, row_id: int, values: dict[str, Any], versions):
+        values = dict(values)
+        if self.validator.modified_column is not None:
+            values[self.validator.modified_column.name] = datetime.utcnow()
+        statement = update(self.table).where(self.table.c.id == row_id)
+        if self.validator.version_column is not None:
+            version = self.validator.version_column
+            values[version.name] = version + 1
+            if versions is not None:
+                statement = statement.where(version.in_(versions))
+        columns = response_columns(self.model, self.response_model)
+        # The validators are returned too, for the ETag of the response
+        names = {column.name for column in columns}
+        extra = [column for column in self.validator.columns if column.name not in names]
+        if not values:
+            # Nothing to set on a table without updated_at or version
+            return select(*columns, *extra).where(self.table.c.id == row_id)
+        return statement.values(values).returning(*columns, *extra)
+
+    def apply(self, session: Session, request: Request, row_id: int, values: dict[str, Any],
+              references: Sequence[Reference] = ()) -> JSONBytesResponse:
+        """Update row_id with values, once every reference among references exists"""
+        missing = missing_references(session, references)
+        if missing:
+            self.refuse(session, row_id, 400, "; ".join(missing))
+        versions = if_match_versions(request) if self.validator.version_column is not None else None
+        connection = session.connection()
+        row = connection.execute(self.statement(row_id, values, versions)).one_or_none()
+        if row is None:
+            # Only a failed precondition needs a second look at the row
+            if versions is not None and connection.execute(select(exists().where(self.table.c.id == row_id))).scalar():
+                raise HTTPException(status_code=412, detail="Version mismatch, reload and retry")
+            raise HTTPException(status_code=404, detail=self.not_found)
+        session.commit()
+        headers = self.validator.headers(row) if self.etag else None
+        return JSONBytesResponse(encode_row(row, self.response_model), headers=headers)
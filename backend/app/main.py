@@ -1,10 +1,34 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import SQLModel
 from app.core.database import engine
 from app.api import api_router
+from app.core.config import settings
+from app.core.images import image_pool
+from app.core.order_summary import run_order_summary_worker
+from app.core.reference_cache import reference_cache, listen_for_invalidations
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = []
+    # Keep the order summary table in step with orders and article orders
+    if settings.order_summary_refresh_seconds > 0:
+        workers.append(asyncio.create_task(run_order_summary_worker()))
+    # Warm the lookup table cache and follow the invalidations its triggers send
+    try:
+        await asyncio.to_thread(reference_cache.load_all)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not warm the reference cache")
+    workers.append(asyncio.create_task(listen_for_invalidations()))
+    yield
+    for worker in workers:
+        worker.cancel()
+    image_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -13,6 +37,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "ETag", "Last-Modified", "Content-Range"],  # Let the frontend read pagination, cache and range headers
 )
 
 # Include API routes
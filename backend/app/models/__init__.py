@@ -5,17 +5,18 @@ from .project import Project, ProjectCreate, ProjectResponse, ProjectUpdate
 from .requirement_state import RequirementState, RequirementStateCreate, RequirementStateResponse, RequirementStateUpdate
 from .requirement import Requirement, RequirementCreate, RequirementResponse, RequirementWithArticlesCreate, ArticleCreateWithoutRequirement
 from .article_state import ArticleState, ArticleStateCreate, ArticleStateResponse, ArticleStateUpdate
-from .article import Article, ArticleCreate, ArticleResponse, ArticleUpdate
+from .article import Article, ArticleCreate, ArticleResponse, ArticleUpdate, ArticleBatch, ArticleBatchUpdate, ArticleBatchResponse
 from .condicion_pago import PaymentCondition, PaymentConditionCreate, PaymentConditionResponse, PaymentConditionUpdate
 from .order_status import OrderStatus, OrderStatusCreate, OrderStatusResponse, OrderStatusUpdate
 from .supplier import Supplier, SupplierCreate, SupplierResponse, SupplierUpdate
 from .address import Address, AddressCreate, AddressResponse, AddressUpdate
 from .article_order_status import ArticleOrderStatus, ArticleOrderStatusCreate, ArticleOrderStatusResponse, ArticleOrderStatusUpdate
 from .order import Order, OrderCreate, OrderResponse, OrderUpdate, OrderWithArticlesCreate
-from .article_order import ArticleOrder, ArticleOrderCreate, ArticleOrderResponse, ArticleOrderUpdate
+from .article_order import ArticleOrder, ArticleOrderCreate, ArticleOrderResponse, ArticleOrderUpdate, ArticleOrderBatch, ArticleOrderBatchUpdate, ArticleOrderBatchResponse
+from .order_summary import OrderSummary, OrderSummaryOutbox
 from .report import Report, ReportCreate, ReportResponse, ReportUpdate
 from .dedicated_time import DedicatedTime, DedicatedTimeCreate, DedicatedTimeResponse, DedicatedTimeUpdate
-from .photo import Photo, PhotoCreate, PhotoResponse
+from .photo import Photo, PhotoCreate, PhotoResponse, PhotoDerivative
 from .contact import Contact, ContactCreate, ContactRead, ContactUpdate
 from .budget import Budget, BudgetCreate, BudgetRead, BudgetUpdate
 
@@ -27,17 +28,18 @@ __all__ = [
     "RequirementState", "RequirementStateCreate", "RequirementStateResponse", "RequirementStateUpdate",
     "Requirement", "RequirementCreate", "RequirementResponse", "RequirementWithArticlesCreate", "ArticleCreateWithoutRequirement",
     "ArticleState", "ArticleStateCreate", "ArticleStateResponse", "ArticleStateUpdate",
-    "Article", "ArticleCreate", "ArticleResponse", "ArticleUpdate",
+    "Article", "ArticleCreate", "ArticleResponse", "ArticleUpdate", "ArticleBatch", "ArticleBatchUpdate", "ArticleBatchResponse",
     "PaymentCondition", "PaymentConditionCreate", "PaymentConditionResponse", "PaymentConditionUpdate",
     "OrderStatus", "OrderStatusCreate", "OrderStatusResponse", "OrderStatusUpdate",
     "Supplier", "SupplierCreate", "SupplierResponse", "SupplierUpdate",
     "Address", "AddressCreate", "AddressResponse", "AddressUpdate",
     "ArticleOrderStatus", "ArticleOrderStatusCreate", "ArticleOrderStatusResponse", "ArticleOrderStatusUpdate",
     "Order", "OrderCreate", "OrderResponse", "OrderUpdate", "OrderWithArticlesCreate",
-    "ArticleOrder", "ArticleOrderCreate", "ArticleOrderResponse", "ArticleOrderUpdate",
+    "ArticleOrder", "ArticleOrderCreate", "ArticleOrderResponse", "ArticleOrderUpdate", "ArticleOrderBatch", "ArticleOrderBatchUpdate", "ArticleOrderBatchResponse",
+    "OrderSummary", "OrderSummaryOutbox",
     "Report", "ReportCreate", "ReportResponse", "ReportUpdate",
     "DedicatedTime", "DedicatedTimeCreate", "DedicatedTimeResponse", "DedicatedTimeUpdate",
-    "Photo", "PhotoCreate", "PhotoResponse",
+    "Photo", "PhotoCreate", "PhotoResponse", "PhotoDerivative",
     "Contact", "ContactCreate", "ContactRead", "ContactUpdate",
     "Budget", "BudgetCreate", "BudgetRead", "BudgetUpdate",
     "FullClientResponse", "ContactBasicResponse", "BudgetBasicResponse"
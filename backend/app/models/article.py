@@ -39,4 +39,17 @@ class ArticleUpdate(SQLModel):
     model: Optional[str] = None
     dimensions: Optional[str] = None
     state_id: Optional[int] = None
-    notes: Optional[str] = None 
\ No newline at end of file
+    notes: Optional[str] = None
+
+class ArticleBatchUpdate(ArticleUpdate):
+    id: int
+
+class ArticleBatch(SQLModel):
+    create: List[ArticleCreate] = []
+    update: List[ArticleBatchUpdate] = []
+    delete: List[int] = []
+
+class ArticleBatchResponse(SQLModel):
+    created: List[ArticleResponse]
+    updated: List[ArticleResponse]
+    deleted: List[int]
@@ -1,5 +1,5 @@
 from sqlmodel import Field, SQLModel, Relationship
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 
@@ -20,6 +20,8 @@ class ArticleOrderBase(SQLModel):
 
 class ArticleOrder(ArticleOrderBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Bumped by every update; If-Match on PUT compares against it
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationships
     order: "Order" = Relationship(back_populates="articles")
@@ -31,6 +33,7 @@ class ArticleOrderCreate(ArticleOrderBase):
 
 class ArticleOrderResponse(ArticleOrderBase):
     id: int
+    version: int
 
 class ArticleOrderUpdate(SQLModel):
     order_id: Optional[int] = None
@@ -43,4 +46,17 @@ class ArticleOrderUpdate(SQLModel):
     model: Optional[str] = None
     unit_price: Optional[Decimal] = None
     total: Optional[Decimal] = None
-    notes: Optional[str] = None 
\ No newline at end of file
+    notes: Optional[str] = None
+
+class ArticleOrderBatchUpdate(ArticleOrderUpdate):
+    id: int
+
+class ArticleOrderBatch(SQLModel):
+    create: List[ArticleOrderCreate] = []
+    update: List[ArticleOrderBatchUpdate] = []
+    delete: List[int] = []
+
+class ArticleOrderBatchResponse(SQLModel):
+    created: List[ArticleOrderResponse]
+    updated: List[ArticleOrderResponse]
+    deleted: List[int]
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 from app.models.client import Client
 from app.models.contact import Contact
 
@@ -14,6 +14,11 @@ class BudgetBase(SQLModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Budget(BudgetBase, table=True):
+    __table_args__ = (
+        # Newest budgets first within a client
+        Index("idx_budget_client_created_at_id", "client_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Relationships
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 from app.models.client import Client
 
 class ContactBase(SQLModel):
@@ -13,6 +13,11 @@ class ContactBase(SQLModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Contact(ContactBase, table=True):
+    __table_args__ = (
+        # Newest contacts first within a client
+        Index("idx_contact_client_created_at_id", "client_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Relationships
@@ -1,4 +1,4 @@
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
@@ -27,7 +27,17 @@ class OrderBase(SQLModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Order(OrderBase, table=True):
+    __table_args__ = (
+        # Keyset pagination on (date, id), alone and behind each list filter
+        Index("idx_order_date_id", "date", "id"),
+        Index("idx_order_supplier_date_id", "supplier_id", "date", "id"),
+        Index("idx_order_status_date_id", "status_id", "date", "id"),
+        Index("idx_order_currency_date_id", "currency", "date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Bumped by every update; If-Match on PUT compares against it
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationships
     supplier: "Supplier" = Relationship(back_populates="orders")
@@ -69,6 +79,7 @@ class OrderResponse(OrderBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
 class OrderWithArticlesCreate(SQLModel):
     """Model for creating an order with its article orders"""
@@ -0,0 +1,129 @@
+from sqlmodel import Field, SQLModel, Index
+from sqlalchemy import DDL, event
+from typing import Optional
+from datetime import datetime
+from decimal import Decimal
+
+class OrderSummary(SQLModel, table=True):
+    """Article order totals per project, supplier, currency and month.
+
+    Maintained from OrderSummaryOutbox by app.core.order_summary; lines
+    whose article has no requirement or project have a null project_id.
+    """
+    __tablename__ = "ordersummary"
+    __table_args__ = (
+        # Each refresh replaces whole (supplier, currency, month) slices
+        Index("idx_ordersummary_supplier_currency_month", "supplier_id", "currency", "month"),
+        Index("idx_ordersummary_project_month", "project_id", "month"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project_id: Optional[int] = None
+    supplier_id: int
+    currency: str
+    month: datetime
+    total: Decimal
+    line_count: int
+
+class OrderSummaryOutbox(SQLModel, table=True):
+    """(supplier, currency, month) slices of OrderSummary awaiting a refresh"""
+    __tablename__ = "ordersummaryoutbox"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    supplier_id: int
+    currency: str
+    month: datetime
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Statement-level triggers queue the slices touched by every write to order
+# and articleorder, old and new values alike, deduplicated per statement.
+# Moving articles between requirements or projects is not tracked; run
+# rebuild_order_summary after such bulk changes.
+ORDER_SUMMARY_TRIGGERS = [
+"""
+CREATE OR REPLACE FUNCTION ordersummary_mark_order() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO ordersummaryoutbox (supplier_id, currency, month, created_at)
+        SELECT DISTINCT supplier_id, currency, date_trunc('month', "date"), now()
+        FROM old_rows;
+    ELSE
+        -- Only orders moved to another slice; other edits leave totals alone
+        INSERT INTO ordersummaryoutbox (supplier_id, currency, month, created_at)
+        SELECT DISTINCT slice.supplier_id, slice.currency, slice.month, now()
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES
+            (o.supplier_id, o.currency, date_trunc('month', o.date)),
+            (n.supplier_id, n.currency, date_trunc('month', n.date))
+        ) AS slice (supplier_id, currency, month)
+        WHERE (o.supplier_id, o.currency, date_trunc('month', o.date))
+            IS DISTINCT FROM (n.supplier_id, n.currency, date_trunc('month', n.date));
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+"""
+CREATE OR REPLACE FUNCTION ordersummary_mark_articleorder() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO ordersummaryoutbox (supplier_id, currency, month, created_at)
+        SELECT DISTINCT o.supplier_id, o.currency, date_trunc('month', o.date), now()
+        FROM old_rows r JOIN "order" o ON o.id = r.order_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO ordersummaryoutbox (supplier_id, currency, month, created_at)
+        SELECT DISTINCT o.supplier_id, o.currency, date_trunc('month', o.date), now()
+        FROM new_rows r JOIN "order" o ON o.id = r.order_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+"""
+DROP TRIGGER IF EXISTS ordersummary_order_update ON "order"
+""",
+"""
+CREATE TRIGGER ordersummary_order_update AFTER UPDATE ON "order"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ordersummary_mark_order()
+""",
+"""
+DROP TRIGGER IF EXISTS ordersummary_order_delete ON "order"
+""",
+"""
+CREATE TRIGGER ordersummary_order_delete AFTER DELETE ON "order"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ordersummary_mark_order()
+""",
+"""
+DROP TRIGGER IF EXISTS ordersummary_articleorder_insert ON articleorder
+""",
+"""
+CREATE TRIGGER ordersummary_articleorder_insert AFTER INSERT ON articleorder
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ordersummary_mark_articleorder()
+""",
+"""
+DROP TRIGGER IF EXISTS ordersummary_articleorder_update ON articleorder
+""",
+"""
+CREATE TRIGGER ordersummary_articleorder_update AFTER UPDATE ON articleorder
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ordersummary_mark_articleorder()
+""",
+"""
+DROP TRIGGER IF EXISTS ordersummary_articleorder_delete ON articleorder
+""",
+"""
+CREATE TRIGGER ordersummary_articleorder_delete AFTER DELETE ON articleorder
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ordersummary_mark_articleorder()
+""",
+]
+
+# Installed after every create_all, once order and articleorder exist
+for statement in ORDER_SUMMARY_TRIGGERS:
+    event.listen(SQLModel.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -1,12 +1,27 @@
-from sqlmodel import Field, SQLModel, Relationship
-from typing import Optional
+from sqlmodel import Field, SQLModel, Relationship, Column
+from sqlalchemy import DDL, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional, List
 from datetime import datetime
 
+class PhotoDerivative(SQLModel):
+    """A resized, re-encoded rendition of a photo"""
+    format: str
+    width: int
+    height: int
+    path: str
+    bytes: int
+    # Hex SHA-256 of the file, its strong ETag
+    sha256: Optional[str] = None
+
 class PhotoBase(SQLModel):
     """Base model for report photos"""
     path: str
     thumbnail: str
     report_id: int = Field(foreign_key="report.id")
+    # Hex SHA-256 of the files, their strong ETags; None for photos stored before they were recorded
+    sha256: Optional[str] = None
+    thumbnail_sha256: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -15,6 +30,11 @@ class Photo(PhotoBase, table=True):
     __tablename__ = "photo"
 
     id: Optional[int] = Field(default=None, primary_key=True)
+    # PhotoDerivative dicts, smallest first
+    derivatives: List[dict] = Field(
+        default_factory=list,
+        sa_column=Column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))
+    )
     
     # Relationships
     report: Optional["Report"] = Relationship(back_populates="photos")
@@ -27,4 +47,15 @@ class PhotoResponse(PhotoBase):
     """Model for photo response"""
     id: int
     created_at: datetime
-    updated_at: datetime 
\ No newline at end of file
+    updated_at: datetime
+    derivatives: List[PhotoDerivative] = []
+
+# create_all never alters an existing table, so photo tables created before
+# these columns get them here, after every create_all
+PHOTO_COLUMNS = [
+    "ALTER TABLE photo ADD COLUMN IF NOT EXISTS derivatives jsonb NOT NULL DEFAULT '[]'::jsonb",
+    "ALTER TABLE photo ADD COLUMN IF NOT EXISTS sha256 varchar",
+    "ALTER TABLE photo ADD COLUMN IF NOT EXISTS thumbnail_sha256 varchar",
+]
+for statement in PHOTO_COLUMNS:
+    event.listen(SQLModel.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
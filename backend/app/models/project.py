@@ -1,4 +1,4 @@
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 from typing import Optional, List
 from datetime import datetime
 
@@ -13,6 +13,11 @@ class ProjectBase(SQLModel):
     budget_id: Optional[int] = Field(foreign_key="budget.id", default=None)
 
 class Project(ProjectBase, table=True):
+    __table_args__ = (
+        # Latest projects of a client, read top-N by GET /clients/fullclient/{client_id}
+        Index("idx_project_client_date_id", "client_id", "date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Relationships
@@ -0,0 +1,85 @@
+"""Per-row cost of serializing order lists, before and after app.core.serialization.
+
+Runs without a database: it builds synthetic Order rows in memory and times
+
+- the previous path: a dict literal per row, response_model validation of the
+  whole list and JSONResponse rendering, as FastAPI did for GET /orders/
+- the current path: encode_rows, straight from ORM objects to JSON bytes
+- the current path fed with lightweight Core-style rows instead of ORM objects
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization [rows]
+"""
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.serialization import encode_rows, response_fields
+from app.models import Order, OrderResponse
+
+
+def build_orders(count: int) -> list[Order]:
+    start = datetime(2020, 1, 1)
+    return [
+        Order(
+            id=index,
+            supplier_id=index % 50 + 1,
+            address="Av. Siempre Viva 742",
+            bank_details="CLABE 012345678901234567",
+            date=start + timedelta(hours=index),
+            delivery_time="30 days",
+            payment_condition_id=1,
+            currency="MXN" if index % 3 else "USD",
+            supplier_reference=f"REF-{index}",
+            acceptance_id=1,
+            requested_by_id=2,
+            reviewed_by_id=3,
+            approved_by_id=4,
+            subtotal=Decimal("1000.00") + index,
+            vat=Decimal("160.00"),
+            discount=Decimal("0.00"),
+            total=Decimal("1160.00") + index,
+            notes=None,
+            shipping_address_id=1,
+            status_id=1,
+            created_at=start,
+            updated_at=start,
+        )
+        for index in range(count)
+    ]
+
+
+def previous_path(orders: list[Order]) -> bytes:
+    adapter = TypeAdapter(list[OrderResponse])
+    content = [{field: getattr(order, field) for field in response_fields(OrderResponse)} for order in orders]
+    validated = adapter.validate_python(content)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def measure(label: str, function, rows, count: int) -> float:
+    started = time.perf_counter()
+    body = function(rows)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms total  {elapsed / count * 1e6:7.2f} us/row  {len(body) / 1e6:6.1f} MB")
+    return elapsed
+
+
+def main(count: int = 100_000) -> None:
+    print(f"Building {count} orders...")
+    orders = build_orders(count)
+    Row = namedtuple("Row", response_fields(OrderResponse))
+    rows = [Row(*(getattr(order, field) for field in Row._fields)) for order in orders]
+
+    before = measure("dict + validate + render", previous_path, orders, count)
+    after_orm = measure("encode_rows (ORM objects)", lambda data: encode_rows(data, OrderResponse), orders, count)
+    after_rows = measure("encode_rows (Core rows)", lambda data: encode_rows(data, OrderResponse), rows, count)
+    print(f"Speed-up: {before / after_orm:.1f}x (ORM objects), {before / after_rows:.1f}x (Core rows)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,198 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import Order, ArticleOrder, ArticleOrderStatus
+from app.core.database import engine
+from app.core.order_summary import refresh_order_summary
+from sqlmodel import Session
+from decimal import Decimal
+from datetime import datetime
+from tests.test_orders import create_test_dependencies, cleanup_test_dependencies
+
+client = TestClient(app)
+
+def test_order_aggregates_by_supplier_and_currency():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    # Two USD orders and one MXN order for the same supplier
+    with Session(engine) as session:
+        orders = [
+            Order(
+                supplier_id=supplier_id,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency=currency,
+                subtotal=Decimal(subtotal),
+                vat=Decimal("0.00"),
+                discount=Decimal("0.00"),
+                total=Decimal(subtotal),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            )
+            for currency, subtotal in (("USD", "10.00"), ("USD", "5.50"), ("MXN", "100.00"))
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders]
+
+    response = client.get("/aggregates/orders?group_by=supplier_id&group_by=currency")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["columns"] == [
+        "supplier_id", "currency", "count", "subtotal", "vat", "discount", "total"
+    ]
+    rows = {
+        row[1]: dict(zip(data["columns"], row))
+        for row in data["rows"] if row[0] == supplier_id
+    }
+    assert rows["USD"]["count"] == 2
+    assert Decimal(rows["USD"]["total"]) == Decimal("15.50")
+    assert rows["MXN"]["count"] == 1
+    assert Decimal(rows["MXN"]["total"]) == Decimal("100.00")
+
+    # Clean up
+    with Session(engine) as session:
+        for order_id in order_ids:
+            session.delete(session.get(Order, order_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_order_aggregates_date_range_includes_whole_last_day():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    # Orders on the day before, the first day, late on the last day, and the day after
+    with Session(engine) as session:
+        orders = [
+            Order(
+                supplier_id=supplier_id,
+                date=date,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency="USD",
+                subtotal=Decimal("10.00"),
+                vat=Decimal("0.00"),
+                discount=Decimal("0.00"),
+                total=Decimal("10.00"),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            )
+            for date in (
+                datetime(2024, 1, 14, 23, 59), datetime(2024, 1, 15, 0, 0),
+                datetime(2024, 1, 31, 23, 0), datetime(2024, 2, 1, 0, 0)
+            )
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders]
+
+    response = client.get(
+        "/aggregates/orders?group_by=supplier_id&date_from=2024-01-15&date_to=2024-01-31"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    rows = [dict(zip(data["columns"], row)) for row in data["rows"] if row[0] == supplier_id]
+    assert len(rows) == 1
+    assert rows[0]["count"] == 2
+    assert Decimal(rows[0]["total"]) == Decimal("20.00")
+
+    # Clean up
+    with Session(engine) as session:
+        for order_id in order_ids:
+            session.delete(session.get(Order, order_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_aggregates_invalid_group_by():
+    response = client.get("/aggregates/orders?group_by=password")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid group_by field 'password'"
+
+def test_project_spend_follows_article_order_changes():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    with Session(engine) as session:
+        status = ArticleOrderStatus(name="Summary Test Status")
+        session.add(status)
+        session.commit()
+        order = Order(
+            supplier_id=supplier_id,
+            address="Test Address",
+            bank_details="Test Bank Details",
+            delivery_time="30 days",
+            payment_condition_id=payment_condition_id,
+            currency="USD",
+            subtotal=Decimal("30.00"),
+            vat=Decimal("0.00"),
+            total=Decimal("30.00"),
+            shipping_address_id=address_id,
+            status_id=order_status_id
+        )
+        session.add(order)
+        session.commit()
+        lines = [
+            ArticleOrder(
+                order_id=order.id, status_id=status.id, position=position,
+                quantity=Decimal("1"), unit="pcs", brand="Brand", model="Model",
+                unit_price=Decimal("10.00"), total=Decimal("10.00")
+            )
+            for position in (1, 2, 3)
+        ]
+        session.add_all(lines)
+        session.commit()
+        order_id, status_id = order.id, status.id
+        line_ids = [line.id for line in lines]
+
+    def supplier_spend():
+        with engine.begin() as connection:
+            while refresh_order_summary(connection):
+                pass
+        data = client.get("/aggregates/project-spend?group_by=supplier_id&group_by=currency").json()
+        rows = [dict(zip(data["columns"], row)) for row in data["rows"] if row[0] == supplier_id]
+        return [(row["currency"], row["lines"], Decimal(row["total"])) for row in rows]
+
+    assert supplier_spend() == [("USD", 3, Decimal("30.00"))]
+
+    # Deleting a line and moving the order to another currency are both picked up
+    with Session(engine) as session:
+        session.delete(session.get(ArticleOrder, line_ids[0]))
+        session.commit()
+        order = session.get(Order, order_id)
+        order.currency = "MXN"
+        session.add(order)
+        session.commit()
+    assert supplier_spend() == [("MXN", 2, Decimal("20.00"))]
+
+    # Clean up
+    with Session(engine) as session:
+        for line_id in line_ids[1:]:
+            session.delete(session.get(ArticleOrder, line_id))
+        session.commit()
+        session.delete(session.get(Order, order_id))
+        session.delete(session.get(ArticleOrderStatus, status_id))
+        session.commit()
+    supplier_spend()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
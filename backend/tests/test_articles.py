@@ -5,6 +5,7 @@ from app.core.database import engine, get_session
 from sqlmodel import Session, select
 from decimal import Decimal
 import pytest
+import json
 
 client = TestClient(app)
 
@@ -728,4 +729,131 @@ def test_update_article_invalid_state():
         session.delete(requirement_state)
         session.delete(project)
         session.delete(project_state)
-        session.commit() 
\ No newline at end of file
+        session.commit()
+
+def test_batch_articles():
+    # Create dependencies
+    user_id, project_id, requirement_state_id, article_state_id, requirement_id = create_test_dependencies()
+
+    # Existing articles to update and delete
+    with Session(engine) as session:
+        existing = [
+            Article(
+                requirement_id=requirement_id,
+                requirement_consecutive=consecutive,
+                quantity=Decimal("1"),
+                unit="pcs",
+                brand="Test Brand",
+                model="Test Model",
+                dimensions="10x20x30",
+                state_id=article_state_id
+            )
+            for consecutive in (1, 2)
+        ]
+        session.add_all(existing)
+        session.commit()
+        kept_id, deleted_id = [article.id for article in existing]
+
+    new_article = {
+        "requirement_id": requirement_id,
+        "quantity": "3.5",
+        "unit": "m",
+        "brand": "New Brand",
+        "model": "New Model",
+        "dimensions": "1x1",
+        "state_id": article_state_id
+    }
+    response = client.post("/articles/batch", json={
+        "create": [new_article, {**new_article, "model": "Second Model"}],
+        "update": [{"id": kept_id, "quantity": "7.25", "notes": "Updated"}],
+        "delete": [deleted_id]
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [article["model"] for article in data["created"]] == ["New Model", "Second Model"]
+    assert data["updated"][0]["id"] == kept_id
+    assert data["updated"][0]["quantity"] == "7.25"
+    assert data["updated"][0]["notes"] == "Updated"
+    assert data["updated"][0]["brand"] == "Test Brand"
+    assert data["deleted"] == [deleted_id]
+
+    # Clean up
+    with Session(engine) as session:
+        assert session.get(Article, deleted_id) is None
+        for article_id in [kept_id] + [article["id"] for article in data["created"]]:
+            session.delete(session.get(Article, article_id))
+        session.commit()
+    cleanup_test_dependencies(user_id, project_id, requirement_state_id, article_state_id, requirement_id)
+
+def test_batch_articles_invalid_items_write_nothing():
+    # Create dependencies
+    user_id, project_id, requirement_state_id, article_state_id, requirement_id = create_test_dependencies()
+
+    new_article = {
+        "requirement_id": requirement_id,
+        "quantity": "1",
+        "unit": "pcs",
+        "brand": "Batch Brand",
+        "model": "Batch Model",
+        "dimensions": "1x1",
+        "state_id": article_state_id
+    }
+    response = client.post("/articles/batch", json={
+        "create": [new_article, {**new_article, "state_id": 99999}],
+        "update": [{"id": 99999, "notes": "Missing"}],
+        "delete": []
+    })
+
+    # Every failing item is reported and the valid create is not written
+    assert response.status_code == 400
+    assert response.json()["detail"] == [
+        {"operation": "update", "index": 0, "detail": "Article not found"},
+        {"operation": "create", "index": 1, "detail": "Invalid state_id"}
+    ]
+    with Session(engine) as session:
+        articles = session.exec(select(Article).where(Article.requirement_id == requirement_id)).all()
+        assert articles == []
+
+    cleanup_test_dependencies(user_id, project_id, requirement_state_id, article_state_id, requirement_id)
+
+def test_get_articles_stream():
+    # Create dependencies
+    user_id, project_id, requirement_state_id, article_state_id, requirement_id = create_test_dependencies()
+
+    with Session(engine) as session:
+        articles = [
+            Article(
+                requirement_id=requirement_id,
+                requirement_consecutive=consecutive,
+                quantity=Decimal("1"),
+                unit="pcs",
+                brand="Stream Brand",
+                model="Stream Model",
+                dimensions="1x1",
+                state_id=article_state_id
+            )
+            for consecutive in (1, 2, 3)
+        ]
+        session.add_all(articles)
+        session.commit()
+        article_ids = [article.id for article in articles]
+
+    # Every matching row, in sort order, one JSON object per line
+    response = client.get(f"/articles/?stream=ndjson&requirement_id={requirement_id}&sort=-id&limit=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == sorted(article_ids, reverse=True)
+    assert lines[0]["brand"] == "Stream Brand"
+
+    # Streaming reads everything, so it does not combine with paging
+    response = client.get("/articles/?stream=ndjson&offset=10")
+    assert response.status_code == 400
+
+    # Clean up
+    with Session(engine) as session:
+        for article_id in article_ids:
+            session.delete(session.get(Article, article_id))
+        session.commit()
+    cleanup_test_dependencies(user_id, project_id, requirement_state_id, article_state_id, requirement_id)
@@ -174,6 +174,54 @@ def test_get_full_client():
         session.delete(test_client)
         session.commit()
 
+def test_get_full_client_latest_five_of_each():
+    """Only the five newest projects, contacts and budgets come back, newest first"""
+    now = datetime.utcnow()
+    # Inserted out of age order, so ids do not give the answer away
+    ages = [3, 0, 6, 1, 5, 2, 4]
+    with Session(engine) as session:
+        test_client = Client(name="Top Five Client")
+        test_state = ProjectState(name="Top Five State", description="Test Description", order=1, active=True)
+        session.add(test_client)
+        session.add(test_state)
+        session.commit()
+        client_id, state_id = test_client.id, test_state.id
+
+        contacts = []
+        for age in ages:
+            contact = Contact(name=f"Contact {age}", client_id=client_id, created_at=now - timedelta(days=age))
+            session.add(contact)
+            contacts.append(contact)
+        session.commit()
+        for age, contact in zip(ages, contacts):
+            session.add(Budget(
+                number=100 + age, name=f"Budget {age}", client_id=client_id, contact_id=contact.id,
+                delivery_date=now + timedelta(days=30), created_at=now - timedelta(days=age)
+            ))
+            session.add(Project(
+                number=f"TOP5-{age}", name=f"Project {age}", client_id=client_id, state_id=state_id,
+                date=now - timedelta(days=age)
+            ))
+        session.commit()
+
+    try:
+        response = client.get(f"/clients/fullclient/{client_id}")
+        assert response.status_code == 200
+        data = response.json()
+        newest = [0, 1, 2, 3, 4]
+        assert [project["name"] for project in data["latest_projects"]] == [f"Project {age}" for age in newest]
+        assert [contact["name"] for contact in data["latest_contacts"]] == [f"Contact {age}" for age in newest]
+        assert [budget["name"] for budget in data["latest_budgets"]] == [f"Budget {age}" for age in newest]
+    finally:
+        with Session(engine) as session:
+            for model in (Project, Budget, Contact):
+                for row in session.exec(select(model).where(model.client_id == client_id)).all():
+                    session.delete(row)
+                session.commit()
+            session.delete(session.get(ProjectState, state_id))
+            session.delete(session.get(Client, client_id))
+            session.commit()
+
 def test_create_client():
     response = client.post(
         "/clients",
@@ -261,4 +261,35 @@ def test_delete_order_status():
 
 def test_get_nonexistent_order_status():
     response = client.get("/order-statuses/999999")
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_order_status_etag():
+    create_response = client.post("/order-statuses/", json={"name": "ETag Status", "order": 3, "active": True})
+    assert create_response.status_code == 200
+    status_id = create_response.json()["id"]
+
+    response = client.get(f"/order-statuses/{status_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    # Unchanged row: 304 without a body
+    response = client.get(f"/order-statuses/{status_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    list_response = client.get("/order-statuses/")
+    list_etag = list_response.headers["etag"]
+    assert client.get("/order-statuses/", headers={"If-None-Match": list_etag}).status_code == 304
+
+    # A write through the router drops the cached table
+    update_response = client.put(f"/order-statuses/{status_id}", json={"name": "ETag Status Updated"})
+    assert update_response.status_code == 200
+    response = client.get(f"/order-statuses/{status_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "ETag Status Updated"
+    assert response.headers["etag"] != etag
+    assert client.get("/order-statuses/", headers={"If-None-Match": list_etag}).status_code == 200
+
+    client.delete(f"/order-statuses/{status_id}")
+    assert client.get(f"/order-statuses/{status_id}").status_code == 404
@@ -9,6 +9,9 @@ from app.core.database import engine
 from sqlmodel import Session, select
 from decimal import Decimal
 from datetime import datetime
+import csv
+import io
+import json
 
 client = TestClient(app)
 
@@ -218,6 +221,117 @@ def test_get_orders():
         order_status_id, user1_id, user2_id, user3_id, user4_id
     )
 
+def test_get_orders_pagination():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    # Create five orders on consecutive days
+    order_ids = []
+    with Session(engine) as session:
+        for day in range(1, 6):
+            test_order = Order(
+                supplier_id=supplier_id,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                date=datetime(2024, 1, day),
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency="USD",
+                subtotal=Decimal("100.00"),
+                vat=Decimal("19.00"),
+                total=Decimal("119.00"),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            )
+            session.add(test_order)
+            session.commit()
+            session.refresh(test_order)
+            order_ids.append(test_order.id)
+
+    # Walk the pages two orders at a time
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "supplier_id": supplier_id}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/orders/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) <= 2
+        seen.extend(order["id"] for order in data)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # Newest first, every order exactly once
+    assert seen == list(reversed(order_ids))
+
+    # Clean up
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_get_orders_filters():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    # Create one USD order in January and one EUR order in March
+    with Session(engine) as session:
+        for date, currency in [(datetime(2024, 1, 15), "USD"), (datetime(2024, 3, 15), "EUR")]:
+            session.add(Order(
+                supplier_id=supplier_id,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                date=date,
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency=currency,
+                subtotal=Decimal("100.00"),
+                vat=Decimal("19.00"),
+                total=Decimal("119.00"),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            ))
+        session.commit()
+
+    # Filter by currency
+    response = client.get("/orders/", params={"supplier_id": supplier_id, "currency": "EUR"})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["currency"] == "EUR"
+
+    # Filter by date range
+    response = client.get("/orders/", params={
+        "status_id": order_status_id,
+        "date_from": "2024-01-01T00:00:00",
+        "date_to": "2024-01-31T23:59:59"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["currency"] == "USD"
+    assert "X-Next-Cursor" not in response.headers
+
+    # Clean up
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_get_orders_invalid_cursor():
+    response = client.get("/orders/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
 def test_get_single_order():
     # Create dependencies
     (
@@ -369,6 +483,18 @@ def test_create_order_invalid_references():
     data = response.json()
     assert "detail" in data  # Should contain error message
 
+    # Every missing reference is reported at once
+    assert data["detail"].split("; ") == [
+        "Supplier not found",
+        "Payment condition not found",
+        "Shipping address not found",
+        "Order status not found",
+        "Acceptance user not found",
+        "Requested by user not found",
+        "Reviewed by user not found",
+        "Approved by user not found",
+    ]
+
 def test_delete_order():
     # Create dependencies
     (
@@ -425,6 +551,72 @@ def test_delete_nonexistent_order():
     assert response.status_code == 404
     assert response.json()["detail"] == "Order not found"
 
+def test_delete_order_cascades_article_orders_only_when_asked():
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    with Session(engine) as session:
+        status = ArticleOrderStatus(name="Cascade Status", description="Test Description", order=1, active=True)
+        order = Order(
+            supplier_id=supplier_id,
+            address="Order with Lines",
+            bank_details="Test Bank Details",
+            delivery_time="30 days",
+            payment_condition_id=payment_condition_id,
+            currency="USD",
+            subtotal=Decimal("100.00"),
+            vat=Decimal("19.00"),
+            discount=Decimal("0.00"),
+            total=Decimal("119.00"),
+            shipping_address_id=address_id,
+            status_id=order_status_id
+        )
+        session.add(status)
+        session.add(order)
+        session.commit()
+        lines = [
+            ArticleOrder(
+                order_id=order.id, status_id=status.id, position=position, quantity=Decimal("1"),
+                unit="piece", brand="Brand", model="Model",
+                unit_price=Decimal("50.00"), total=Decimal("50.00")
+            )
+            for position in (1, 2)
+        ]
+        session.add_all(lines)
+        session.commit()
+        order_id, status_id = order.id, status.id
+        line_ids = [line.id for line in lines]
+
+    # Article orders refuse a plain delete
+    response = client.delete(f"/orders/{order_id}")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Order has article orders"
+    with Session(engine) as session:
+        assert session.get(Order, order_id) is not None
+        assert len(session.exec(select(ArticleOrder).where(ArticleOrder.id.in_(line_ids))).all()) == 2
+
+    response = client.delete(f"/orders/{order_id}?cascade=true")
+    assert response.status_code == 200
+
+    with Session(engine) as session:
+        assert session.get(Order, order_id) is None
+        remaining = session.exec(select(ArticleOrder).where(ArticleOrder.id.in_(line_ids))).all()
+        assert remaining == []
+
+    # A second delete finds nothing
+    response = client.delete(f"/orders/{order_id}")
+    assert response.status_code == 404
+
+    with Session(engine) as session:
+        session.delete(session.get(ArticleOrderStatus, status_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
 def test_update_order():
     """Test updating an order"""
     # Create dependencies
@@ -798,6 +990,12 @@ def test_update_order_invalid_supplier():
         session.delete(address)
         session.commit()
 
+def test_update_nonexistent_order_invalid_supplier():
+    """A missing order is reported before its invalid references"""
+    response = client.put("/orders/99999", json={"supplier_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Order not found"
+
 def test_update_order_partial():
     """Test partial update of an order"""
     # Create dependencies
@@ -1181,4 +1379,263 @@ def test_create_order_with_articles_invalid_references():
     cleanup_test_dependencies(
         supplier_id, payment_condition_id, address_id,
         order_status_id, user1_id, user2_id, user3_id, user4_id
-    ) 
\ No newline at end of file
+    )
+
+def test_create_order_with_articles_invalid_line_is_atomic():
+    """An invalid line rejects the whole order without writing anything"""
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    # Create test article order status
+    with Session(engine) as session:
+        test_article_order_status = ArticleOrderStatus(
+            name="Test Article Order Status",
+            description="Test Description",
+            order=1,
+            active=True
+        )
+        session.add(test_article_order_status)
+        session.commit()
+        session.refresh(test_article_order_status)
+        article_order_status_id = test_article_order_status.id
+
+    line = {
+        "article_req_id": None,
+        "status_id": article_order_status_id,
+        "position": 1,
+        "quantity": "1.00",
+        "unit": "pcs",
+        "brand": "Test Brand",
+        "model": "Test Model",
+        "unit_price": "1.00",
+        "total": "1.00"
+    }
+    order_data = {
+        "order": {
+            "supplier_id": supplier_id,
+            "address": "Test Address",
+            "bank_details": "Test Bank Details",
+            "delivery_time": "30 days",
+            "payment_condition_id": payment_condition_id,
+            "currency": "USD",
+            "subtotal": "50.00",
+            "vat": "8.00",
+            "discount": "0.00",
+            "total": "58.00",
+            "shipping_address_id": address_id,
+            "status_id": order_status_id,
+            "acceptance_id": user1_id,
+            "requested_by_id": user2_id,
+            "reviewed_by_id": user3_id,
+            "approved_by_id": user4_id
+        },
+        # The last of 50 lines references a non-existent status
+        "articles": [
+            {**line, "position": position} for position in range(1, 50)
+        ] + [{**line, "position": 50, "status_id": 99999}]
+    }
+
+    response = client.post("/orders/with-articles", json=order_data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid article order status_id"
+
+    # Neither the order nor any of its lines were written
+    with Session(engine) as session:
+        orders = session.exec(select(Order).where(Order.supplier_id == supplier_id)).all()
+        assert orders == []
+        session.delete(session.get(ArticleOrderStatus, article_order_status_id))
+        session.commit()
+
+    # Clean up dependencies
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_export_orders():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    with Session(engine) as session:
+        orders = [
+            Order(
+                supplier_id=supplier_id,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency="USD",
+                subtotal=Decimal(total),
+                vat=Decimal("0.00"),
+                discount=Decimal("0.00"),
+                total=Decimal(total),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            )
+            for total in ("10.00", "20.00")
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders]
+
+    # NDJSON: one order object per line, filtered like the list endpoint
+    response = client.get(f"/orders/export?supplier_id={supplier_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == sorted(order_ids)
+    assert {line["total"] for line in lines} == {"10.00", "20.00"}
+
+    # CSV: a header row followed by one row per order
+    response = client.get(f"/orders/export?supplier_id={supplier_id}&format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="orders.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert sorted(int(row["id"]) for row in rows) == sorted(order_ids)
+
+    # Clean up
+    with Session(engine) as session:
+        for order_id in order_ids:
+            session.delete(session.get(Order, order_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_get_order_conditional():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    with Session(engine) as session:
+        orders = [
+            Order(
+                supplier_id=supplier_id,
+                address="Test Address",
+                bank_details="Test Bank Details",
+                delivery_time="30 days",
+                payment_condition_id=payment_condition_id,
+                currency="USD",
+                subtotal=Decimal(total),
+                vat=Decimal("0.00"),
+                discount=Decimal("0.00"),
+                total=Decimal(total),
+                shipping_address_id=address_id,
+                status_id=order_status_id
+            )
+            for total in ("10.00", "20.00")
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders]
+
+    # Detail: ETag and Last-Modified from updated_at, 304 while unchanged
+    response = client.get(f"/orders/{order_ids[0]}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    response = client.get(f"/orders/{order_ids[0]}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    response = client.get(f"/orders/{order_ids[0]}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    # List: one ETag per page of filtered rows
+    list_url = f"/orders/?supplier_id={supplier_id}"
+    list_etag = client.get(list_url).headers["etag"]
+    assert client.get(list_url, headers={"If-None-Match": list_etag}).status_code == 304
+
+    # An update changes both validators
+    response = client.put(f"/orders/{order_ids[0]}", json={"delivery_time": "45 days"})
+    assert response.status_code == 200
+    response = client.get(f"/orders/{order_ids[0]}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["delivery_time"] == "45 days"
+    assert response.headers["etag"] != etag
+    assert client.get(list_url, headers={"If-None-Match": list_etag}).status_code == 200
+
+    # Unknown rows are still 404, conditional or not
+    response = client.get("/orders/999999", headers={"If-None-Match": etag})
+    assert response.status_code == 404
+
+    # Clean up
+    with Session(engine) as session:
+        for order_id in order_ids:
+            session.delete(session.get(Order, order_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
+
+def test_update_order_if_match():
+    # Create dependencies
+    (
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    ) = create_test_dependencies()
+
+    test_order = Order(
+        supplier_id=supplier_id,
+        address="Test Address",
+        bank_details="Test Bank Details",
+        delivery_time="30 days",
+        payment_condition_id=payment_condition_id,
+        currency="USD",
+        subtotal=Decimal("100.00"),
+        vat=Decimal("0.00"),
+        discount=Decimal("0.00"),
+        total=Decimal("100.00"),
+        shipping_address_id=address_id,
+        status_id=order_status_id
+    )
+    with Session(engine) as session:
+        session.add(test_order)
+        session.commit()
+        session.refresh(test_order)
+        order_id = test_order.id
+
+    response = client.get(f"/orders/{order_id}")
+    assert response.json()["version"] == 1
+    etag = response.headers["etag"]
+    assert etag == '"1"'
+
+    # The first writer holding the current version wins
+    response = client.put(f"/orders/{order_id}", json={"notes": "First"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.json()["notes"] == "First"
+    assert response.headers["etag"] == '"2"'
+
+    # A second writer still holding version 1 is refused and changes nothing
+    response = client.put(f"/orders/{order_id}", json={"notes": "Second"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/orders/{order_id}").json()["notes"] == "First"
+
+    # Without If-Match the update is unconditional, and still bumps the version
+    response = client.put(f"/orders/{order_id}", json={"notes": "Third"})
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+
+    # A missing order is a 404 whatever the precondition
+    response = client.put("/orders/999999", json={"notes": "None"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 404
+
+    # Clean up
+    with Session(engine) as session:
+        session.delete(session.get(Order, order_id))
+        session.commit()
+    cleanup_test_dependencies(
+        supplier_id, payment_condition_id, address_id,
+        order_status_id, user1_id, user2_id, user3_id, user4_id
+    )
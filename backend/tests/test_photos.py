@@ -1,9 +1,11 @@
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import Photo, User, Report, Project, ProjectState, Client
+from app.core.config import settings
 from app.core.database import engine
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
+import hashlib
 import io
 import os
 from PIL import Image
@@ -200,12 +202,17 @@ def test_upload_photo():
         # Verify the files were created
         assert os.path.exists(data["path"])
         assert os.path.exists(data["thumbnail"])
+        for derivative in data["derivatives"]:
+            assert os.path.exists(derivative["path"])
         
         # Clean up the uploaded files
         if os.path.exists(data["path"]):
             os.remove(data["path"])
         if os.path.exists(data["thumbnail"]):
             os.remove(data["thumbnail"])
+        for derivative in data["derivatives"]:
+            if os.path.exists(derivative["path"]):
+                os.remove(derivative["path"])
         
         # Clean up the database record
         with Session(engine) as session:
@@ -222,6 +229,111 @@ def test_upload_photo():
         # Clean up dependencies
         cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
 
+def test_photo_renditions():
+    """Uploads get upright derivatives, and the smallest adequate one is served"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    
+    # A landscape image stored sideways, with EXIF orientation 6 (rotate 90 clockwise)
+    img = Image.new("RGB", (800, 400), color=(0, 128, 255))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", exif=exif)
+    
+    response = client.post(
+        "/photos/",
+        files={"image": ("sideways.jpg", buffer.getvalue(), "image/jpeg")},
+        data={"report_id": report_id}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    
+    try:
+        derivatives = data["derivatives"]
+        webp = sorted((d for d in derivatives if d["format"] == "webp"), key=lambda d: d["width"])
+        # 320 and 640 sides, then capped at the original's 800
+        assert [(d["width"], d["height"]) for d in webp] == [(160, 320), (320, 640), (400, 800)]
+        with Image.open(webp[0]["path"]) as rendered:
+            assert rendered.size == (160, 320)
+            assert not rendered.getexif()
+        
+        response = client.get(f"/photos/{data['id']}/rendition", params={"width": 300, "format": "webp"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        with Image.open(io.BytesIO(response.content)) as served:
+            assert served.size == (320, 640)
+        
+        # Nothing acceptable: the original
+        response = client.get(f"/photos/{data['id']}/rendition", headers={"Accept": "image/jpeg"})
+        assert response.status_code == 200
+        assert response.headers["vary"] == "Accept"
+        assert response.content == buffer.getvalue()
+    finally:
+        assert client.delete(f"/photos/{data['id']}").status_code == 200
+        for derivative in data["derivatives"]:
+            assert not os.path.exists(derivative["path"])
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
+def test_photo_file_serving():
+    """Photo files carry content hash ETags, immutable caching and range support"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), color=(20, 200, 20)).save(buffer, format="PNG")
+    original = buffer.getvalue()
+    
+    response = client.post(
+        "/photos/",
+        files={"image": ("green.png", original, "image/png")},
+        data={"report_id": report_id}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    legacy_path = Path("uploads/photos/legacy_test.png")
+    legacy_path.write_bytes(original)
+    
+    try:
+        etag = f'"{hashlib.sha256(original).hexdigest()}"'
+        assert data["sha256"] == hashlib.sha256(original).hexdigest()
+        
+        response = client.get(f"/photos/{data['id']}/file")
+        assert response.status_code == 200
+        assert response.content == original
+        assert response.headers["etag"] == etag
+        assert "immutable" in response.headers["cache-control"]
+        
+        response = client.get(f"/photos/{data['id']}/file", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+        response = client.get(f"/photos/{data['id']}/file", headers={"Range": "bytes=0-9"})
+        assert response.status_code == 206
+        assert response.content == original[:10]
+        assert response.headers["content-range"] == f"bytes 0-9/{len(original)}"
+        
+        response = client.get(f"/photos/{data['id']}/thumbnail")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["etag"] == f'"{data["thumbnail_sha256"]}"'
+        
+        # Photos stored before digests were recorded are hashed on first request
+        with Session(engine) as session:
+            legacy = Photo(path=str(legacy_path), thumbnail="missing/thumbnail.jpg", report_id=report_id)
+            session.add(legacy)
+            session.commit()
+            session.refresh(legacy)
+            legacy_id = legacy.id
+        response = client.get(f"/photos/{legacy_id}/file")
+        assert response.status_code == 200
+        assert response.headers["etag"] == etag
+        assert client.get(f"/photos/{legacy_id}/thumbnail").status_code == 404
+        assert client.delete(f"/photos/{legacy_id}").status_code == 200
+        
+        assert client.get("/photos/99999/file").status_code == 404
+    finally:
+        legacy_path.unlink(missing_ok=True)
+        client.delete(f"/photos/{data['id']}")
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
 def test_upload_photo_invalid_report():
     """Test uploading a photo with invalid report ID"""
     # Create a test image
@@ -246,6 +358,105 @@ def test_upload_photo_invalid_report():
         if os.path.exists(test_image_path):
             os.remove(test_image_path)
 
+def test_upload_photo_pool_saturated(monkeypatch):
+    """Uploads beyond the image pool's admission limit are refused with 503"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    test_image_path = create_test_image()
+    monkeypatch.setattr(settings, "image_max_pending", 0)
+    
+    try:
+        with open(test_image_path, "rb") as img_file:
+            response = client.post(
+                "/photos/",
+                files={"image": ("test_image.jpg", img_file, "image/jpeg")},
+                data={"report_id": report_id}
+            )
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.image_retry_after_seconds)
+        with Session(engine) as session:
+            assert session.exec(select(Photo).where(Photo.report_id == report_id)).first() is None
+    finally:
+        if os.path.exists(test_image_path):
+            os.remove(test_image_path)
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
+def test_upload_photo_too_large(monkeypatch):
+    """Uploads over the size limit are refused while streaming and leave no files behind"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    test_image_path = create_test_image(size=(1000, 1000))
+    monkeypatch.setattr(settings, "image_max_bytes", 1024)
+    monkeypatch.setattr(settings, "image_upload_chunk_bytes", 512)
+    before = set(os.listdir("uploads/photos"))
+    
+    try:
+        with open(test_image_path, "rb") as img_file:
+            response = client.post(
+                "/photos/",
+                files={"image": ("test_image.jpg", img_file, "image/jpeg")},
+                data={"report_id": report_id}
+            )
+        
+        assert response.status_code == 413
+        assert set(os.listdir("uploads/photos")) == before
+    finally:
+        if os.path.exists(test_image_path):
+            os.remove(test_image_path)
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
+def test_upload_photo_large_metadata(monkeypatch):
+    """A JPEG whose metadata runs far past the first chunk is still read to its header"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    monkeypatch.setattr(settings, "image_upload_chunk_bytes", 4096)
+    exif = Image.Exif()
+    exif[0x010E] = "x" * 60000  # ImageDescription, about 60 KB of EXIF
+    buffer = io.BytesIO()
+    Image.new("RGB", (120, 80), color=(200, 100, 0)).save(buffer, format="JPEG", exif=exif)
+    
+    response = client.post(
+        "/photos/",
+        files={"image": ("exif.jpg", buffer.getvalue(), "image/jpeg")},
+        data={"report_id": report_id}
+    )
+    try:
+        assert response.status_code == 200
+    finally:
+        if response.status_code == 200:
+            client.delete(f"/photos/{response.json()['id']}")
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
+def test_upload_photo_rejected_before_writing(monkeypatch):
+    """Disguised files and oversized dimensions are refused without writing anything"""
+    user_id, report_id, project_id, state_id, client_id = create_test_dependencies()
+    test_image_path = create_test_image(size=(300, 200))
+    before = set(os.listdir("uploads/photos"))
+    
+    try:
+        # Text sent as a JPEG is caught by its magic bytes
+        response = client.post(
+            "/photos/",
+            files={"image": ("fake.jpg", b"This is not an image", "image/jpeg")},
+            data={"report_id": report_id}
+        )
+        assert response.status_code == 400
+        
+        # Dimensions come from the header, before the image is decoded
+        monkeypatch.setattr(settings, "image_max_dimension", 250)
+        with open(test_image_path, "rb") as img_file:
+            response = client.post(
+                "/photos/",
+                files={"image": ("test_image.jpg", img_file, "image/jpeg")},
+                data={"report_id": report_id}
+            )
+        assert response.status_code == 400
+        assert "300x200" in response.json()["detail"]
+        
+        assert set(os.listdir("uploads/photos")) == before
+    finally:
+        if os.path.exists(test_image_path):
+            os.remove(test_image_path)
+        cleanup_test_dependencies(user_id, report_id, project_id, state_id, client_id)
+
 def test_upload_photo_invalid_file():
     """Test uploading an invalid file type"""
     # Create test dependencies
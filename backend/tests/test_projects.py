@@ -412,4 +412,36 @@ def test_update_project_not_found():
         }
     )
     assert response.status_code == 404
-    assert "Project not found" in response.json()["detail"] 
\ No newline at end of file
+    assert "Project not found" in response.json()["detail"]
+
+def test_update_project_number_conflict():
+    """Test that a project cannot take the number of another project"""
+    user_id, client_id, state_id = create_test_dependencies()
+
+    with Session(engine) as session:
+        first = Project(number="TEST-CONFLICT-1", name="First", state_id=state_id, client_id=client_id)
+        second = Project(number="TEST-CONFLICT-2", name="Second", state_id=state_id, client_id=client_id)
+        session.add(first)
+        session.add(second)
+        session.commit()
+        session.refresh(first)
+        session.refresh(second)
+        first_id, second_id = first.id, second.id
+
+    response = client.put(f"/projects/{second_id}", json={"number": "TEST-CONFLICT-1"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Project number already exists"
+
+    # Keeping its own number is not a conflict, and an empty update returns the project as is
+    response = client.put(f"/projects/{first_id}", json={"number": "TEST-CONFLICT-1"})
+    assert response.status_code == 200
+    response = client.put(f"/projects/{first_id}", json={})
+    assert response.status_code == 200
+    assert response.json()["name"] == "First"
+
+    with Session(engine) as session:
+        session.delete(session.get(Project, first_id))
+        session.delete(session.get(Project, second_id))
+        session.commit()
+
+    cleanup_test_dependencies(user_id, client_id, state_id)
@@ -1,6 +1,6 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from app.models import Report, User, Project, ProjectState, Client
+from app.models import Report, User, Project, ProjectState, Client, Photo
 from app.core.database import engine
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
@@ -217,6 +217,48 @@ def test_delete_report():
     # Clean up
     cleanup_test_dependencies(user_id, project_id, state_id, client_id)
 
+def test_delete_report_with_photos():
+    # Create test dependencies
+    user_id, project_id, state_id, client_id = create_test_dependencies()
+
+    # Create a report with a photo
+    test_report = Report(
+        title="Report with Photos",
+        description="Test Description",
+        duration=timedelta(hours=2),
+        dead_time=timedelta(minutes=30),
+        project_id=project_id,
+        responsible_id=user_id
+    )
+    with Session(engine) as session:
+        session.add(test_report)
+        session.commit()
+        session.refresh(test_report)
+        report_id = test_report.id
+        test_photo = Photo(
+            path="test/path/image.jpg",
+            thumbnail="test/path/thumbnail.jpg",
+            report_id=report_id
+        )
+        session.add(test_photo)
+        session.commit()
+        photo_id = test_photo.id
+
+    # The photo refuses the delete instead of failing on its foreign key
+    response = client.delete(f"/reports/{report_id}")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Report has photos"
+
+    with Session(engine) as session:
+        assert session.get(Report, report_id) is not None
+
+    # Clean up
+    with Session(engine) as session:
+        session.delete(session.get(Photo, photo_id))
+        session.delete(session.get(Report, report_id))
+        session.commit()
+    cleanup_test_dependencies(user_id, project_id, state_id, client_id)
+
 def test_update_report():
     """Test updating a report with valid data"""
     # Create test dependencies
@@ -242,7 +242,14 @@ def test_create_requirement_with_articles():
         for article in articles:
             assert article.created_at is not None
             assert article.updated_at is not None
-        
+
+        # Verify that consecutives follow the order of the request
+        articles = sorted(articles, key=lambda article: article.requirement_consecutive)
+        assert [article.requirement_consecutive for article in articles] == [1, 2]
+        assert [article.brand for article in articles] == [
+            article["brand"] for article in requirement_data["articles"]
+        ]
+
         # Clean up
         for article in articles:
             session.delete(article)
@@ -323,6 +330,11 @@ def test_delete_requirement():
     # Clean up dependencies
     cleanup_test_dependencies(user_id, project_id, state_id)
 
+def test_delete_nonexistent_requirement():
+    response = client.delete("/requirements/99999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Requirement not found"
+
 def test_create_requirement_invalid_references():
     """Test creating a requirement with invalid foreign keys"""
     # Try to create a requirement with non-existent references
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import User
+from app.core.config import settings
 from app.core.database import engine
 from sqlmodel import Session, select
 
@@ -85,6 +86,81 @@ def test_get_users():
             session.delete(user)
         session.commit()
 
+def test_get_users_pagination():
+    """Test paging, sorting and filtering the user list"""
+    usernames = ["page_user_a", "page_user_b", "page_user_c"]
+    with Session(engine) as session:
+        for username in usernames:
+            session.add(User(username=username, full_name="Page User", password_hash="pass"))
+        session.commit()
+
+    # Limit and offset
+    response = client.get("/users/", params={"full_name": "Page User", "sort": "username", "limit": 2})
+    assert response.status_code == 200
+    assert [user["username"] for user in response.json()] == usernames[:2]
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.get("/users/", params={"full_name": "Page User", "sort": "username", "limit": 2, "offset": 2})
+    assert [user["username"] for user in response.json()] == usernames[2:]
+
+    # Cursor paging in descending order
+    response = client.get("/users/", params={"full_name": "Page User", "sort": "-username", "limit": 2})
+    first_page = [user["username"] for user in response.json()]
+    response = client.get("/users/", params={
+        "full_name": "Page User", "sort": "-username", "limit": 2,
+        "cursor": response.headers["X-Next-Cursor"]
+    })
+    second_page = [user["username"] for user in response.json()]
+    assert first_page + second_page == list(reversed(usernames))
+    assert "X-Next-Cursor" not in response.headers
+
+    # Equality filter with several values and an exact total
+    response = client.get("/users/", params=[
+        ("username", "page_user_a"), ("username", "page_user_c"), ("with_total", "true")
+    ])
+    assert sorted(user["username"] for user in response.json()) == ["page_user_a", "page_user_c"]
+    assert response.headers["X-Total-Count"] == "2"
+
+    # Clean up
+    with Session(engine) as session:
+        statement = select(User).where(User.username.in_(usernames))
+        for user in session.exec(statement).all():
+            session.delete(user)
+        session.commit()
+
+def test_get_users_estimated_total_with_repeated_filter(monkeypatch):
+    """A filter with several values is planned with EXPLAIN once the table counts as large"""
+    usernames = ["estimate_user_a", "estimate_user_b", "estimate_user_c"]
+    with Session(engine) as session:
+        for username in usernames:
+            session.add(User(username=username, full_name="Estimate User", password_hash="pass"))
+        session.commit()
+    # Every table is above the threshold, so filtered totals come from the planner
+    monkeypatch.setattr(settings, "list_count_estimate_threshold", -1)
+
+    try:
+        response = client.get("/users/", params=[
+            ("username", "estimate_user_a"), ("username", "estimate_user_c"), ("with_total", "true")
+        ])
+        assert response.status_code == 200
+        assert sorted(user["username"] for user in response.json()) == ["estimate_user_a", "estimate_user_c"]
+        assert response.headers["X-Total-Count-Estimated"] == "true"
+        assert int(response.headers["X-Total-Count"]) >= 0
+    finally:
+        with Session(engine) as session:
+            for user in session.exec(select(User).where(User.username.in_(usernames))).all():
+                session.delete(user)
+            session.commit()
+
+def test_get_users_invalid_list_params():
+    """Test that unknown sort fields and mixed paging modes are rejected"""
+    response = client.get("/users/", params={"sort": "password_hash"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid sort field 'password_hash'"
+
+    response = client.get("/users/", params={"offset": 10, "cursor": "abc"})
+    assert response.status_code == 400
+
 def test_get_user():
     """Test getting a specific user by ID"""
     # Crear usuario de prueba